@@ -0,0 +1,78 @@
+# backend/app/api/candidates.py
+import csv
+import io
+from typing import Iterator, Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from backend.app.database import SessionLocal, get_db
+from backend.app.models.candidate import Candidate
+from backend.app.services.candidate_stream import stream_candidates
+from backend.app.services.job_service import get_job_runner
+from backend.app.services.search_service import search
+
+router = APIRouter()
+
+
+@router.get("/search")
+def search_candidates(
+    q: str = Query(..., min_length=1, description="Поисковый запрос"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Полнотекстовый поиск по резюме (BM25 по инвертированному индексу)"""
+    return search(db, q, page=page, page_size=page_size)
+
+
+@router.post("/search/reindex")
+def reindex_candidates(full: bool = False):
+    """Фоновая (пере)индексация: по умолчанию только кандидаты, которых нет в индексе"""
+    job_id = get_job_runner().submit("search_reindex", {"full": full})
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.post("/embeddings/reindex")
+def reindex_embeddings(
+    kind: Literal["candidates", "vacancies"] = "candidates",
+    full: bool = False,
+    build_ivf: bool = False,
+):
+    """Фоновый досчёт эмбеддингов (full — пересчитать все; build_ivf — перестроить IVF)"""
+    job_id = get_job_runner().submit("embedding_reindex", {"kind": kind, "full": full, "build_ivf": build_ivf})
+    return {"job_id": job_id, "status": "queued"}
+
+
+EXPORT_COLUMNS = ("id", "last_name", "first_name", "email", "created_at")
+
+
+@router.get("/export")
+def export_candidates(include_duplicates: bool = False):
+    """Выгрузка кандидатов в CSV потоком (без текста резюме; память не зависит от размера таблицы)"""
+
+    def _rows() -> Iterator[str]:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_COLUMNS)
+        # своя сессия: серверный курсор должен жить, пока отдаётся ответ
+        with SessionLocal() as db:
+            for n, row in enumerate(stream_candidates(
+                db,
+                [getattr(Candidate, c) for c in EXPORT_COLUMNS],
+                exclude_duplicates=not include_duplicates,
+                only_with_text=False,
+            ), 1):
+                writer.writerow(row)
+                if n % 1000 == 0:
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+        yield buf.getvalue()
+
+    return StreamingResponse(
+        _rows(),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="candidates.csv"'},
+    )
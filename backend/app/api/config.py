@@ -2,6 +2,13 @@
 from fastapi import APIRouter, HTTPException
 import os
 
+from backend.app.services.conversation_cache import get_conversation_cache
+from backend.app.services.llm_cache import get_llm_cache
+from backend.app.services.openai_clients import get_client_registry
+from backend.app.services.parse_cache import get_parse_cache
+from backend.app.services.pdf_extractor import get_pdf_pool
+from backend.app.services.text_patterns import timings_report
+
 router = APIRouter()
 
 # Глобальная переменная для хранения ключа в памяти
@@ -19,6 +26,8 @@ async def set_api_key(data: dict):
 
     _api_key = openai_key
     os.environ['OPENAI_API_KEY'] = openai_key
+    # общий реестр клиентов подхватит ключ со следующего запроса (пулы соединений сохраняются)
+    get_client_registry().set_api_key(openai_key)
 
     masked_key = f"{openai_key[:7]}...{openai_key[-4:]}"
 
@@ -55,4 +64,47 @@ async def clear_api_key():
     _api_key = None
     if 'OPENAI_API_KEY' in os.environ:
         del os.environ['OPENAI_API_KEY']
-    return {"status": "success", "message": "API key cleared"}
\ No newline at end of file
+    get_client_registry().set_api_key(None)
+    return {"status": "success", "message": "API key cleared"}
+
+@router.get("/parse-cache")
+async def parse_cache_stats():
+    """Статистика кэша парсинга документов (попадания/промахи/размер)"""
+    return get_parse_cache().stats()
+
+
+@router.get("/llm-cache")
+async def llm_cache_stats():
+    """Статистика кэша ответов LLM (попадания/промахи/истёкшие/размер)"""
+    return get_llm_cache().stats()
+
+
+@router.delete("/llm-cache")
+async def clear_llm_cache():
+    """Сброс кэша ответов LLM"""
+    get_llm_cache().clear()
+    return {"status": "success"}
+
+
+@router.get("/conversation-cache")
+async def conversation_cache_stats():
+    """Кэш истории чатов интервью: сколько диалогов в памяти"""
+    return get_conversation_cache().stats()
+
+
+@router.get("/openai-clients")
+async def openai_clients_stats():
+    """Реестр клиентов OpenAI: ключ задан, поколение ключа, HTTP/2, созданные клиенты"""
+    return get_client_registry().stats()
+
+
+@router.get("/pdf-workers")
+async def pdf_workers_stats():
+    """Пул процессов извлечения текста из PDF: свободные воркеры, перезапуски, лимиты"""
+    return get_pdf_pool().stats()
+
+
+@router.get("/parser-timings")
+async def parser_timings():
+    """Время экстракторов парсеров резюме по полям + последние медленные документы"""
+    return timings_report()
@@ -2,16 +2,21 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from backend.app.database import get_db
-from backend.app.services.ingest_service import ingest_all
+from backend.app.services.ingest_service import ingest_stream
+from backend.app.services.job_service import get_job_runner
 
 router = APIRouter(prefix="/import", tags=["Import"])
 
 @router.post("/resumes")
-def import_resumes(db: Session = Depends(get_db)):
-    count = ingest_all(db, kind="resumes")
-    return {"imported": count}
+def import_resumes(background: bool = True, db: Session = Depends(get_db)):
+    if background:
+        return {"job_id": get_job_runner().submit("ingest", {"kind": "resumes"}), "status": "queued"}
+    stats = ingest_stream(db, kind="resumes")
+    return {"imported": stats.imported, "stats": stats.as_dict()}
 
 @router.post("/vacancies")
-def import_vacancies(db: Session = Depends(get_db)):
-    count = ingest_all(db, kind="vacancies")
-    return {"imported": count}
+def import_vacancies(background: bool = True, db: Session = Depends(get_db)):
+    if background:
+        return {"job_id": get_job_runner().submit("ingest", {"kind": "vacancies"}), "status": "queued"}
+    stats = ingest_stream(db, kind="vacancies")
+    return {"imported": stats.imported, "stats": stats.as_dict()}
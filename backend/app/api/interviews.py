@@ -1,28 +1,76 @@
 # backend/app/api/interviews.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import async_session, get_async_db
 from backend.app.models import Interview, Candidate, Vacancy
 from backend.app.models.interview_message import InterviewMessage, MessageRole
 
-from backend.app.schemas.interview import InterviewCreate, InterviewResponse, InterviewChatRequest, InterviewChatResponse
+from backend.app.schemas.interview import (
+    InterviewCreate, InterviewResponse, InterviewChatRequest, InterviewChatResponse, InterviewChatStreamRequest,
+)
 from backend.app.services.ai_service import AIInterviewer
+from backend.app.services.conversation_cache import get_conversation_cache, summarize_if_needed
+from backend.app.services.job_service import get_job_runner
+from backend.app.services.metrics import get_registry
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 ai_service = AIInterviewer()
 
+# после стольких сообщений (кандидат + интервьюер) интервью считается завершённым
+MAX_INTERVIEW_MESSAGES = 20
+
+_ttft = get_registry().histogram(
+    "interview_chat_ttft_seconds", "Время до первого токена ответа интервьюера (SSE)")
+_duration = get_registry().histogram(
+    "interview_chat_duration_seconds", "Полное время генерации ответа интервьюера (SSE)")
+_stream_errors = get_registry().counter(
+    "interview_chat_stream_errors_total", "Стримы ответа, оборванные ошибкой модели")
+
+
+def _is_complete(reply: str, n_messages: int) -> bool:
+    return "свяжемся" in reply.lower() or n_messages >= MAX_INTERVIEW_MESSAGES
+
+
+def _apply_reply(db: AsyncSession, interview: Interview, reply: str, is_complete: bool) -> InterviewMessage:
+    """Ответ интервьюера + переходы статуса (scheduled → in_progress → completed)."""
+    msg = InterviewMessage(interview_id=interview.id, role=MessageRole.INTERVIEWER, content=reply)
+    db.add(msg)
+    if interview.status == "scheduled":
+        interview.status = "in_progress"
+        interview.started_at = datetime.utcnow()
+    if is_complete:
+        interview.status = "completed"
+        interview.completed_at = datetime.utcnow()
+    return msg
+
+
+async def _submit_evaluation(interview_id: int) -> None:
+    # Оценка интервью — фоновой задачей (после коммита, чтобы воркер увидел все сообщения);
+    # submit пишет строку jobs через sync-сессию — уводим из event loop
+    await run_in_threadpool(get_job_runner().submit, "interview_evaluation", {"interview_id": interview_id})
+
 
 @router.post("/", response_model=InterviewResponse)
-def create_interview(interview: InterviewCreate, db: Session = Depends(get_db)):
+async def create_interview(interview: InterviewCreate, db: AsyncSession = Depends(get_async_db)):
     """Создание нового интервью"""
     # Проверяем существование кандидата и вакансии
-    candidate = db.query(Candidate).filter(Candidate.id == interview.candidate_id).first()
+    candidate = await db.get(Candidate, interview.candidate_id)
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
-    vacancy = db.query(Vacancy).filter(Vacancy.id == interview.vacancy_id).first()
+    vacancy = await db.get(Vacancy, interview.vacancy_id)
     if not vacancy:
         raise HTTPException(status_code=404, detail="Vacancy not found")
 
@@ -30,106 +78,202 @@ def create_interview(interview: InterviewCreate, db: Session = Depends(get_db)):
     db_interview = Interview(**interview.dict())
     db_interview.status = "scheduled"
     db.add(db_interview)
-    db.commit()
-    db.refresh(db_interview)
+    await db.commit()
+    await db.refresh(db_interview)
 
-    # Генерируем начальные вопросы
-    questions = ai_service.generate_interview_questions(vacancy)
+    # Генерируем начальные вопросы (синхронный вызов модели — в threadpool)
+    questions = await run_in_threadpool(ai_service.generate_interview_questions, vacancy)
     db_interview.questions_asked = questions
-    db.commit()
+    await db.commit()
 
     return db_interview
 
 
 @router.get("/", response_model=List[InterviewResponse])
-def get_interviews(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_interviews(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
     """Получение списка интервью"""
-    interviews = db.query(Interview).offset(skip).limit(limit).all()
+    interviews = (await db.execute(select(Interview).offset(skip).limit(limit))).scalars().all()
     return interviews
 
 
 @router.post("/chat", response_model=InterviewChatResponse)
-def interview_chat(request: InterviewChatRequest, db: Session = Depends(get_db)):
+async def interview_chat(
+    request: InterviewChatRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+):
     """Чат во время интервью"""
     # Получаем интервью
-    interview = db.query(Interview).filter(Interview.id == request.interview_id).first()
+    interview = await db.get(Interview, request.interview_id)
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
 
-    # Получаем вакансию
-    vacancy = db.query(Vacancy).filter(Vacancy.id == interview.vacancy_id).first()
-
-    # Получаем историю сообщений
-    messages = db.query(InterviewMessage).filter(
-        InterviewMessage.interview_id == interview.id
-    ).order_by(InterviewMessage.timestamp).all()
-
-    # Формируем историю для AI
-    conversation_history = []
-    for msg in messages:
-        role = "assistant" if msg.role == MessageRole.INTERVIEWER else "user"
-        conversation_history.append({"role": role, "content": msg.content})
-
-    # Сохраняем сообщение кандидата
-    candidate_msg = InterviewMessage(
-        interview_id=interview.id,
-        role=MessageRole.CANDIDATE,
-        content=request.message
-    )
+    # История — из кэша диалогов: последние реплики в бюджете токенов + summary более раннего
+    conversations = get_conversation_cache()
+    conversation = await conversations.get(db, interview.id, interview)
+    history, summary = conversation.prompt_context()
+
+    # Сохраняем сообщение кандидата и отпускаем соединение: генерация идёт секунды,
+    # держать на это время соединение пула «idle in transaction» нельзя
+    interview_id = interview.id
+    candidate_msg = InterviewMessage(interview_id=interview_id, role=MessageRole.CANDIDATE, content=request.text)
     db.add(candidate_msg)
+    await db.commit()
+    conversations.append(interview_id, candidate_msg)
 
-    # Получаем ответ AI
-    ai_response = ai_service.conduct_interview_turn(
-        conversation_history,
-        request.message,
-        vacancy
-    )
+    # Получаем ответ AI (async-клиент: поток не блокируется на время генерации)
+    reply = await ai_service.achat(history, request.text, summary)
+    is_complete = _is_complete(reply, conversation.total + 1)  # кандидат уже учтён в total (append выше), +1 — ответ
 
-    # Сохраняем ответ интервьюера
-    interviewer_msg = InterviewMessage(
-        interview_id=interview.id,
-        role=MessageRole.INTERVIEWER,
-        content=ai_response["response"]
-    )
-    db.add(interviewer_msg)
+    # Ответ интервьюера и статус интервью — отдельной короткой транзакцией
+    reply_msg = await _store_reply(interview_id, reply, is_complete)
+    if reply_msg is None:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    conversations.append(interview_id, reply_msg)
 
-    # Обновляем статус интервью
-    if interview.status == "scheduled":
-        interview.status = "in_progress"
-        interview.started_at = datetime.utcnow()
+    if is_complete:
+        await _submit_evaluation(interview_id)
+    else:
+        background_tasks.add_task(summarize_if_needed, interview_id, ai_service)
 
-    if ai_response["is_complete"]:
-        interview.status = "completed"
-        interview.completed_at = datetime.utcnow()
+    return InterviewChatResponse(interview_id=interview_id, reply=reply)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _store_reply(interview_id: int, reply: str, is_complete: bool) -> Optional[InterviewMessage]:
+    """Ответ интервьюера и статус интервью — в своей сессии (соединение берётся только на запись)."""
+    async with async_session() as db:
+        interview = await db.get(Interview, interview_id)
+        if interview is None:
+            return None
+        msg = _apply_reply(db, interview, reply, is_complete)
+        await db.commit()
+    return msg
+
+
+async def _persist_reply(interview_id: int, reply: str, is_complete: bool) -> None:
+    """После генерации ответа: ответ интервьюера, статус интервью, оценка или сжатие истории."""
+    msg = await _store_reply(interview_id, reply, is_complete)
+    if msg is None:
+        return
+    get_conversation_cache().append(interview_id, msg)
+    if is_complete:
+        await _submit_evaluation(interview_id)
+    else:
+        await summarize_if_needed(interview_id, ai_service)
+
+
+# генерации ответов, идущие независимо от HTTP-ответа (сильные ссылки: event loop держит слабые)
+_reply_tasks: Set["asyncio.Task[None]"] = set()
+
+
+async def _generate_reply(
+    interview_id: int,
+    history: List[Dict[str, str]],
+    message: str,
+    summary: Optional[str],
+    n_messages: int,
+    events: "asyncio.Queue[Tuple[str, Any]]",
+) -> None:
+    """
+    Генерация и сохранение ответа интервьюера. Запускается отдельной задачей, а не
+    внутри стрима: если клиент отключился посреди ответа, Starlette отменяет только
+    отдачу SSE, а ответ догенерируется и сохраняется (кандидат увидит его в истории).
+    Фрагменты для стрима кладутся в events: ("token", delta), ("error", None), ("done", {...}).
+    """
+    t0 = time.perf_counter()
+    ttft = None
+    parts: List[str] = []
+    try:
+        async for delta in ai_service.astream(history, message, summary):
+            if ttft is None:
+                ttft = time.perf_counter() - t0
+                _ttft.observe(ttft)
+            parts.append(delta)
+            events.put_nowait(("token", delta))
+    except Exception as e:
+        _stream_errors.inc()
+        logger.warning("interview %s: reply stream failed: %s", interview_id, e)
+        events.put_nowait(("error", None))
+        return
+    total = time.perf_counter() - t0
+    _duration.observe(total)
+    reply = "".join(parts)
+    is_complete = _is_complete(reply, n_messages)
+    events.put_nowait(("done", {
+        "is_complete": is_complete,
+        "ttft_ms": round(1000 * ttft, 1) if ttft is not None else None,
+        "total_ms": round(1000 * total, 1),
+    }))
+    if not reply:
+        return
+    try:
+        await _persist_reply(interview_id, reply, is_complete)
+    except Exception:
+        logger.exception("interview %s: failed to persist streamed reply", interview_id)
+
+
+@router.post("/chat/stream")
+async def interview_chat_stream(request: InterviewChatStreamRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Чат во время интервью с потоковым ответом (Server-Sent Events):
+      event: token — {"delta": "..."} по мере генерации;
+      event: done  — {"is_complete", "ttft_ms", "total_ms"};
+      event: error — {"detail"} (ответ не сохраняется).
+    Сообщение кандидата сохраняется сразу, ответ интервьюера — после генерации,
+    даже если клиент отключился, не дочитав стрим (см. _generate_reply).
+    """
+    interview = await db.get(Interview, request.interview_id)
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    conversations = get_conversation_cache()
+    conversation = await conversations.get(db, interview.id, interview)
+    history, summary = conversation.prompt_context()
+    candidate_msg = InterviewMessage(interview_id=interview.id, role=MessageRole.CANDIDATE, content=request.message)
+    db.add(candidate_msg)
+    await db.commit()
+    conversations.append(interview.id, candidate_msg)
+
+    events: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue()
+    task = asyncio.create_task(_generate_reply(
+        interview.id, history, request.message, summary, conversation.total + 1, events,
+    ))
+    _reply_tasks.add(task)
+    task.add_done_callback(_reply_tasks.discard)
+
+    async def _events():
+        while True:
+            kind, data = await events.get()
+            if kind == "token":
+                yield _sse("token", {"delta": data})
+            elif kind == "error":
+                yield _sse("error", {"detail": "Не удалось получить ответ интервьюера"})
+                return
+            else:
+                yield _sse("done", data)
+                return
 
-        # Оцениваем интервью
-        evaluation = ai_service.evaluate_interview(conversation_history, vacancy)
-        interview.overall_score = evaluation.get("overall_score", 0)
-        interview.technical_score = evaluation.get("technical_score", 0)
-        interview.communication_score = evaluation.get("communication_score", 0)
-        interview.motivation_score = evaluation.get("motivation_score", 0)
-        interview.strengths = evaluation.get("strengths", [])
-        interview.weaknesses = evaluation.get("weaknesses", [])
-        interview.ai_recommendation = evaluation.get("recommendation", "")
-        interview.ai_summary = evaluation.get("hr_comment", "")
-
-    db.commit()
-
-    return InterviewChatResponse(
-        response=ai_response["response"],
-        is_complete=ai_response["is_complete"]
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx не должен копить ответ целиком
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
 @router.get("/{interview_id}/report")
-def get_interview_report(interview_id: int, db: Session = Depends(get_db)):
+async def get_interview_report(interview_id: int, db: AsyncSession = Depends(get_async_db)):
     """Получение отчета по интервью"""
-    interview = db.query(Interview).filter(Interview.id == interview_id).first()
+    interview = await db.get(Interview, interview_id)
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
 
-    candidate = db.query(Candidate).filter(Candidate.id == interview.candidate_id).first()
-    vacancy = db.query(Vacancy).filter(Vacancy.id == interview.vacancy_id).first()
+    candidate = await db.get(Candidate, interview.candidate_id)
+    vacancy = await db.get(Vacancy, interview.vacancy_id)
 
     return {
         "interview": interview,
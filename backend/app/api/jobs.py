@@ -0,0 +1,41 @@
+# backend/app/api/jobs.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from backend.app.database import get_db
+from backend.app.models.job import Job
+from backend.app.services.job_service import get_job_runner
+
+router = APIRouter()
+
+
+@router.get("/")
+def list_jobs(status: Optional[str] = None, kind: Optional[str] = None,
+              limit: int = 50, db: Session = Depends(get_db)):
+    """Последние фоновые задачи (с фильтром по статусу/типу)"""
+    q = db.query(Job)
+    if status:
+        q = q.filter(Job.status == status)
+    if kind:
+        q = q.filter(Job.kind == kind)
+    return [j.to_dict() for j in q.order_by(Job.id.desc()).limit(min(limit, 500))]
+
+
+@router.get("/{job_id}")
+def get_job_status(job_id: int, db: Session = Depends(get_db)):
+    """Статус, прогресс и результат задачи"""
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.post("/{job_id}/cancel")
+def cancel_job(job_id: int):
+    """Отмена: queued — сразу, running — на ближайшей контрольной точке"""
+    job = get_job_runner().cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -1,25 +1,43 @@
 # backend/app/api/matching.py
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from typing import Literal
+
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 
 from backend.app.database import SessionLocal
 from backend.app.services.matcher_service import rank_candidates_for_vacancy
+from backend.app.services.job_service import get_job_runner
 
 router = APIRouter(prefix="/matching", tags=["Matching"])
 
-def get_db():
-    with SessionLocal() as db:
-        yield db
-
 class RankRequest(BaseModel):
     vacancy_id: int
     top_k: int = 5
     weights: dict[str, int] | None = None
+    # этап 1: дешёвый отбор по всем кандидатам (лексический или по эмбеддингам)
+    recall: Literal["bm25", "jaccard", "vector", "none"] = "bm25"
+    recall_top_n: int | None = Field(default=50, ge=1, description="Сколько кандидатов передать в LLM (None — всех)")
+    # этап 2: LLM-скоринг шорт-листа
+    llm_scorer: Literal["pointwise", "listwise", "none"] = "pointwise"
+    use_cache: bool = Field(default=True, description="False — перескорить в обход кэша ответов LLM")
+    incremental: bool = Field(default=True, description="Скорить только новых/изменившихся кандидатов, остальные — из vacancy_matches")
 
 @router.post("/rank")
-def rank(req: RankRequest, db: Session = Depends(get_db)):
-    items = rank_candidates_for_vacancy(
-        db, vacancy_id=req.vacancy_id, top_k=req.top_k, weights=req.weights
-    )
+async def rank(req: RankRequest, background: bool = True):
+    # Матчинг — синхронный CPU/LLM-конвейер на sync-сессии: в event loop его не тащим,
+    # очередь задач — короткая запись в jobs, inline-режим — в threadpool со своей сессией
+    if background:
+        job_id = await run_in_threadpool(get_job_runner().submit, "rank", req.model_dump())
+        return {"job_id": job_id, "status": "queued"}
+    items = await run_in_threadpool(_rank_inline, req)
     return {"items": items}
+
+
+def _rank_inline(req: RankRequest) -> list[dict]:
+    with SessionLocal() as db:
+        return rank_candidates_for_vacancy(
+            db, vacancy_id=req.vacancy_id, top_k=req.top_k, weights=req.weights,
+            recall_scorer=req.recall, recall_top_n=req.recall_top_n, llm_scorer=req.llm_scorer,
+            use_cache=req.use_cache, incremental=req.incremental,
+        )
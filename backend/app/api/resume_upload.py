@@ -1,12 +1,19 @@
 # backend/app/api/resume_upload.py
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import random
 import json
-import re
-import io
+
+from backend.app.services.parse_cache import get_parse_cache, make_key, sha256_bytes
+from backend.app.services.document_extractor import DocumentExtractionError, PdfExtractionTimeout, extract_document
+from backend.app.services.skill_taxonomy import get_taxonomy
+from backend.app.services.text_patterns import EMAIL_RE, EXPERIENCE_YEARS_RES, PHONE_RE, ExtractorTimings, first_match
 
 router = APIRouter()
 
+# Версия SimpleResumeParser — входит в ключ кэша парсинга
+SIMPLE_PARSER_VERSION = "6"
+
 # Временное хранилище в памяти
 _parsed_resumes = {}
 
@@ -14,48 +21,35 @@ _parsed_resumes = {}
 # Простой парсер резюме без внешних зависимостей
 class SimpleResumeParser:
     def parse(self, content: bytes, file_type: str) -> dict:
-        """Упрощенный парсер резюме"""
+        """Упрощенный парсер резюме (успешный результат кэшируется по содержимому)"""
+        cache = get_parse_cache()
+        key = make_key("simple_parser.parse", SIMPLE_PARSER_VERSION, sha256_bytes(content), file_type=file_type)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
-            # Извлекаем текст
-            if file_type == 'txt':
-                text = content.decode('utf-8', errors='ignore')
-            elif file_type == 'pdf':
-                # Простая обработка PDF
-                try:
-                    import PyPDF2
-                    pdf_file = io.BytesIO(content)
-                    pdf_reader = PyPDF2.PdfReader(pdf_file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                except:
-                    text = "PDF parsing failed - using mock data"
-            elif file_type == 'docx':
-                # Простая обработка DOCX
-                try:
-                    import docx
-                    doc_file = io.BytesIO(content)
-                    doc = docx.Document(doc_file)
-                    text = ""
-                    for paragraph in doc.paragraphs:
-                        text += paragraph.text + "\n"
-                except:
-                    text = "DOCX parsing failed - using mock data"
-            else:
-                text = str(content)
+            # Извлекаем текст: формат — по сигнатуре содержимого, file_type — подсказка
+            try:
+                text = extract_document(content, hint=file_type).text
+            except (DocumentExtractionError, PdfExtractionTimeout):
+                text = f"{file_type.upper()} parsing failed - using mock data"
 
             # Извлекаем данные
+            t = ExtractorTimings("simple_parser")
             result = {
                 "full_text": text[:1000],  # Первые 1000 символов
-                "name": self._extract_name(text),
-                "email": self._extract_email(text),
-                "phone": self._extract_phone(text),
-                "skills": self._extract_skills(text),
-                "experience_years": self._extract_experience_years(text),
-                "education": self._extract_education(text),
+                "name": t.run("name", self._extract_name, text),
+                "email": t.run("email", self._extract_email, text),
+                "phone": t.run("phone", self._extract_phone, text),
+                "skills": t.run("skills", self._extract_skills, text),
+                "experience_years": t.run("experience_years", self._extract_experience_years, text),
+                "education": t.run("education", self._extract_education, text),
                 "summary": text[:300] if text else "No summary available"
             }
+            t.report(text)
 
+            cache.set(key, result)
             return result
 
         except Exception as e:
@@ -84,48 +78,23 @@ class SimpleResumeParser:
 
     def _extract_email(self, text: str) -> str:
         """Извлечение email"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        return emails[0] if emails else "no-email@example.com"
+        return first_match(EMAIL_RE, text, "no-email@example.com")
 
     def _extract_phone(self, text: str) -> str:
         """Извлечение телефона"""
-        phone_patterns = [
-            r'\+\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}',
-            r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
-            r'\d{10,11}'
-        ]
-        for pattern in phone_patterns:
-            phones = re.findall(pattern, text)
-            if phones:
-                return phones[0]
-        return ""
+        return first_match(PHONE_RE, text)
 
     def _extract_skills(self, text: str) -> list:
         """Извлечение навыков"""
-        tech_skills = [
-            'Python', 'JavaScript', 'TypeScript', 'Java', 'C#', 'C++', 'Go', 'Rust', 'PHP', 'Ruby',
-            'React', 'Angular', 'Vue', 'HTML', 'CSS', 'Node.js', 'Express', 'FastAPI', 'Django', 'Flask',
-            'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Docker', 'Kubernetes', 'AWS', 'Git'
-        ]
-
-        found_skills = []
-        text_lower = text.lower()
-        for skill in tech_skills:
-            if skill.lower() in text_lower:
-                found_skills.append(skill)
+        taxonomy = get_taxonomy()
+        found_skills = [taxonomy.name("skills", i) for i in taxonomy.extract(text, ["skills"])["skills"]]
 
         return found_skills[:10] if found_skills else ["General Skills"]
 
     def _extract_experience_years(self, text: str) -> float:
         """Извлечение опыта в годах"""
-        patterns = [
-            r'(\d+)\s*(?:лет|года?|years?)\s*(?:опыта?|experience)',
-            r'(?:опыт|experience)\s*(\d+)\s*(?:лет|года?|years?)'
-        ]
-
-        for pattern in patterns:
-            matches = re.search(pattern, text, re.IGNORECASE)
+        for pattern in EXPERIENCE_YEARS_RES:
+            matches = pattern.search(text)
             if matches:
                 return float(matches.group(1))
         return 2.0  # Default
@@ -153,21 +122,19 @@ parser = SimpleResumeParser()
 async def upload_resume(file: UploadFile = File(...)):
     """Загрузка и парсинг резюме"""
 
-    # Определяем тип файла
+    # Тип файла по расширению — только подсказка, формат определяется по содержимому
     file_type = 'txt'  # default
-    if file.filename.endswith('.pdf'):
-        file_type = 'pdf'
-    elif file.filename.endswith('.docx'):
-        file_type = 'docx'
-    elif file.filename.endswith('.txt'):
-        file_type = 'txt'
+    suffix = (file.filename or '').rsplit('.', 1)[-1].lower()
+    if suffix in ('pdf', 'docx', 'doc', 'rtf', 'txt'):
+        file_type = suffix
 
     # Читаем содержимое
     content = await file.read()
 
     # Парсим резюме
     try:
-        parsed_data = parser.parse(content, file_type)
+        # разбор синхронный (PDF ждёт изолированный процесс до PDF_EXTRACT_TIMEOUT) — не в event loop
+        parsed_data = await run_in_threadpool(parser.parse, content, file_type)
 
         # Сохраняем в памяти
         resume_id = random.randint(1000, 9999)
@@ -1,7 +1,8 @@
 # backend/app/api/vacancies.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from backend.app.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.database import get_async_db
 from backend.app.models.vacancy import Vacancy
 
 router = APIRouter(prefix="/vacancies", tags=["Vacancies"])
@@ -11,16 +12,14 @@ class VacancyCreate(BaseModel):
     description: str
 
 @router.post("")
-def create_vacancy(payload: VacancyCreate):
-    with SessionLocal() as db:
-        v = Vacancy(title=payload.title, description=payload.description)
-        db.add(v); db.commit(); db.refresh(v)
-        return {"id": v.id}
+async def create_vacancy(payload: VacancyCreate, db: AsyncSession = Depends(get_async_db)):
+    v = Vacancy(title=payload.title, description=payload.description)
+    db.add(v); await db.commit(); await db.refresh(v)
+    return {"id": v.id}
 
 @router.get("/{vacancy_id}")
-def get_vacancy(vacancy_id: int):
-    with SessionLocal() as db:
-        v = db.get(Vacancy, vacancy_id)
-        if not v:
-            raise HTTPException(404, "Vacancy not found")
-        return {"id": v.id, "title": v.title, "description": v.description}
+async def get_vacancy(vacancy_id: int, db: AsyncSession = Depends(get_async_db)):
+    v = await db.get(Vacancy, vacancy_id)
+    if not v:
+        raise HTTPException(404, "Vacancy not found")
+    return {"id": v.id, "title": v.title, "description": v.description}
@@ -66,8 +66,142 @@ class Settings(BaseSettings):
             f"@{host}:{self.DB_PORT}/{self.DB_NAME}?sslmode=disable"
         )
 
+    # Async-драйвер для FastAPI-роутеров; по умолчанию — тот же DSN с postgresql+asyncpg
+    ASYNC_DATABASE_URL: str | None = None
+
+    @property
+    def async_db_url(self) -> str:
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        url = self.db_url
+        for prefix in ("postgresql+psycopg://", "postgresql+psycopg2://", "postgresql://"):
+            if url.startswith(prefix):
+                url = "postgresql+asyncpg://" + url[len(prefix):]
+                break
+        return url
+
+    # --- Пул соединений БД (sync и async движки) ---
+    DB_POOL_SIZE: int = Field(default=5, description="Постоянных соединений в пуле")
+    DB_MAX_OVERFLOW: int = Field(default=10, description="Сверх pool_size при пиках (закрываются после возврата)")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, description="Сколько ждать свободного соединения, с")
+    DB_POOL_RECYCLE: int = Field(default=3600, description="Пересоздавать соединения старше N секунд (-1 — никогда)")
+    DB_POOL_PRE_PING: bool = Field(
+        default=True,
+        description="Пессимистичная проверка соединения при выдаче из пула (+1 round trip); "
+                    "False — оптимистичная стратегия: обрыв ловится на первом запросе, пул сбрасывается",
+    )
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=30000, description="statement_timeout сессии Postgres, мс (0 — без лимита)")
+    DB_CONNECT_TIMEOUT: int = Field(default=10, description="Таймаут установки соединения, с")
+
     DEBUG: bool = Field(default=False)
 
+    # --- Импорт (ingest) ---
+    INGEST_WORKERS: int | None = Field(
+        default=None,
+        description="Число процессов для парсинга файлов (None = cpu_count, 0 = в текущем процессе)",
+    )
+    INGEST_MAX_IN_FLIGHT: int = Field(default=64, description="Максимум файлов в обработке одновременно")
+    INGEST_BATCH_SIZE: int = Field(default=500, description="Размер пачки для bulk insert")
+    INGEST_COMMIT_EVERY: int = Field(default=2000, description="Коммит после каждых N вставленных записей")
+
+    # --- Фоновые задачи ---
+    JOB_WORKERS: int = Field(default=4, description="Размер локального пула воркеров фоновых задач")
+    JOB_PROGRESS_INTERVAL: float = Field(default=1.0, description="Не чаще раза в N секунд писать прогресс в БД")
+    JOB_HEARTBEAT_INTERVAL: float = Field(
+        default=15.0, description="Раз в N секунд воркер продлевает аренду своих running-задач (jobs.heartbeat_at)"
+    )
+    JOB_LEASE_TIMEOUT: float = Field(
+        default=120.0,
+        description="Running-задача без heartbeat дольше N секунд считается брошенной (воркер умер) и помечается failed",
+    )
+
+    # --- Кэш парсинга документов ---
+    PARSE_CACHE_ENABLED: bool = Field(default=True)
+    PARSE_CACHE_PATH: Optional[Path] = Field(default=None, description="SQLite-файл кэша (по умолчанию backend/temp/parse_cache.sqlite)")
+    PARSE_CACHE_MAX_MB: int = Field(default=512, description="Предельный размер кэша, МБ (LRU-вытеснение)")
+
+    # --- Извлечение текста из PDF (изолированные процессы) ---
+    PDF_ISOLATED: bool = Field(default=True, description="Разбирать PDF в пуле дочерних процессов (False — в текущем, без таймаута)")
+    PDF_WORKERS: int = Field(default=2, description="Процессов-экстракторов PDF")
+    PDF_EXTRACT_TIMEOUT: float = Field(default=30.0, description="Лимит времени на один PDF, с (по истечении воркер убивается)")
+    PDF_WORKER_MEMORY_MB: int = Field(default=1024, description="Лимит адресного пространства воркера, МБ (POSIX; 0 — без лимита)")
+    PDF_WORKER_MAX_TASKS: int = Field(default=200, description="Перезапуск воркера после стольких документов")
+    PDF_MAX_PAGES: int = Field(default=30, description="Страниц по умолчанию, если вызывающий не задал (0 — все)")
+    PDF_MIN_CHARS_PER_PAGE: int = Field(default=100, description="Меньше непробельных символов на страницу от pypdf — повтор через pdfminer")
+
+    # --- Извлечение текста документов (DOC/TXT) ---
+    DOC_EXTRACT_TIMEOUT: float = Field(default=30.0, description="Лимит времени внешнего конвертера .doc (antiword/catdoc), с")
+    TEXT_FALLBACK_ENCODING: str = Field(default="cp1251", description="Кодировка текстовых файлов, если это не UTF-8 и нет BOM")
+
+    # --- Таксономия навыков ---
+    SKILL_TAXONOMY_PATH: Optional[Path] = Field(
+        default=None, description="Доп. JSON навыков/языков поверх backend/app/data/skills_taxonomy.json")
+
+    # --- Парсинг резюме: замеры экстракторов ---
+    PARSER_SLOW_DOCUMENT_MS: float = Field(
+        default=250.0, description="Документ, разобранный дольше (сумма экстракторов, мс), пишется в лог и /config/parser-timings")
+
+    # --- Кэш ответов LLM ---
+    LLM_CACHE_ENABLED: bool = Field(default=True)
+    LLM_CACHE_PATH: Optional[Path] = Field(default=None, description="SQLite-файл кэша (по умолчанию backend/temp/llm_cache.sqlite)")
+    LLM_CACHE_MAX_MB: int = Field(default=256, description="Предельный размер кэша, МБ (LRU-вытеснение)")
+    LLM_CACHE_TTL_DAYS: float = Field(default=30.0, description="Срок жизни ответа, дней (0 — бессрочно)")
+
+    # --- OpenAI HTTP-клиент (общий пул соединений) ---
+    OPENAI_HTTP2: bool = Field(default=True, description="HTTP/2 к API (нужен пакет h2; без него — HTTP/1.1 keep-alive)")
+    OPENAI_MAX_CONNECTIONS: int = Field(default=100, description="Предел одновременных соединений пула")
+    OPENAI_MAX_KEEPALIVE: int = Field(default=20, description="Сколько простаивающих соединений держать открытыми")
+    OPENAI_KEEPALIVE_EXPIRY: float = Field(default=30.0, description="Закрывать простаивающее соединение через N секунд")
+    OPENAI_TIMEOUT: float = Field(default=60.0, description="Таймаут запроса к API по умолчанию, с")
+
+    # --- LLM-скоринг ---
+    OPENAI_BASE_URL: Optional[str] = Field(default=None, description="Альтернативный OpenAI-совместимый endpoint (например, локальный фейк)")
+    SCORING_CONCURRENCY: int = Field(default=16, description="Максимум одновременных запросов к LLM")
+    SCORING_RATE_PER_SEC: float = Field(default=10.0, description="Лимит запросов в секунду (0 = без лимита)")
+    SCORING_BURST: int = Field(default=20, description="Ёмкость token bucket (допустимый всплеск)")
+    SCORING_MAX_RETRIES: int = Field(default=5, description="Повторы на 429/5xx/сетевых ошибках")
+    SCORING_TIMEOUT: float = Field(default=60.0, description="Таймаут одного запроса, с")
+    RANK_CONTEXT_TOKENS: int = Field(default=16000, description="Бюджет входных токенов на один listwise-запрос")
+    RANK_MAX_OUTPUT_TOKENS: int = Field(default=4096, description="Предел токенов ответа на пачку")
+    RANK_OUTPUT_TOKENS_PER_CANDIDATE: int = Field(default=60, description="Оценка токенов ответа на одного кандидата")
+    RANK_MAX_CANDIDATE_TOKENS: int = Field(default=1500, description="Текст кандидата обрезается до N токенов")
+    RANK_BATCH_CONCURRENCY: int = Field(default=4, description="Сколько пачек ранжировать параллельно")
+    RANK_CALIBRATION_ANCHORS: int = Field(default=2, description="Якорных кандидатов в каждой пачке (калибровка шкалы)")
+
+    # --- Интервью: история диалога ---
+    CONVERSATION_CACHE_SIZE: int = Field(default=1000, description="Сколько диалогов держать в памяти процесса (LRU)")
+    CONVERSATION_CACHE_TTL: float = Field(
+        default=900.0, description="Выгрузить диалог из памяти, если он не использовался N секунд (0 — не выгружать)")
+    INTERVIEW_HISTORY_TOKENS: int = Field(default=3000, description="Бюджет токенов на последние реплики в промпте")
+    INTERVIEW_SUMMARY_TRIGGER_TOKENS: int = Field(
+        default=1500, description="Сжимать вытесненные из окна реплики, когда их набралось на N токенов")
+    INTERVIEW_SUMMARY_MAX_TOKENS: int = Field(default=400, description="Предел длины rolling summary, токенов")
+
+    # --- Выборка кандидатов ---
+    CANDIDATE_STREAM_BATCH: int = Field(default=1000, description="Строк на пачку при потоковом чтении кандидатов (yield_per)")
+
+    # --- Полнотекстовый поиск кандидатов ---
+    SEARCH_INDEX_ENABLED: bool = Field(default=True, description="Обновлять инвертированный индекс при импорте резюме")
+    SEARCH_STATS_TTL: float = Field(default=60.0, description="Сколько секунд кэшировать N/avgdl для BM25")
+    SEARCH_POSTINGS_CAP: int = Field(default=1000, description="Лучших постингов на термин в первом проходе top-k")
+    SEARCH_POSTINGS_MAX: int = Field(
+        default=16000, description="Предел постингов на термин при доборе top-k (дальше ответ приближённый)")
+    SEARCH_RESOLVE_MAX: int = Field(
+        default=4000, description="Сколько кандидатов уточнять по PK, если предел постингов исчерпан")
+
+    # --- Эмбеддинги ---
+    EMBEDDING_PROVIDER: str = Field(default="hashing", description="hashing (локальный, без сети) | openai")
+    EMBEDDING_MODEL: str = Field(default="text-embedding-3-small")
+    EMBEDDING_DIM: int = Field(default=256, description="Размерность векторов")
+    EMBEDDINGS_PATH: Optional[Path] = Field(default=None, description="Каталог хранилищ векторов (по умолчанию backend/temp/embeddings)")
+    EMBEDDINGS_ON_INGEST: bool = Field(default=True, description="Считать векторы при импорте")
+    EMBEDDING_IVF_NPROBE: int = Field(default=8, description="Сколько IVF-списков просматривать при поиске (0 — полный перебор)")
+
+    # --- Почти-дубликаты резюме (MinHash/LSH) ---
+    NEAR_DUP_ACTION: str = Field(default="flag", description="flag — импортировать с пометкой duplicate_of | merge — не импортировать | off")
+    NEAR_DUP_THRESHOLD: float = Field(default=0.85, description="Порог оценки Jaccard по 3-граммам слов")
+    NEAR_DUP_NUM_PERM: int = Field(default=128, description="Длина MinHash-подписи")
+
     @field_validator("DATABASE_URL", mode="before")
     @classmethod
     def _normalize_db_url(cls, v: str) -> str:
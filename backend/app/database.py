@@ -2,14 +2,17 @@
 from contextlib import contextmanager
 import logging
 import time
-from typing import Generator
+from typing import AsyncGenerator, Callable, Generator, Optional
 
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.exc import TimeoutError as SATimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import Pool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 
 from .config import settings
+from .services.metrics import get_registry
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
@@ -20,17 +23,85 @@ DB_URL = getattr(settings, "db_url", None) or getattr(settings, "DATABASE_URL",
 if not DB_URL:
     raise RuntimeError("DATABASE_URL is not configured")
 
+# --- Пул соединений ---
+# Параметры — из Settings (DB_POOL_*). Отдельного пинга на checkout нет: живость соединения
+# проверяет pool_pre_ping (или, при DB_POOL_PRE_PING=False, SQLAlchemy инвалидирует пул
+# на первой ошибке разрыва). timezone/statement_timeout задаются параметрами подключения,
+# без лишнего SET на каждое соединение.
+_pool_wait = get_registry().histogram(
+    "db_pool_wait_seconds", "Ожидание соединения из пула (включая установку нового)",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+_pool_timeouts = get_registry().counter("db_pool_timeouts_total", "Не дождались соединения за DB_POOL_TIMEOUT")
+
+
+class _TimedPoolMixin:
+    metrics_label = ""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except SATimeoutError:
+            _pool_timeouts.labels(pool=self.metrics_label).inc()
+            raise
+        finally:
+            _pool_wait.labels(pool=self.metrics_label).observe(time.perf_counter() - t0)
+
+
+class _TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class _TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _register_pool_gauges(label: str, get_pool: Callable[[], Optional[Pool]]) -> None:
+    reg = get_registry()
+
+    def _read(fn: Callable[[QueuePool], float]) -> Callable[[], float]:
+        def _value() -> float:
+            pool = get_pool()
+            return fn(pool) if isinstance(pool, QueuePool) else 0.0
+        return _value
+
+    reg.gauge("db_pool_size", "Постоянных соединений в пуле").labels(pool=label).set_function(
+        _read(lambda p: p.size()))
+    reg.gauge("db_pool_checked_out", "Соединений выдано из пула").labels(pool=label).set_function(
+        _read(lambda p: p.checkedout()))
+    # QueuePool.overflow() отрицателен, пока пул не заполнен
+    reg.gauge("db_pool_overflow", "Соединений сверх pool_size").labels(pool=label).set_function(
+        _read(lambda p: max(0, p.overflow())))
+
+
+def _pg_options() -> str:
+    opts = "-c timezone=utc"
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        opts += f" -c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return opts
+
+
 engine = create_engine(
     DB_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_pre_ping=True,
-    pool_recycle=3600,
+    poolclass=_TimedQueuePool,
     future=True,
-    connect_args={"connect_timeout": 10, "options": "-c timezone=utc"},
+    connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT, "options": _pg_options()},
+    **pool_options(),
 )
 if getattr(settings, "DEBUG", False):
     engine.echo = True
+_register_pool_gauges("sync", lambda: engine.pool)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -39,6 +110,53 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# --- Async-движок для FastAPI-роутеров (asyncpg) ---
+# Создаётся лениво: воркеры фоновых задач, alembic и скрипты работают только с sync-движком
+# и не требуют asyncpg. Сессии — из AsyncSessionLocal (привязывается при создании движка).
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+_async_engine: Optional[AsyncEngine] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        url = make_url(settings.async_db_url)
+        connect_args: dict = {}
+        if url.get_backend_name() == "postgresql":
+            # asyncpg не понимает sslmode/options из DSN psycopg — переводим в его параметры
+            if url.query.get("sslmode") == "disable":
+                connect_args["ssl"] = False
+            url = url.difference_update_query(["sslmode"])
+            server_settings = {"timezone": "utc"}
+            if settings.DB_STATEMENT_TIMEOUT_MS:
+                server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+            connect_args.update(timeout=settings.DB_CONNECT_TIMEOUT, server_settings=server_settings)
+        _async_engine = create_async_engine(
+            url,
+            poolclass=_TimedAsyncQueuePool,
+            echo=bool(getattr(settings, "DEBUG", False)),
+            connect_args=connect_args,
+            **pool_options(),
+        )
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+_register_pool_gauges("async", lambda: _async_engine.sync_engine.pool if _async_engine else None)
+
+
+def async_session() -> AsyncSession:
+    """Новая AsyncSession (движок создаётся при первом вызове)."""
+    get_async_engine()
+    return AsyncSessionLocal()
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
 Base = declarative_base()
 Base.metadata.naming_convention = {
     "ix": "ix_%(column_0_label)s",
@@ -48,20 +166,6 @@ Base.metadata.naming_convention = {
     "pk": "pk_%(table_name)s",
 }
 
-@event.listens_for(Pool, "connect")
-def on_connect(dbapi_conn, _):
-    cur = dbapi_conn.cursor()
-    cur.execute("SET statement_timeout = '30s'")
-    cur.close()
-
-@event.listens_for(Pool, "checkout")
-def ping_connection(dbapi_conn, *_):
-    cur = dbapi_conn.cursor()
-    try:
-        cur.execute("SELECT 1")
-    finally:
-        cur.close()
-
 # --- ЕДИНСТВЕННЫЙ dependency с автокоммитом ---
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -74,6 +178,16 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async-аналог get_db: тот же автокоммит, но без занятого слота threadpool на время запросов."""
+    async with async_session() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
 @contextmanager
 def get_db_session() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -139,5 +253,6 @@ def get_database_stats() -> dict:
                 stats[t] = f"Error: {e}"
     return stats
 
-__all__ = ["engine", "SessionLocal", "Base", "get_db", "get_db_session",
+__all__ = ["engine", "SessionLocal", "Base", "get_db", "get_db_session", "pool_options",
+           "AsyncSessionLocal", "get_async_engine", "async_session", "get_async_db", "dispose_async_engine",
            "init_database", "check_database_connection", "get_database_stats"]
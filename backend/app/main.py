@@ -2,10 +2,12 @@
 from dotenv import load_dotenv
 load_dotenv()  # .env подхватится до любых импортов, читающих переменные окружения
 
+import logging
 import os
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 # Роутеры API
 from backend.app.api.imports import router as imports_router
@@ -14,6 +16,12 @@ from backend.app.api.vacancies import router as vacancies_router
 from backend.app.api.interviews import router as interviews_router
 from backend.app.api.config import router as config_router
 from backend.app.api.resume_upload import router as resume_upload_router
+from backend.app.api.jobs import router as jobs_router
+from backend.app.api.candidates import router as candidates_router
+from backend.app.database import dispose_async_engine
+from backend.app.services.job_service import get_job_runner
+from backend.app.services.metrics import get_registry
+from backend.app.services.pdf_extractor import close_pdf_pool
 
 # ВАЖНО: никаких Base.metadata.create_all — миграциями управляет Alembic
 
@@ -39,6 +47,32 @@ app.include_router(interviews_router,  prefix="/interviews", tags=["Interviews"]
 app.include_router(matching_router,    prefix="/matching",   tags=["Matching"])
 app.include_router(config_router,      prefix="/config",     tags=["Config"])
 app.include_router(resume_upload_router, prefix="/resume",   tags=["Resume"])
+app.include_router(jobs_router,        prefix="/jobs",       tags=["Jobs"])
+app.include_router(candidates_router,  prefix="/candidates", tags=["Candidates"])
+
+
+# Фоновые задачи: подхватываем незавершённые после рестарта, при остановке не ждём долгие
+@app.on_event("startup")
+def _start_jobs():
+    try:
+        get_job_runner().recover()
+    except Exception as e:
+        logging.getLogger(__name__).warning("job recovery skipped: %s", e)
+
+
+@app.on_event("shutdown")
+def _stop_jobs():
+    get_job_runner().shutdown(wait=False)
+
+
+@app.on_event("shutdown")
+async def _close_db():
+    await dispose_async_engine()
+
+
+@app.on_event("shutdown")
+def _stop_pdf_workers():
+    close_pdf_pool()
 
 # Базовые health/doc endpoints
 @app.get("/")
@@ -49,6 +83,13 @@ async def root():
 async def health():
     return {"status": "ok", "openai_key_set": bool(os.getenv("OPENAI_API_KEY"))}
 
+@app.get("/metrics")
+async def metrics(format: str = "prometheus"):
+    """Метрики процесса: Prometheus text format или JSON (?format=json)"""
+    if format == "json":
+        return get_registry().snapshot()
+    return PlainTextResponse(get_registry().render_prometheus())
+
 if __name__ == "__main__":
     # Запуск для локалки: uvicorn backend.app.main:app --reload --port 8000
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -5,9 +5,15 @@ from .interview import Interview
 from .interview_message import InterviewMessage, MessageRole
 from .evaluation import InterviewEvaluation  # если используешь
 from .vacancy_match import VacancyMatch     # если используешь
+from .job import Job, JobStatus
+from .search_index import SearchDocument, SearchTerm, SearchPosting
+from .near_duplicate import CandidateMinHash, CandidateLSHBucket
 
 __all__ = [
     "Candidate", "Vacancy", "Interview",
     "InterviewMessage", "MessageRole",
     "InterviewEvaluation", "VacancyMatch",
+    "Job", "JobStatus",
+    "SearchDocument", "SearchTerm", "SearchPosting",
+    "CandidateMinHash", "CandidateLSHBucket",
 ]
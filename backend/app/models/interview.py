@@ -102,6 +102,11 @@ class Interview(Base):
     audio_gdrive_id = Column(String(255), nullable=True, comment="ID аудио в Google Drive")
     transcript_gdrive_id = Column(String(255), nullable=True, comment="ID транскрипта в GDrive")
     
+    # === Сжатая история чата (rolling summary старых реплик) ===
+    conversation_summary = Column(Text, nullable=True, comment="Краткое содержание ранних реплик чата")
+    conversation_summary_upto = Column(Integer, nullable=True,
+                                       comment="id последнего сообщения, вошедшего в summary")
+    
     # === Связи ===
     candidate = relationship("Candidate", back_populates="interviews")
     vacancy = relationship("Vacancy", back_populates="interviews")
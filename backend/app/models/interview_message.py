@@ -1,5 +1,5 @@
 # backend/app/models/interview_message.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -14,6 +14,9 @@ class MessageRole(str, enum.Enum):
 
 class InterviewMessage(Base):
     __tablename__ = "interview_messages"
+    __table_args__ = (
+        Index("ix_interview_messages_interview_id_id", "interview_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     interview_id = Column(Integer, ForeignKey("interviews.id"), nullable=False)
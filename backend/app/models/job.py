@@ -0,0 +1,81 @@
+# backend/app/models/job.py
+"""
+Фоновые задачи (импорт, ранжирование, оценка интервью).
+Строка в jobs — единственный источник правды о статусе/прогрессе:
+API отдаёт id сразу, клиент опрашивает /jobs/{id}.
+"""
+
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+import enum
+
+from ..database import Base
+
+
+class JobStatus(str, enum.Enum):
+    """Статусы фоновой задачи"""
+    QUEUED = "queued"        # Поставлена в очередь
+    RUNNING = "running"      # Выполняется воркером
+    SUCCEEDED = "succeeded"  # Завершена успешно
+    FAILED = "failed"        # Упала с ошибкой
+    CANCELLED = "cancelled"  # Отменена пользователем
+
+
+class Job(Base):
+    """Модель фоновой задачи"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index('ix_jobs_status', 'status'),
+        Index('ix_jobs_kind', 'kind'),
+        Index('ix_jobs_created_at', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False, comment="Тип задачи: ingest/rank/interview_evaluation")
+    status = Column(String(20), default=JobStatus.QUEUED.value, nullable=False)
+    params = Column(JSONB, nullable=False, default=dict, comment="Параметры запуска")
+
+    # === Прогресс ===
+    progress_done = Column(Integer, default=0, nullable=False)
+    progress_total = Column(Integer, nullable=True, comment="Общий объём работы, если известен")
+    progress_info = Column(JSONB, default=dict, comment="Произвольные промежуточные данные")
+
+    # === Итог ===
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+
+    # === Временные метки ===
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True, comment="Последнее продление аренды воркером (running)")
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value)
+
+    def to_dict(self) -> dict:
+        """Представление для API"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": {
+                "done": self.progress_done,
+                "total": self.progress_total,
+                "info": self.progress_info or {},
+            },
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "heartbeat_at": self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+        }
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
@@ -0,0 +1,39 @@
+# backend/app/models/near_duplicate.py
+"""
+MinHash-подписи резюме и LSH-бакеты для поиска почти-дубликатов.
+
+candidate_minhashes    — подпись кандидата (uint32 × num_perm) и, если при импорте
+                         найден почти-дубликат, ссылка на исходного кандидата;
+candidate_lsh_buckets  — (полоса, хэш полосы) -> кандидат: кандидаты в дубли
+                         ищутся по совпадению хотя бы одной полосы (индексный поиск).
+"""
+
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, Float, LargeBinary, ForeignKey, Index
+
+from ..database import Base
+
+
+class CandidateMinHash(Base):
+    """MinHash-подпись резюме кандидата"""
+    __tablename__ = "candidate_minhashes"
+    __table_args__ = (
+        Index("ix_candidate_minhashes_duplicate_of", "duplicate_of"),
+    )
+
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False, comment="uint32 × num_perm, little-endian")
+    duplicate_of = Column(Integer, ForeignKey("candidates.id", ondelete="SET NULL"), nullable=True,
+                          comment="Исходный кандидат, если резюме — почти-дубликат")
+    similarity = Column(Float, nullable=True, comment="Оценка Jaccard с исходным кандидатом")
+
+
+class CandidateLSHBucket(Base):
+    """LSH-бакет: полоса подписи кандидата"""
+    __tablename__ = "candidate_lsh_buckets"
+    __table_args__ = (
+        Index("ix_candidate_lsh_buckets_candidate", "candidate_id"),
+    )
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), primary_key=True)
@@ -0,0 +1,51 @@
+# backend/app/models/search_index.py
+"""
+Инвертированный индекс для полнотекстового поиска кандидатов (BM25).
+
+search_documents — длина документа в токенах (для нормализации BM25);
+search_terms     — document frequency по термину;
+search_postings  — (термин, кандидат) -> частота термина в документе и impact
+                   (BM25-вклад без idf); индекс (term, impact, candidate_id) отдаёт
+                   лучшие постинги термина без чтения остальных.
+
+Индекс обновляется инкрементально при импорте (search_service.index_documents)
+в той же транзакции, что и вставка кандидатов.
+"""
+
+from sqlalchemy import Column, Float, Integer, String, ForeignKey, Index
+
+from ..database import Base
+
+
+class SearchDocument(Base):
+    """Проиндексированный документ (резюме кандидата)"""
+    __tablename__ = "search_documents"
+
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), primary_key=True)
+    length = Column(Integer, nullable=False, comment="Число токенов в документе")
+    text_hash = Column(String(40), nullable=True, comment="sha1 проиндексированного текста")
+
+
+class SearchTerm(Base):
+    """Словарь индекса"""
+    __tablename__ = "search_terms"
+
+    term = Column(String(64), primary_key=True)
+    df = Column(Integer, nullable=False, default=0, comment="В скольких документах встречается")
+
+
+class SearchPosting(Base):
+    """Постинг: термин в документе"""
+    __tablename__ = "search_postings"
+    __table_args__ = (
+        Index("ix_search_postings_candidate", "candidate_id"),
+        Index("ix_search_postings_term_impact", "term", "impact", "candidate_id"),
+    )
+
+    term = Column(String(64), primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), primary_key=True)
+    tf = Column(Integer, nullable=False, comment="Частота термина в документе")
+    impact = Column(Float, nullable=False, default=0.0, comment="BM25-вклад термина без idf")
+
+    def __repr__(self):
+        return f"<SearchPosting(term={self.term}, candidate_id={self.candidate_id}, tf={self.tf})>"
@@ -1,7 +1,9 @@
 # backend/app/models/vacancy_match.py
 from __future__ import annotations
 
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Index
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 
 from backend.app.database import Base  # <- твой Base из database.py
@@ -24,6 +26,13 @@ class VacancyMatch(Base):
         index=True,
     )
     score = Column(Integer, nullable=True)
+    details = Column(JSON, nullable=True, comment="Детальный ответ скорера (skills_coverage, reasons, ...)")
+
+    # чем получен score: по ним инкрементальное ранжирование решает, устарела ли оценка
+    resume_hash = Column(String(64), nullable=True, comment="SHA-256 текста резюме на момент скоринга")
+    vacancy_hash = Column(String(64), nullable=True, comment="SHA-256 текста вакансии на момент скоринга")
+    scoring_version = Column(String(64), nullable=True, comment="Скорер + версия промпта/модели/весов")
+    scored_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Связи симметричны полям в Vacancy/Candidate (имя "matches")
     vacancy = relationship("Vacancy", back_populates="matches")
@@ -32,6 +32,12 @@ class InterviewChatResponse(BaseModel):
     interview_id: int
     reply: str
 
+
+class InterviewChatStreamRequest(BaseModel):
+    """Запрос к /interviews/chat/stream (формат фронтенда: поле message)"""
+    interview_id: int
+    message: str = Field(min_length=1)
+
 class InterviewStatus(str, Enum):
     CREATED = "created"
     STARTED = "started"
@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import json
-import os
 import re
 from typing import Any, Dict, List, Optional
 
-from openai import OpenAI, OpenAIError
+from openai import OpenAI
 
 # Конфиг может отсутствовать в изолированных тестах
 try:
@@ -14,61 +13,21 @@ try:
 except Exception:  # pragma: no cover
     settings = None  # noqa: N816
 
-from backend.app.services.api_key_manager import APIKeyManager
+from backend.app.services.llm_cache import get_llm_cache, llm_cache_key
+from backend.app.services.openai_clients import get_openai_client
+from backend.app.services.topk import TopK
 
-__all__ = ["rank_candidates"]
+__all__ = ["rank_candidates", "estimate_tokens", "pack_batches"]
 
 
 # -------------------- helpers --------------------
 
-def _get_passphrase(explicit: Optional[str] = None) -> Optional[str]:
-    """
-    Источник пароля для расшифровки:
-      1) аргумент функции,
-      2) settings.OPENAI_KEY_PASSPHRASE,
-      3) переменная окружения OPENAI_KEY_PASSPHRASE.
-    """
-    if explicit:
-        return explicit
-    if settings is not None and hasattr(settings, "OPENAI_KEY_PASSPHRASE"):
-        try:
-            val = getattr(settings, "OPENAI_KEY_PASSPHRASE")
-            if val:
-                return str(val)
-        except Exception:
-            pass
-    return os.getenv("OPENAI_KEY_PASSPHRASE")
-
-
 def _ensure_openai_client(passphrase: Optional[str] = None) -> OpenAI:
     """
-    Порядок поиска ключа:
-      - OPENAI_API_KEY в окружении,
-      - шифро-хранилище (api_keys.enc) через APIKeyManager и passphrase,
-      - best-effort без пароля (если файл сохранён незашифрованно).
+    Клиент из общего реестра (openai_clients): ключ резолвится один раз
+    (OPENAI_API_KEY → шифро-хранилище APIKeyManager), пул соединений общий.
     """
-    if os.getenv("OPENAI_API_KEY"):
-        return OpenAI()
-
-    pp = _get_passphrase(passphrase)
-    if pp:
-        km = APIKeyManager()
-        key = km.get("openai", passphrase=pp)
-        if key:
-            return OpenAI(api_key=key)
-
-    try:
-        km = APIKeyManager()
-        key = km.get("openai")
-        if key:
-            return OpenAI(api_key=key)
-    except Exception:
-        pass
-
-    raise OpenAIError(
-        "OpenAI API key not found. Set OPENAI_API_KEY env var or provide "
-        "passphrase to unlock encrypted store via APIKeyManager."
-    )
+    return get_openai_client("ranking", passphrase=passphrase)
 
 
 def _only_json(text: str) -> str:
@@ -82,31 +41,169 @@ def _only_json(text: str) -> str:
     return text.strip()
 
 
-# -------------------- public API --------------------
+# -------------------- packing --------------------
 
-def rank_candidates(
-    vacancy_text: str,
-    candidates: List[Dict[str, Any]],
-    *,
-    top_k: int = 5,
-    model: str = "gpt-4o-mini",
-    temperature: float = 0.2,
-    weights: Optional[Dict[str, float]] = None,
-    passphrase: Optional[str] = None,
-) -> List[Dict[str, Any]]:
+SYSTEM_MSG = (
+    "You are an experienced technical recruiter. Rank candidates for a vacancy. "
+    "Consider skill relevance, recency of experience, communication clarity, and culture fit. "
+    "Score each candidate from 0 to 100.\n"
+    "Bias controls: do NOT over-reward extremely long careers; penalize outdated stacks; "
+    "allow promising near-misses if other signals are strong.\n"
+    "Output strictly a JSON array of objects with fields: "
+    '{"index": <int>, "score": <int>, "reasons": "<short justification>"} '
+    "(index is the order provided). No extra text."
+)
+
+# менять при любой правке SYSTEM_MSG/формата запроса — инвалидирует кэш ответов
+RANK_PROMPT_VERSION = "rank-v1"
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# служебная обвязка сообщения (заголовки, веса, инструкция) — с запасом
+_PROMPT_OVERHEAD_TOKENS = 200
+_CANDIDATE_HEADER_TOKENS = 12
+
+try:  # точный подсчёт, если tiktoken установлен
+    import tiktoken  # type: ignore
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # pragma: no cover
+    _ENCODING = None
+
+
+def _setting(name: str, default: Any) -> Any:
+    return getattr(settings, name, default) if settings is not None else default
+
+
+def estimate_tokens(text: str) -> int:
     """
-    AI-ранжирование кандидатов под вакансию.
+    Оценка числа токенов. Без tiktoken — эвристика: ~4 символа на токен для
+    латиницы и ~2 для кириллицы (BPE-словари режут её мельче).
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    cyr = sum(1 for ch in text if "\u0400" <= ch <= "\u04ff")
+    return int((len(text) - cyr) / 4 + cyr / 2) + 1
 
-    candidates: [{"id": "...", "name": "...", "text": "..."}]
-    Возврат: [{"index": int, "id": str, "name": str, "score": int, "reasons": str}, ...]
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if _ENCODING is not None:
+        return _ENCODING.decode(_ENCODING.encode(text, disallowed_special=())[:max_tokens])
+    # эвристика линейна по длине — подрезаем пропорционально
+    return text[: max(1, int(len(text) * max_tokens / estimate_tokens(text)))]
+
+
+def pack_batches(
+    costs: List[int],
+    *,
+    budget_tokens: int,
+    max_items: int,
+) -> List[List[int]]:
     """
-    if not candidates:
+    Жадная упаковка по порядку: индексы кандидатов -> пачки, в каждой сумма
+    costs <= budget_tokens и не больше max_items элементов. Кандидат, который
+    один не влезает в бюджет, идёт отдельной пачкой (его текст уже обрезан).
+    """
+    batches: List[List[int]] = []
+    cur: List[int] = []
+    used = 0
+    for i, c in enumerate(costs):
+        if cur and (used + c > budget_tokens or len(cur) >= max_items):
+            batches.append(cur)
+            cur, used = [], 0
+        cur.append(i)
+        used += c
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def _pick_anchors(vacancy_text: str, texts: List[str], k: int) -> List[int]:
+    """
+    Якоря калибровки — кандидаты, равномерно разнесённые по дешёвой лексической
+    оценке (Jaccard с вакансией): так они покрывают шкалу, а не только верх.
+    """
+    if k <= 0 or not texts:
         return []
+    from backend.app.services.jaccard_matcher_service import jaccard_one_to_many
 
-    weights = weights or {"skills": 4, "recent": 3, "communication": 2, "culture": 1}
+    sims = jaccard_one_to_many(vacancy_text, texts)
+    order = sorted(range(len(texts)), key=lambda i: float(sims[i]))
+    if k == 1:
+        return [order[len(order) // 2]]
+    picks = [order[round(q * (len(order) - 1) / (k - 1))] for q in range(k)]
+    return list(dict.fromkeys(picks))
 
-    client = _ensure_openai_client(passphrase)
 
+def _calibrate(batch_anchor: Dict[int, float], reference: Dict[int, float]) -> tuple[float, float]:
+    """
+    Линейная поправка score' = a*score + b, приводящая оценки якорей в пачке
+    к эталонным (МНК; при одном якоре или вырожденном разбросе — только сдвиг).
+    """
+    xs = [batch_anchor[i] for i in reference if i in batch_anchor]
+    ys = [reference[i] for i in reference if i in batch_anchor]
+    if not xs:
+        return 1.0, 0.0
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    if len(xs) < 2 or var < 1e-6:
+        return 1.0, my - mx
+    a = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var
+    a = min(3.0, max(1 / 3, a))  # защита от неадекватного масштаба по 2–3 точкам
+    return a, my - a * mx
+
+
+def _fallback_items(vacancy_text: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Эвристика на случай, если ответ модели не распарсился."""
+    # 1) Пересечение ключевых слов вакансии и резюме
+    vocab = set(
+        w.lower()
+        for w in re.findall(r"[A-Za-zА-Яа-я0-9_+.#-]{2,}", vacancy_text, flags=re.U)
+    )
+
+    def _overlap_score(txt: str) -> int:
+        if not vocab:
+            return 0
+        words = set(
+            w.lower()
+            for w in re.findall(r"[A-Za-zА-Яа-я0-9_+.#-]{2,}", txt or "", flags=re.U)
+        )
+        inter = len(vocab & words)
+        return min(100, int(100 * inter / (len(vocab) + 1)))
+
+    # 2) Длина текста как прокси «насыщенности» (очень грубо)
+    def _length_score(txt: str) -> int:
+        words = len(re.findall(r"\w{2,}", txt or "", flags=re.U))
+        return max(0, min(100, 15 + words // 15))
+
+    items = []
+    for i, c in enumerate(candidates):
+        txt = c.get("text") or ""
+        score = int(round(0.6 * _overlap_score(txt) + 0.4 * _length_score(txt)))
+        items.append(
+            {
+                "index": i,
+                "score": score,
+                "reasons": "Fallback: keyword overlap + length heuristic.",
+            }
+        )
+    return items
+
+
+def _rank_batch(
+    client: OpenAI,
+    vacancy_text: str,
+    candidates: List[Dict[str, Any]],
+    *,
+    model: str,
+    temperature: float,
+    weights: Dict[str, float],
+    max_output_tokens: Optional[int] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """Один запрос к модели по пачке; возвращает {локальный index: {"score", "reasons"}}."""
     # Подготовим компактный ввод
     blocks = []
     for i, c in enumerate(candidates):
@@ -116,17 +213,6 @@ def rank_candidates(
         blocks.append(f"### [{i}] {name} ({cid})\n{text}")
     cand_blob = "\n\n".join(blocks)
 
-    system_msg = (
-        "You are an experienced technical recruiter. Rank candidates for a vacancy. "
-        "Consider skill relevance, recency of experience, communication clarity, and culture fit. "
-        "Score each candidate from 0 to 100.\n"
-        "Bias controls: do NOT over-reward extremely long careers; penalize outdated stacks; "
-        "allow promising near-misses if other signals are strong.\n"
-        "Output strictly a JSON array of objects with fields: "
-        '{"index": <int>, "score": <int>, "reasons": "<short justification>"} '
-        "(index is the order provided). No extra text."
-    )
-
     user_msg = (
         f"VACANCY:\n{vacancy_text.strip()}\n\n"
         f"WEIGHTS: {json.dumps(weights)}\n\n"
@@ -134,13 +220,17 @@ def rank_candidates(
         "Return top candidates with balanced judgment according to the weights."
     )
 
+    kwargs: Dict[str, Any] = {}
+    if max_output_tokens:
+        kwargs["max_tokens"] = max_output_tokens
     resp = client.chat.completions.create(
         model=model,
         temperature=temperature,
         messages=[
-            {"role": "system", "content": system_msg},
+            {"role": "system", "content": SYSTEM_MSG},
             {"role": "user", "content": user_msg},
         ],
+        **kwargs,
     )
 
     content = (resp.choices[0].message.content or "").strip()
@@ -156,64 +246,182 @@ def rank_candidates(
             raise ValueError("model output is not a list")
         items = parsed
     except Exception:
-        # ---------- Переписанная fallback-эвристика ----------
-        # 1) Пересечение ключевых слов вакансии и резюме
-        vocab = set(
-            w.lower()
-            for w in re.findall(r"[A-Za-zА-Яа-я0-9_+.#-]{2,}", vacancy_text, flags=re.U)
-        )
-
-        def _overlap_score(txt: str) -> int:
-            if not vocab:
-                return 0
-            words = set(
-                w.lower()
-                for w in re.findall(r"[A-Za-zА-Яа-я0-9_+.#-]{2,}", txt or "", flags=re.U)
-            )
-            inter = len(vocab & words)
-            return min(100, int(100 * inter / (len(vocab) + 1)))
-
-        # 2) Длина текста как прокси «насыщенности» (очень грубо)
-        def _length_score(txt: str) -> int:
-            words = len(re.findall(r"\w{2,}", txt or "", flags=re.U))
-            return max(0, min(100, 15 + words // 15))
-
-        items = []
-        for i, c in enumerate(candidates):
-            txt = c.get("text") or ""
-            score = int(round(0.6 * _overlap_score(txt) + 0.4 * _length_score(txt)))
-            items.append(
-                {
-                    "index": i,
-                    "score": score,
-                    "reasons": "Fallback: keyword overlap + length heuristic.",
-                }
-            )
+        items = [dict(it, fallback=True) for it in _fallback_items(vacancy_text, candidates)]
 
-    # Нормализация и добавление id/name
-    normalized: List[Dict[str, Any]] = []
+    out: Dict[int, Dict[str, Any]] = {}
     for it in items:
         try:
             idx = int(it.get("index"))
+            score = float(it.get("score", 0))
         except Exception:
             continue
-        if not (0 <= idx < len(candidates)):
-            continue
+        if 0 <= idx < len(candidates):
+            out[idx] = {
+                "score": score,
+                "reasons": str(it.get("reasons", "")).strip(),
+                "fallback": bool(it.get("fallback")),
+            }
+    return out
+
+
+def _rank_uncached(
+    vacancy_text: str,
+    candidates: List[Dict[str, Any]],
+    texts: List[str],
+    *,
+    model: str,
+    temperature: float,
+    weights: Dict[str, float],
+    passphrase: Optional[str],
+    context_tokens: int,
+    max_concurrency: int,
+) -> Dict[int, Dict[str, Any]]:
+    """Упаковка в пачки, параллельные запросы и калибровка по якорям: {index: {"score", "reasons", "fallback"}}."""
+    out_per_cand = _setting("RANK_OUTPUT_TOKENS_PER_CANDIDATE", 60)
+    max_output = _setting("RANK_MAX_OUTPUT_TOKENS", 4096)
+    n_anchors = _setting("RANK_CALIBRATION_ANCHORS", 2)
+
+    client = _ensure_openai_client(passphrase)
+    costs = [estimate_tokens(t) + _CANDIDATE_HEADER_TOKENS for t in texts]
+    fixed = estimate_tokens(SYSTEM_MSG) + estimate_tokens(vacancy_text) + _PROMPT_OVERHEAD_TOKENS
+    max_items = max(1, max_output // out_per_cand)
+
+    anchors: List[int] = []
+    budget = context_tokens - fixed
+    if sum(costs) > budget or len(candidates) > max_items:
+        anchors = _pick_anchors(vacancy_text, texts, n_anchors)
+        budget -= sum(costs[a] for a in anchors)
+        max_items = max(1, max_items - len(anchors))
+    rest = [i for i in range(len(candidates)) if i not in set(anchors)]
+    batches = [[rest[j] for j in b] for b in pack_batches([costs[i] for i in rest], budget_tokens=max(1, budget), max_items=max_items)]
+    if anchors:
+        batches = [anchors + b for b in batches]
+
+    def _run(batch: List[int]) -> Dict[int, Dict[str, Any]]:
+        local = [{**candidates[i], "text": texts[i]} for i in batch]
+        res = _rank_batch(
+            client, vacancy_text, local,
+            model=model, temperature=temperature, weights=weights,
+            max_output_tokens=min(max_output, out_per_cand * len(batch) + 64),
+        )
+        return {batch[j]: v for j, v in res.items()}
+
+    if len(batches) == 1:
+        results = [_run(batches[0])]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as ex:
+            results = list(ex.map(_run, batches))
+
+    # калибровка: эталон якоря — средняя оценка по всем пачкам
+    merged: Dict[int, Dict[str, Any]] = {}
+    if anchors:
+        reference = {}
+        for a in anchors:
+            vals = [r[a]["score"] for r in results if a in r]
+            if vals:
+                reference[a] = sum(vals) / len(vals)
+        for r in results:
+            k, b = _calibrate({a: r[a]["score"] for a in anchors if a in r}, reference)
+            for i, v in r.items():
+                if i in reference:
+                    merged[i] = {**v, "score": reference[i]}
+                elif i not in merged:
+                    merged[i] = {**v, "score": k * v["score"] + b}
+    else:
+        for r in results:
+            merged.update(r)
+
+    return merged
+
+
+# -------------------- public API --------------------
 
-        score = int(it.get("score", 0))
-        reasons = str(it.get("reasons", "")).strip()
+def rank_candidates(
+    vacancy_text: str,
+    candidates: List[Dict[str, Any]],
+    *,
+    top_k: int = 5,
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+    weights: Optional[Dict[str, float]] = None,
+    passphrase: Optional[str] = None,
+    context_tokens: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    AI-ранжирование кандидатов под вакансию.
+
+    candidates: [{"id": "...", "name": "...", "text": "..."}]
+    Возврат: [{"index": int, "id": str, "name": str, "score": int, "reasons": str}, ...]
+
+    Кандидаты упаковываются в пачки по бюджету токенов (context_tokens на вход,
+    RANK_OUTPUT_TOKENS_PER_CANDIDATE на ответ), пачки идут параллельно.
+    Если пачек больше одной, в каждую добавляются одни и те же якорные
+    кандидаты; их оценки задают линейную поправку, чтобы шкалы пачек совпадали.
+
+    Итоговые оценки кэшируются по кандидату (llm_cache): при повторном
+    ранжировании в модель уходят только новые/изменённые резюме.
+    use_cache=False — не читать кэш.
+    """
+    if not candidates:
+        return []
+
+    weights = weights or {"skills": 4, "recent": 3, "communication": 2, "culture": 1}
+    context_tokens = context_tokens or _setting("RANK_CONTEXT_TOKENS", 16000)
+    max_concurrency = max_concurrency or _setting("RANK_BATCH_CONCURRENCY", 4)
+    per_cand_tokens = _setting("RANK_MAX_CANDIDATE_TOKENS", 1500)
+
+    vacancy_text = _truncate_to_tokens(vacancy_text.strip(), max(256, context_tokens // 4))
+    texts = [_truncate_to_tokens((c.get("text") or "").strip(), per_cand_tokens) for c in candidates]
+
+    cache = get_llm_cache()
+    keys = [
+        llm_cache_key(
+            "rank", model=model, prompt_version=RANK_PROMPT_VERSION, temperature=temperature,
+            vacancy_text=vacancy_text, resume_text=t, weights=weights,
+        )
+        for t in texts
+    ]
+    merged: Dict[int, Dict[str, Any]] = {}
+    if use_cache:
+        for i, key in enumerate(keys):
+            hit = cache.get(key)
+            if hit is not None:
+                merged[i] = hit
+    todo = [i for i in range(len(candidates)) if i not in merged]
+    fallback: set[int] = set()  # эвристика вместо ответа модели: не кэшируется и помечается в выдаче
+    if todo:
+        scored = _rank_uncached(
+            vacancy_text, [candidates[i] for i in todo], [texts[i] for i in todo],
+            model=model, temperature=temperature, weights=weights, passphrase=passphrase,
+            context_tokens=context_tokens, max_concurrency=max_concurrency,
+        )
+        for j, it in scored.items():
+            i = todo[j]
+            merged[i] = {"score": it["score"], "reasons": it["reasons"]}
+            if it.get("fallback"):
+                fallback.add(i)
+            else:
+                cache.set(keys[i], merged[i])
+
+    # Нормализация и добавление id/name
+    top: TopK[Dict[str, Any]] = TopK(top_k)
+    for idx, it in merged.items():
         c = candidates[idx]
-        normalized.append(
+        score = max(0, min(100, int(round(it["score"]))))
+        top.push(
             {
                 "index": idx,
                 "id": c.get("id", f"cand-{idx+1}"),
                 "name": c.get("name", f"cand-{idx+1}"),
-                "score": max(0, min(100, score)),
-                "reasons": reasons,
-            }
+                "score": score,
+                "reasons": it["reasons"],
+                "fallback": idx in fallback,
+            },
+            score,
+            order=idx,  # при равных оценках — порядок входного списка
         )
-
-    normalized.sort(key=lambda x: x["score"], reverse=True)
-    if top_k and top_k > 0:
-        normalized = normalized[:top_k]
-    return normalized
+    return top.items()
@@ -3,15 +3,24 @@ from __future__ import annotations
 
 import json
 import os
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from backend.app.services.llm_cache import get_llm_cache, llm_cache_key
+from backend.app.services.openai_clients import get_async_openai_client, get_openai_client
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
-# Клиент берём из окружения; .env уже подхватывается конфигом проекта
-_client = OpenAI(api_key=OPENAI_API_KEY)
+
+def _get_client(name: str = "interviewer") -> OpenAI:
+    """Клиент из общего реестра (пул соединений процесса, ключ меняется без рестарта)."""
+    return get_openai_client(name)
+
+
+def _get_async_client(name: str = "interviewer") -> AsyncOpenAI:
+    """Async-клиент текущего event loop из общего реестра."""
+    return get_async_openai_client(name)
 
 
 class AIInterviewer:
@@ -24,45 +33,194 @@ class AIInterviewer:
             "Use Russian if the candidate writes in Russian."
         )
 
-    def chat(self, history: List[Dict[str, str]], user_text: str) -> str:
+    def chat(self, history: List[Dict[str, str]], user_text: str, summary: str | None = None) -> str:
         """
         :param history: [{role: 'user'|'assistant', content: '...'}, ...]
         :param user_text: новое сообщение пользователя
+        :param summary: краткое содержание более ранней части диалога (не вошедшей в history)
         :return: ответ ассистента
         """
-        messages = [{"role": "system", "content": self.system_prompt}] + history + [
-            {"role": "user", "content": user_text}
-        ]
-        resp = _client.chat.completions.create(
+        resp = _get_client().chat.completions.create(
             model=self.model,
-            messages=messages,
+            messages=self._messages(history, user_text, summary),
             temperature=0.2,
         )
         return resp.choices[0].message.content or ""
 
+    async def achat(self, history: List[Dict[str, str]], user_text: str, summary: str | None = None) -> str:
+        """Async-вариант chat: не занимает поток на время ответа модели."""
+        resp = await _get_async_client().chat.completions.create(
+            model=self.model,
+            messages=self._messages(history, user_text, summary),
+            temperature=0.2,
+        )
+        return resp.choices[0].message.content or ""
 
-def score_match(vacancy_text: str, resume_text: str) -> Dict[str, Any]:
-    """
-    Черновой скоринг матчинга вакансии и резюме. Возвращает JSON со score/skills_coverage/experience_fit/salary_fit.
-    """
-    system = (
-        "You are an HR matching assistant. Compare a vacancy and a resume and return a compact JSON with keys: "
-        "score (0..100), skills_coverage (0..1), experience_fit (0..1), salary_fit (0..1). Do not add commentary."
-    )
-    messages = [
-        {"role": "system", "content": system},
+    async def astream(
+        self, history: List[Dict[str, str]], user_text: str, summary: str | None = None,
+    ) -> AsyncIterator[str]:
+        """То же, что chat, но отдаёт фрагменты ответа по мере генерации (stream=True)."""
+        stream = await _get_async_client().chat.completions.create(
+            model=self.model,
+            messages=self._messages(history, user_text, summary),
+            temperature=0.2,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def evaluate_interview(self, history: List[Dict[str, str]], vacancy: Any) -> Dict[str, Any]:
+        """
+        Оценка завершённого интервью по стенограмме и вакансии: баллы 0..100
+        (overall/technical/communication/motivation), strengths/weaknesses, recommendation
+        (next_stage | reserve | reject) и hr_comment для рекрутера.
+        ValueError — модель не вернула разборчивую оценку (нулевые баллы не подставляются).
+        """
+        transcript = "\n".join(
+            f"{'Interviewer' if m['role'] == 'assistant' else 'Candidate'}: {m['content']}" for m in history
+        )
+        vacancy_text = f"{vacancy.title}\n\n{vacancy.description or ''}".strip() if vacancy is not None else "(unknown)"
+        resp = _get_client("evaluation").chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": EVALUATION_SYSTEM_PROMPT},
+                {"role": "user", "content": f"VACANCY:\n{vacancy_text}\n\nINTERVIEW:\n{transcript}"},
+            ],
+            temperature=0.0,
+            response_format={"type": "json_object"},
+        )
+        evaluation = parse_evaluation(resp.choices[0].message.content)
+        if evaluation is None:
+            raise ValueError("interview evaluation: model returned no usable JSON")
+        return evaluation
+
+    def _messages(
+        self, history: List[Dict[str, str]], user_text: str, summary: str | None = None,
+    ) -> List[Dict[str, str]]:
+        head = [{"role": "system", "content": self.system_prompt}]
+        if summary:
+            head.append({"role": "system", "content": f"Summary of the earlier part of the interview:\n{summary}"})
+        return head + history + [{"role": "user", "content": user_text}]
+
+    async def asummarize(self, previous_summary: str | None, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        """
+        Rolling summary: предыдущее краткое содержание + новые реплики → новое краткое
+        содержание (факты о кандидате, заданные вопросы, ответы), не длиннее max_tokens.
+        """
+        transcript = "\n".join(
+            f"{'Interviewer' if m['role'] == 'assistant' else 'Candidate'}: {m['content']}" for m in messages
+        )
+        prompt = (
+            f"Previous summary:\n{previous_summary or '(none)'}\n\nNew dialogue:\n{transcript}\n\n"
+            "Update the summary: keep facts about the candidate, questions already asked and key answers. "
+            "Be concise, write in the language of the dialogue."
+        )
+        resp = await _get_async_client().chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You compress HR interview transcripts into short factual summaries."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.0,
+            max_tokens=max_tokens,
+        )
+        return (resp.choices[0].message.content or "").strip()
+
+
+EVALUATION_SYSTEM_PROMPT = (
+    "You are an HR assistant. Evaluate a finished job interview against the vacancy and return a JSON object "
+    "with keys: overall_score, technical_score, communication_score, motivation_score (numbers 0..100), "
+    "strengths, weaknesses (lists of short phrases), recommendation (one of: next_stage, reserve, reject), "
+    "hr_comment (2-3 sentences for the recruiter). Write text in the language of the interview."
+)
+EVALUATION_SCORES = ("overall_score", "technical_score", "communication_score", "motivation_score")
+EVALUATION_RECOMMENDATIONS = ("next_stage", "reserve", "reject")
+
+
+def parse_evaluation(content: str | None) -> Dict[str, Any] | None:
+    """Оценка интервью из ответа модели (баллы зажаты в 0..100) или None, если нет overall_score."""
+    try:
+        data = json.loads(content or "{}")
+        overall = float(data["overall_score"])
+    except Exception:
+        return None
+    out: Dict[str, Any] = {"overall_score": overall}
+    for key in EVALUATION_SCORES:
+        try:
+            out[key] = min(100.0, max(0.0, float(data.get(key, overall))))
+        except (TypeError, ValueError):
+            out[key] = None
+    for key in ("strengths", "weaknesses"):
+        items = data.get(key) or []
+        out[key] = [str(x) for x in items] if isinstance(items, list) else [str(items)]
+    rec = str(data.get("recommendation", "")).strip().lower()
+    out["recommendation"] = rec if rec in EVALUATION_RECOMMENDATIONS else "reserve"
+    out["hr_comment"] = str(data.get("hr_comment") or "")
+    return out
+
+
+SCORE_SYSTEM_PROMPT = (
+    "You are an HR matching assistant. Compare a vacancy and a resume and return a compact JSON with keys: "
+    "score (0..100), skills_coverage (0..1), experience_fit (0..1), salary_fit (0..1). Do not add commentary."
+)
+# менять при любой правке SCORE_SYSTEM_PROMPT/build_score_messages — инвалидирует кэш ответов
+SCORE_PROMPT_VERSION = "score-v1"
+SCORE_TEMPERATURE = 0.0
+FALLBACK_SCORE: Dict[str, Any] = {"score": 0, "skills_coverage": 0.0, "experience_fit": 0.0, "salary_fit": 0.0}
+
+
+def build_score_messages(vacancy_text: str, resume_text: str) -> List[Dict[str, str]]:
+    """Сообщения для скоринга пары вакансия/резюме (общие для sync и async путей)."""
+    return [
+        {"role": "system", "content": SCORE_SYSTEM_PROMPT},
         {
             "role": "user",
             "content": f"VACANCY:\n{vacancy_text}\n\nRESUME:\n{resume_text}",
         },
     ]
-    resp = _client.chat.completions.create(
+
+
+def try_parse_score(content: str | None) -> Dict[str, Any] | None:
+    """Разобранный ответ модели или None (не JSON-объект / нет score)."""
+    try:
+        data = json.loads(content or "{}")
+    except Exception:
+        return None
+    return data if isinstance(data, dict) and "score" in data else None
+
+
+def parse_score(content: str | None) -> Dict[str, Any]:
+    return try_parse_score(content) or dict(FALLBACK_SCORE)
+
+
+def score_cache_key(vacancy_text: str, resume_text: str, model: str | None = None) -> str:
+    return llm_cache_key(
+        "score", model=model or MODEL, prompt_version=SCORE_PROMPT_VERSION,
+        temperature=SCORE_TEMPERATURE, vacancy_text=vacancy_text, resume_text=resume_text,
+    )
+
+
+def score_match(vacancy_text: str, resume_text: str, *, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Черновой скоринг матчинга вакансии и резюме. Возвращает JSON со score/skills_coverage/experience_fit/salary_fit.
+    Ответ кэшируется (см. llm_cache); use_cache=False — запрос к модели в обход кэша
+    (свежий ответ всё равно перезаписывает запись).
+    """
+    cache = get_llm_cache()
+    key = score_cache_key(vacancy_text, resume_text)
+    if use_cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    resp = _get_client("scoring").chat.completions.create(
         model=MODEL,
-        messages=messages,
-        temperature=0.0,
+        messages=build_score_messages(vacancy_text, resume_text),
+        temperature=SCORE_TEMPERATURE,
         response_format={"type": "json_object"},
     )
-    try:
-        return json.loads(resp.choices[0].message.content or "{}")
-    except Exception:
-        return {"score": 0, "skills_coverage": 0.0, "experience_fit": 0.0, "salary_fit": 0.0}
+    details = try_parse_score(resp.choices[0].message.content)
+    if details is None:
+        return dict(FALLBACK_SCORE)  # фолбэк не кэшируем
+    cache.set(key, details)
+    return details
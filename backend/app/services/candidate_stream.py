@@ -0,0 +1,75 @@
+# backend/app/services/candidate_stream.py
+from __future__ import annotations
+"""
+Потоковая выборка кандидатов для матчинга и выгрузок.
+
+Вместо db.query(Candidate).all() строки читаются пачками через yield_per
+(на Postgres — серверный курсор psycopg), и только нужные колонки: память
+процесса не растёт с размером таблицы. Выгрузки тоже читают колонки, а не
+ORM-объекты (без original_text — самой тяжёлой колонки).
+
+Серверный курсор живёт внутри транзакции: между итерациями нельзя делать
+commit. Для проходов с коммитами по пачкам (переиндексации) остаётся keyset-
+пагинация по id.
+"""
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from backend.app.config import settings
+from backend.app.models.candidate import Candidate
+from backend.app.models.near_duplicate import CandidateMinHash
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "exclude_near_duplicates", "stream_candidates", "fetch_texts",
+]
+
+IN_CHUNK_SIZE = 1000  # размер IN (...) при догрузке по списку id
+
+
+def exclude_near_duplicates(stmt: Select) -> Select:
+    """Кандидаты, помеченные при импорте как почти-дубликаты, в матчинг не попадают."""
+    return (
+        stmt.outerjoin(CandidateMinHash, CandidateMinHash.candidate_id == Candidate.id)
+            .where(CandidateMinHash.duplicate_of.is_(None))
+    )
+
+
+def stream_candidates(
+    db: Session,
+    columns: Sequence[Any] = (Candidate.id, Candidate.original_text),
+    *,
+    batch_size: Optional[int] = None,
+    exclude_duplicates: bool = True,
+    only_with_text: bool = True,
+) -> Iterator[Any]:
+    """
+    Строки (Row) с указанными колонками, по возрастанию id, пачками по batch_size.
+    only_with_text — пропускать кандидатов без текста резюме (фильтр в SQL).
+    """
+    stmt = select(*columns).order_by(Candidate.id)
+    if exclude_duplicates:
+        stmt = exclude_near_duplicates(stmt)
+    if only_with_text:
+        stmt = stmt.where(Candidate.original_text.is_not(None), Candidate.original_text != "")
+    size = batch_size or settings.CANDIDATE_STREAM_BATCH
+    yield from db.execute(stmt.execution_options(yield_per=size))
+
+
+def fetch_texts(db: Session, ids: Iterable[int], *, exclude_duplicates: bool = False) -> Dict[int, str]:
+    """Тексты резюме по списку id (запросы IN пачками); пустые тексты пропускаются."""
+    ids = list(ids)
+    out: Dict[int, str] = {}
+    for i in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk: List[int] = ids[i:i + IN_CHUNK_SIZE]
+        stmt = select(Candidate.id, Candidate.original_text).where(Candidate.id.in_(chunk))
+        if exclude_duplicates:
+            stmt = exclude_near_duplicates(stmt)
+        for cid, text in db.execute(stmt):
+            if (text or "").strip():
+                out[cid] = text
+    return out
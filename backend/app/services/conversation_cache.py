@@ -0,0 +1,246 @@
+# backend/app/services/conversation_cache.py
+from __future__ import annotations
+"""
+Кэш истории чата интервью: per-interview, LRU, write-through.
+
+Раньше каждый ход чата перечитывал из БД всю историю InterviewMessage и целиком
+отправлял её в LLM — и запрос, и промпт росли с длиной интервью. Теперь:
+
+  - история интервью живёт в памяти процесса (LRU на CONVERSATION_CACHE_SIZE
+    диалогов, неиспользуемые дольше CONVERSATION_CACHE_TTL выгружаются). Попадание
+    сверяется с БД одним запросом по индексу (max(id)/count сообщений интервью и
+    conversation_summary_upto): если ходы того же интервью обслужил другой воркер,
+    диалог перечитывается. Запись — сначала в БД, после коммита тот же
+    InterviewMessage добавляется в кэш (append), так что кэш не опережает БД;
+  - в промпт идут только последние реплики в пределах INTERVIEW_HISTORY_TOKENS,
+    всё более раннее — одной строкой rolling summary;
+  - когда вытесненных из окна реплик набирается на INTERVIEW_SUMMARY_TRIGGER_TOKENS,
+    они фоном (после ответа кандидату) сворачиваются в summary вместе с предыдущим;
+    summary и id последнего свёрнутого сообщения сохраняются в interviews, а
+    свёрнутые реплики выгружаются из памяти. При промахе читаются только
+    сообщения после conversation_summary_upto.
+
+Итог: размер промпта и объём чтения на ход ограничены, а не растут с интервью.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.database import async_session
+from backend.app.models import Interview
+from backend.app.models.interview_message import InterviewMessage, MessageRole
+from backend.app.services.ai_matcher_service import estimate_tokens
+from backend.app.services.ai_service import AIInterviewer
+from backend.app.services.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["Conversation", "ConversationCache", "get_conversation_cache", "summarize_if_needed"]
+
+_requests = get_registry().counter("conversation_cache_requests_total", "Обращения к кэшу истории чата")
+_prompt_tokens = get_registry().histogram(
+    "interview_prompt_history_tokens", "Токены истории (окно + summary) в промпте хода интервью",
+    buckets=(250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 16000, 32000),
+)
+_summaries = get_registry().counter("conversation_summaries_total", "Свёртки старых реплик в rolling summary")
+
+
+def _role(role: Any) -> str:
+    return "assistant" if role == MessageRole.INTERVIEWER else "user"
+
+
+class Conversation:
+    """История одного интервью: summary + ещё не свёрнутые реплики (по возрастанию id)."""
+
+    def __init__(self, interview_id: int, summary: Optional[str], summary_upto: int,
+                 turns: List[Dict[str, Any]], total: int) -> None:
+        self.interview_id = interview_id
+        self.summary = summary
+        self.summary_upto = summary_upto
+        self.turns = turns  # {"id", "role", "content", "tokens"}
+        self.total = total  # всего сообщений в интервью, включая свёрнутые
+        self.used_at = time.monotonic()
+        self.summarizing = False
+
+    def add(self, msg: InterviewMessage) -> None:
+        if msg.id is not None and msg.id <= (self.turns[-1]["id"] if self.turns else self.summary_upto):
+            return  # уже есть (загружено из БД после коммита)
+        self.turns.append({
+            "id": msg.id, "role": _role(msg.role), "content": msg.content,
+            "tokens": estimate_tokens(msg.content),
+        })
+        self.total += 1
+
+    def _window_start(self, budget: int) -> int:
+        used = 0
+        i = len(self.turns)
+        while i > 0:
+            cost = self.turns[i - 1]["tokens"]
+            if i < len(self.turns) and used + cost > budget:
+                break  # последнюю реплику берём всегда, даже если она длиннее бюджета
+            used += cost
+            i -= 1
+        return i
+
+    def prompt_context(self, budget: Optional[int] = None) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """(история для промпта в пределах budget токенов, summary более раннего)."""
+        budget = settings.INTERVIEW_HISTORY_TOKENS if budget is None else budget
+        window = self.turns[self._window_start(budget):]
+        _prompt_tokens.observe(sum(t["tokens"] for t in window) + estimate_tokens(self.summary or ""))
+        return [{"role": t["role"], "content": t["content"]} for t in window], self.summary
+
+    def overflow(self, budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Несвёрнутые реплики, вытесненные из окна, — кандидаты в summary."""
+        budget = settings.INTERVIEW_HISTORY_TOKENS if budget is None else budget
+        return self.turns[:self._window_start(budget)]
+
+    def apply_summary(self, summary: str, upto: int) -> None:
+        self.summary = summary
+        self.summary_upto = upto
+        self.turns = [t for t in self.turns if t["id"] > upto]
+
+
+class ConversationCache:
+    """LRU диалогов по interview_id; get() при промахе/устаревании читает из БД."""
+
+    def __init__(self, max_items: int = 1000, ttl: float = 900.0) -> None:
+        self.max_items = max(1, max_items)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[int, Conversation]" = OrderedDict()
+
+    def peek(self, interview_id: int) -> Optional[Conversation]:
+        with self._lock:
+            conv = self._items.get(interview_id)
+            if conv is None:
+                return None
+            now = time.monotonic()
+            if self.ttl and now - conv.used_at > self.ttl and not conv.summarizing:
+                del self._items[interview_id]
+                return None
+            conv.used_at = now
+            self._items.move_to_end(interview_id)
+            return conv
+
+    async def get(self, db: AsyncSession, interview_id: int, interview: Optional[Interview] = None) -> Conversation:
+        conv = self.peek(interview_id)
+        if conv is not None:
+            if await self._is_current(db, conv, interview):
+                _requests.labels(result="hit").inc()
+                return conv
+            _requests.labels(result="stale").inc()
+        else:
+            _requests.labels(result="miss").inc()
+        conv = await self._load(db, interview_id, interview)
+        with self._lock:
+            self._items[interview_id] = conv
+            self._items.move_to_end(interview_id)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return conv
+
+    async def _is_current(self, db: AsyncSession, conv: Conversation, interview: Optional[Interview]) -> bool:
+        """Совпадает ли кэш с БД: последний id и число сообщений, граница summary."""
+        if interview is not None and (interview.conversation_summary_upto or 0) != conv.summary_upto:
+            return False
+        last_id, total = (await db.execute(
+            select(func.max(InterviewMessage.id), func.count())
+            .where(InterviewMessage.interview_id == conv.interview_id)
+        )).one()
+        known = conv.turns[-1]["id"] if conv.turns else conv.summary_upto
+        return (last_id or 0) == known and total == conv.total
+
+    async def _load(self, db: AsyncSession, interview_id: int, interview: Optional[Interview]) -> Conversation:
+        if interview is None:
+            interview = await db.get(Interview, interview_id)
+        upto = (interview.conversation_summary_upto if interview is not None else None) or 0
+        rows = (await db.execute(
+            select(InterviewMessage.id, InterviewMessage.role, InterviewMessage.content)
+            .where(InterviewMessage.interview_id == interview_id, InterviewMessage.id > upto)
+            .order_by(InterviewMessage.id)
+        )).all()
+        folded = 0
+        if upto:
+            folded = (await db.execute(
+                select(func.count()).select_from(InterviewMessage)
+                .where(InterviewMessage.interview_id == interview_id, InterviewMessage.id <= upto)
+            )).scalar_one()
+        turns = [
+            {"id": mid, "role": _role(role), "content": content, "tokens": estimate_tokens(content)}
+            for mid, role, content in rows
+        ]
+        summary = interview.conversation_summary if interview is not None else None
+        return Conversation(interview_id, summary, upto, turns, folded + len(turns))
+
+    def append(self, interview_id: int, *messages: InterviewMessage) -> None:
+        """Вызывать после коммита: сообщения уже в БД, теперь — в кэш (если диалог загружен)."""
+        conv = self.peek(interview_id)
+        if conv is None:
+            return
+        for msg in messages:
+            conv.add(msg)
+
+    def invalidate(self, interview_id: int) -> None:
+        with self._lock:
+            self._items.pop(interview_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"items": len(self._items), "max_items": self.max_items, "ttl": self.ttl}
+
+
+_cache: Optional[ConversationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_conversation_cache() -> ConversationCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConversationCache(settings.CONVERSATION_CACHE_SIZE, settings.CONVERSATION_CACHE_TTL)
+        return _cache
+
+
+async def summarize_if_needed(interview_id: int, interviewer: AIInterviewer) -> bool:
+    """
+    Сворачивает вытесненные из окна реплики в rolling summary (если их набралось
+    на INTERVIEW_SUMMARY_TRIGGER_TOKENS). Запускается фоном после ответа; ошибки
+    не критичны — реплики просто дождутся следующей попытки.
+    """
+    conv = get_conversation_cache().peek(interview_id)
+    if conv is None or conv.summarizing:
+        return False
+    old = conv.overflow()
+    if sum(t["tokens"] for t in old) < settings.INTERVIEW_SUMMARY_TRIGGER_TOKENS:
+        return False
+    conv.summarizing = True
+    try:
+        summary = await interviewer.asummarize(
+            conv.summary, [{"role": t["role"], "content": t["content"]} for t in old],
+            settings.INTERVIEW_SUMMARY_MAX_TOKENS,
+        )
+        if not summary:
+            return False
+        upto = old[-1]["id"]
+        async with async_session() as db:
+            interview = await db.get(Interview, interview_id)
+            if interview is None:
+                return False
+            interview.conversation_summary = summary
+            interview.conversation_summary_upto = upto
+            await db.commit()
+        conv.apply_summary(summary, upto)
+        _summaries.inc()
+        logger.info("interview %s: %d messages folded into summary", interview_id, len(old))
+        return True
+    except Exception as e:
+        logger.warning("interview %s: summarization failed: %s", interview_id, e)
+        return False
+    finally:
+        conv.summarizing = False
@@ -0,0 +1,220 @@
+# backend/app/services/dedup_service.py
+from __future__ import annotations
+"""
+Поиск почти-дубликатов резюме: MinHash по словесным шинглам + LSH (banding).
+
+Точный дедуп (doc_hash/email) не ловит повторно присланное резюме с мелкими
+правками. Здесь оценивается Jaccard по множествам 3-грамм слов:
+  - minhash(text) -> подпись uint32 × num_perm;
+  - подпись режется на b полос по r значений (b·r <= num_perm, параметры
+    подбираются под порог); кандидаты в дубли — документы, совпавшие хотя бы
+    в одной полосе, затем проверяются оценкой Jaccard по подписям;
+  - MinHashLSH — индекс в памяти (прогон импорта, rank_from_folders);
+    DB-хранилище — таблицы candidate_minhashes/candidate_lsh_buckets,
+    поиск по индексу (band, bucket), т.е. без перебора всех кандидатов.
+"""
+import hashlib
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+
+from backend.app.config import settings
+from backend.app.models.near_duplicate import CandidateLSHBucket, CandidateMinHash
+from backend.app.services.jaccard_matcher_service import _tokens
+
+__all__ = [
+    "minhash", "estimate_jaccard", "lsh_params", "band_keys",
+    "MinHashLSH", "find_near_duplicates", "store_signatures",
+]
+
+SHINGLE_SIZE = 3
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX32 = np.uint64((1 << 32) - 1)
+_SEED = 1
+FP_WEIGHT, FN_WEIGHT = 0.1, 0.9
+
+
+@lru_cache(maxsize=8)
+def _permutations(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    # a, b < 2^32: произведение с 32-битным хэшем шингла не переполняет uint64
+    rng = np.random.RandomState(_SEED)
+    a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    toks = _tokens(text)
+    if len(toks) < SHINGLE_SIZE:
+        grams = set(toks)
+    else:
+        grams = {" ".join(toks[i:i + SHINGLE_SIZE]) for i in range(len(toks) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text: str, num_perm: Optional[int] = None) -> Optional[np.ndarray]:
+    """MinHash-подпись (uint32 × num_perm) или None, если в тексте нет токенов."""
+    num_perm = num_perm or settings.NEAR_DUP_NUM_PERM
+    hv = _shingle_hashes(text)
+    if not len(hv):
+        return None
+    a, b = _permutations(num_perm)
+    phv = ((hv[:, None] * a[None, :] + b[None, :]) % _PRIME) & _MAX32
+    return phv.min(axis=0).astype(np.uint32)
+
+
+def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+@lru_cache(maxsize=32)
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    (bands, rows) с минимумом взвешенной вероятности ложных срабатываний и
+    пропусков для порога threshold (классическая схема LSH banding). Пропуски
+    весят больше: ложные кандидаты всё равно отсеиваются проверкой по подписи.
+    """
+    xs = np.linspace(0.0, 1.0, 201)
+
+    def _area(f: np.ndarray, lo: float, hi: float) -> float:
+        m = (xs >= lo) & (xs <= hi)
+        return float(np.trapezoid(f[m], xs[m])) if m.sum() > 1 else 0.0
+
+    best, best_err = (1, num_perm), float("inf")
+    for b in range(1, num_perm + 1):
+        r = num_perm // b
+        p = 1.0 - (1.0 - xs ** r) ** b          # вероятность попасть в кандидаты
+        err = FP_WEIGHT * _area(p, 0.0, threshold) + FN_WEIGHT * _area(1.0 - p, threshold, 1.0)
+        if err < best_err:
+            best, best_err = (b, r), err
+    return best
+
+
+def band_keys(sig: np.ndarray, bands: int, rows: int) -> List[int]:
+    """Хэш каждой полосы подписи -> signed int64 (для BigInteger)."""
+    raw = sig.astype("<u4")
+    out = []
+    for i in range(bands):
+        d = hashlib.blake2b(raw[i * rows:(i + 1) * rows].tobytes(), digest_size=8, person=bytes([i])).digest()
+        out.append(int.from_bytes(d, "little", signed=True))
+    return out
+
+
+class MinHashLSH:
+    """LSH-индекс в памяти: key -> подпись; query возвращает ключи с оценкой Jaccard >= threshold."""
+
+    def __init__(self, threshold: Optional[float] = None, num_perm: Optional[int] = None) -> None:
+        self.threshold = settings.NEAR_DUP_THRESHOLD if threshold is None else threshold
+        self.num_perm = num_perm or settings.NEAR_DUP_NUM_PERM
+        self.bands, self.rows = lsh_params(self.threshold, self.num_perm)
+        self._buckets: List[Dict[int, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._sigs: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def insert(self, key: Hashable, sig: np.ndarray) -> None:
+        self._sigs[key] = sig
+        for band, h in enumerate(band_keys(sig, self.bands, self.rows)):
+            self._buckets[band].setdefault(h, []).append(key)
+
+    def remove(self, key: Hashable) -> None:
+        sig = self._sigs.pop(key, None)
+        if sig is None:
+            return
+        for band, h in enumerate(band_keys(sig, self.bands, self.rows)):
+            keys = self._buckets[band].get(h)
+            if keys is not None and key in keys:
+                keys.remove(key)
+                if not keys:
+                    del self._buckets[band][h]
+
+    def query(self, sig: np.ndarray) -> List[Tuple[Hashable, float]]:
+        """Почти-дубликаты по убыванию сходства."""
+        seen: set = set()
+        for band, h in enumerate(band_keys(sig, self.bands, self.rows)):
+            seen.update(self._buckets[band].get(h, ()))
+        hits = [(k, estimate_jaccard(sig, self._sigs[k])) for k in seen]
+        return sorted((h for h in hits if h[1] >= self.threshold), key=lambda h: -h[1])
+
+
+# -------------------- хранение в БД --------------------
+
+def _stored_lsh_params(num_perm: int) -> Tuple[int, int]:
+    """
+    Разбиение на полосы в БД фиксируется порогом из настроек (а не порогом запроса):
+    иначе бакеты, записанные раньше, не находились бы. После смены
+    NEAR_DUP_THRESHOLD/NEAR_DUP_NUM_PERM таблицы нужно перестроить.
+    """
+    return lsh_params(settings.NEAR_DUP_THRESHOLD, num_perm)
+
+
+def _to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def _from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype="<u4").astype(np.uint32)
+
+
+def find_near_duplicates(
+    db: Session,
+    sig: np.ndarray,
+    *,
+    threshold: Optional[float] = None,
+    limit: int = 50,
+) -> List[Tuple[int, float]]:
+    """Кандидаты из БД с оценкой Jaccard >= threshold: [(candidate_id, similarity)], лучшие первыми."""
+    threshold = settings.NEAR_DUP_THRESHOLD if threshold is None else threshold
+    bands, rows = _stored_lsh_params(len(sig))
+    keys = [(band, h) for band, h in enumerate(band_keys(sig, bands, rows))]
+    # в первую очередь — совпавшие в наибольшем числе полос (их Jaccard, скорее всего, выше):
+    # при переполненной полосе настоящий дубль не должен выпасть из произвольных limit id
+    shared = func.count()
+    cand_ids = db.execute(
+        select(CandidateLSHBucket.candidate_id)
+        .where(tuple_(CandidateLSHBucket.band, CandidateLSHBucket.bucket).in_(keys))
+        .group_by(CandidateLSHBucket.candidate_id)
+        .order_by(shared.desc(), CandidateLSHBucket.candidate_id)
+        .limit(limit)
+    ).scalars().all()
+    if not cand_ids:
+        return []
+    hits = []
+    for cid, raw in db.execute(
+        select(CandidateMinHash.candidate_id, CandidateMinHash.signature)
+        .where(CandidateMinHash.candidate_id.in_(cand_ids))
+    ):
+        other = _from_bytes(raw)
+        if len(other) == len(sig):
+            sim = estimate_jaccard(sig, other)
+            if sim >= threshold:
+                hits.append((cid, sim))
+    return sorted(hits, key=lambda h: -h[1])
+
+
+def store_signatures(
+    db: Session,
+    rows: Iterable[Tuple[int, np.ndarray, Optional[int], Optional[float]]],
+) -> int:
+    """
+    Сохраняет подписи и LSH-бакеты: rows = [(candidate_id, sig, duplicate_of, similarity)].
+    Коммит — на вызывающей стороне.
+    """
+    sig_rows: List[Dict[str, Any]] = []
+    bucket_rows: List[Dict[str, Any]] = []
+    for cid, sig, dup_of, sim in rows:
+        sig_rows.append({"candidate_id": cid, "signature": _to_bytes(sig), "duplicate_of": dup_of, "similarity": sim})
+        bands, r = _stored_lsh_params(len(sig))
+        bucket_rows.extend(
+            {"band": band, "bucket": h, "candidate_id": cid}
+            for band, h in enumerate(band_keys(sig, bands, r))
+        )
+    if sig_rows:
+        db.execute(CandidateMinHash.__table__.insert(), sig_rows)
+        db.execute(CandidateLSHBucket.__table__.insert(), bucket_rows)
+    return len(sig_rows)
@@ -0,0 +1,384 @@
+# backend/app/services/document_extractor.py
+from __future__ import annotations
+"""
+Единый движок извлечения текста из документов.
+
+Раньше текст доставали четыре разных кода: parser_service (pdfminer + python-docx
+с таблицами), ResumeParser (PyPDF2), ingest_service._read_* (pypdf) и
+SimpleResumeParser (PyPDF2 с «mock»-заглушкой) — с разной скоростью, разным
+текстом на выходе и выбором формата по расширению файла. Теперь:
+
+  - формат определяется по сигнатуре содержимого (sniff_format): %PDF, ZIP с
+    word/document.xml (DOCX), OLE2 (DOC), {\\rtf (RTF), иначе — текст, если байты
+    похожи на текст. Расширение/тип от вызывающего (hint) используется только
+    когда сигнатура не распознана;
+  - для каждого формата — реестр бэкендов (register_backend) в порядке
+    предпочтения; следующий пробуется, если предыдущий упал или вернул пусто;
+  - на выходе у всех один и тот же _normalize_text.
+
+Бэкенды по умолчанию:
+  pdf  — pdf_pool (изолированные процессы: pypdf, при плохом выходе pdfminer; см. pdf_extractor);
+  docx — python-docx (абзацы + таблицы), запасной — docx-xml (разбор word/document.xml);
+  doc  — antiword / catdoc, если установлены, запасной — doc-strings (текстовые
+         фрагменты UTF-16/8-бит из бинарника Word 97, best effort);
+  rtf  — rtf (встроенный разбор управляющих слов, \\uN и \\'hh с кодовой страницей);
+  txt  — text (BOM → UTF-8 → TEXT_FALLBACK_ENCODING).
+
+Бэкенды с default=False (pypdf, pdfminer в текущем процессе) движком не
+используются — они для сравнения в backend/tools/bench_extractors.py.
+"""
+import html
+import io
+import logging
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from backend.app.config import settings
+from backend.app.services.metrics import get_registry
+from backend.app.services.pdf_extractor import PdfExtractionTimeout, extract_pdf_text, pdfminer_text, pypdf_text
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "Backend", "DocumentExtractionError", "Extraction", "PdfExtractionTimeout", "UnsupportedDocument",
+    "backends_for", "extract_document", "register_backend", "sniff_format",
+]
+
+_seconds = get_registry().histogram("document_extract_seconds", "Время извлечения текста документа")
+_failures = get_registry().counter("document_extract_failures_total", "Ошибки бэкендов извлечения текста")
+
+FORMATS = ("pdf", "docx", "doc", "rtf", "txt")
+# расширение/тип от вызывающего -> формат (только если сигнатура не распознана)
+_HINTS = {"pdf": "pdf", "docx": "docx", "doc": "doc", "rtf": "rtf", "txt": "txt", "text": "txt", "md": "txt", "csv": "txt"}
+
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+class DocumentExtractionError(RuntimeError):
+    """Ни один бэкенд не смог извлечь текст."""
+
+
+class UnsupportedDocument(DocumentExtractionError):
+    """Формат не распознан или для него нет доступного бэкенда."""
+
+
+class Extraction(NamedTuple):
+    text: str
+    format: str
+    backend: str
+    seconds: float
+
+
+class Backend(NamedTuple):
+    name: str
+    format: str
+    fn: Callable[[bytes, Optional[int]], str]  # (данные, max_pages) -> сырой текст
+    default: bool
+    available: Callable[[], bool]
+
+
+_BACKENDS: Dict[str, List[Backend]] = {fmt: [] for fmt in FORMATS}
+
+
+def register_backend(fmt: str, name: str, fn: Callable[[bytes, Optional[int]], str], *,
+                     default: bool = True, available: Callable[[], bool] = lambda: True) -> None:
+    """Добавить бэкенд в конец списка формата (порядок регистрации = порядок предпочтения)."""
+    _BACKENDS.setdefault(fmt, []).append(Backend(name, fmt, fn, default, available))
+
+
+def backends_for(fmt: str, *, include_optional: bool = False) -> List[Backend]:
+    return [b for b in _BACKENDS.get(fmt, []) if (include_optional or b.default) and b.available()]
+
+
+# --- нормализация ---
+
+_SPACES_RE = re.compile(r"[ \t]+")
+_INDENT_RE = re.compile(r"\n[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def _normalize_text(text: str) -> str:
+    # Приводим переносы и пробелы к норме (\f — разделитель страниц pdfminer, \v — разрыв строки Word)
+    s = text.replace("\r\n", "\n").replace("\r", "\n").replace("\f", "\n").replace("\v", "\n")
+    s = s.replace("\u00A0", " ").replace("\u202F", " ").replace("\x00", "")
+    s = _SPACES_RE.sub(" ", s)
+    s = _INDENT_RE.sub("\n", s)
+    s = _BLANK_LINES_RE.sub("\n\n", s)
+    s = s.strip()
+    return s
+
+
+# --- определение формата ---
+
+def _is_docx_zip(data: bytes) -> bool:
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            return "word/document.xml" in zf.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+def _looks_like_text(data: bytes) -> bool:
+    head = data[:8192]
+    if not head:
+        return True
+    if b"\x00" in head:
+        return False
+    # управляющие байты кроме \t \n \f \r — признак бинарника
+    control = sum(1 for b in head if b < 32 and b not in (9, 10, 12, 13))
+    return control / len(head) < 0.05
+
+
+def sniff_format(data: bytes, hint: Optional[str] = None) -> str:
+    """pdf | docx | doc | rtf | txt | unknown — по сигнатуре; hint — только если она не распознана."""
+    if data.startswith((b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")):
+        return "rtf" if data.lstrip(b"\xef\xbb\xbf").startswith(b"{\\rtf") else "txt"
+    # заголовок PDF допускается не в самом начале файла (мусор перед %PDF)
+    if data[:1024].find(b"%PDF-") != -1:
+        return "pdf"
+    if data.startswith(b"PK\x03\x04"):
+        return "docx" if _is_docx_zip(data) else "unknown"
+    if data.startswith(_OLE_MAGIC):
+        return "doc"
+    if data.lstrip()[:5] == b"{\\rtf":
+        return "rtf"
+    if _looks_like_text(data):
+        return "txt"
+    if hint:
+        return _HINTS.get(hint.lower().lstrip("."), "unknown")
+    return "unknown"
+
+
+# --- бэкенды ---
+
+def _pdf_pool(data: bytes, max_pages: Optional[int]) -> str:
+    return extract_pdf_text(data, max_pages=max_pages)
+
+
+def _pdf_inline(fn: Callable[[bytes, int], tuple]) -> Callable[[bytes, Optional[int]], str]:
+    def _run(data: bytes, max_pages: Optional[int]) -> str:
+        return fn(data, settings.PDF_MAX_PAGES if max_pages is None else max_pages)[0]
+    return _run
+
+
+def _docx_python_docx(data: bytes, max_pages: Optional[int]) -> str:
+    from docx import Document
+
+    doc = Document(io.BytesIO(data))
+    parts = [p.text for p in doc.paragraphs if p.text]
+    for tbl in doc.tables:
+        for row in tbl.rows:
+            parts.append(" ".join(c.text for c in row.cells if c.text))
+    return "\n".join(parts)
+
+
+def _python_docx_available() -> bool:
+    try:
+        import docx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_DOCX_TOKEN_RE = re.compile(r"<w:t(?:\s[^>]*)?>([^<]*)</w:t>|<w:(tab|br|cr)\b[^>]*/>|</w:(p|tc)>")
+
+
+def _docx_xml(data: bytes, max_pages: Optional[int]) -> str:
+    """Текст word/document.xml в порядке документа (таблицы — на своих местах), без python-docx."""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        xml = zf.read("word/document.xml").decode("utf-8", errors="replace")
+    out: List[str] = []
+    for m in _DOCX_TOKEN_RE.finditer(xml):
+        text, inline, close = m.groups()
+        if text is not None:
+            out.append(html.unescape(text))
+        elif inline:
+            out.append("\t" if inline == "tab" else "\n")
+        elif close == "p":
+            out.append("\n")
+        else:
+            out.append(" ")  # конец ячейки таблицы
+    return "".join(out)
+
+
+def _doc_converter(binary: str, args: List[str]) -> Callable[[bytes, Optional[int]], str]:
+    """Внешний конвертер .doc (antiword/catdoc): файл во временный каталог, текст из stdout."""
+    def _run(data: bytes, max_pages: Optional[int]) -> str:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "document.doc"
+            path.write_bytes(data)
+            proc = subprocess.run(
+                [binary, *args, str(path)], capture_output=True, timeout=settings.DOC_EXTRACT_TIMEOUT, check=True,
+            )
+        return proc.stdout.decode("utf-8", errors="replace")
+    return _run
+
+
+def _on_path(binary: str) -> Callable[[], bool]:
+    return lambda: shutil.which(binary) is not None
+
+
+# фрагменты текста Word 97: UTF-16LE (латиница, кириллица U+0400–U+045F, типографика U+2010–U+203F)
+_DOC_UTF16_RE = re.compile(rb"(?:[\x09\x0a\x0d\x20-\x7e\xa0-\xff]\x00|[\x00-\x5f]\x04|[\x10-\x3f]\x20){6,}")
+# и «сжатый» 8-битный текст (документы без символов вне cp1252)
+_DOC_8BIT_RE = re.compile(rb"[\x09\x0a\x0d\x20-\x7e\xc0-\xff]{20,}")
+
+
+def _doc_strings(data: bytes, max_pages: Optional[int]) -> str:
+    runs = [m.group().decode("utf-16-le", errors="replace") for m in _DOC_UTF16_RE.finditer(data)]
+    text = "\n".join(r for r in runs if sum(ch.isalpha() for ch in r) >= 3)
+    if len(text) >= 50:
+        return text
+    return "\n".join(m.group().decode("cp1252", errors="replace") for m in _DOC_8BIT_RE.finditer(data))
+
+
+# RTF: управляющее слово с параметром, \'hh, управляющий символ, скобки, переводы строк, прочий символ
+_RTF_TOKEN_RE = re.compile(
+    r"\\([a-z]{1,32})(-?\d{1,10})? ?|\\'([0-9a-f]{2})|\\([^a-z])|([{}])|[\r\n]+|(.)", re.IGNORECASE | re.DOTALL,
+)
+# группы-«назначения», текст которых не является содержимым документа
+_RTF_SKIP = frozenset((
+    "fonttbl", "colortbl", "stylesheet", "info", "pict", "object", "header", "footer", "headerl", "headerr",
+    "headerf", "footerl", "footerr", "footerf", "themedata", "colorschememapping", "datastore", "latentstyles",
+    "listtable", "listoverridetable", "rsidtbl", "generator", "xmlnstbl", "filetbl", "revtbl", "fldinst",
+    "pntext", "pntxta", "pntxtb", "bkmkstart", "bkmkend", "field", "shppict", "nonshppict", "mmathPr",
+))
+_RTF_CHARS = {
+    "par": "\n", "line": "\n", "sect": "\n", "page": "\n", "row": "\n", "cell": " ", "tab": "\t",
+    "emdash": "—", "endash": "–", "bullet": "•", "lquote": "‘", "rquote": "’", "ldblquote": "“", "rdblquote": "”",
+    "emspace": " ", "enspace": " ", "qmspace": " ",
+}
+
+
+def _rtf(data: bytes, max_pages: Optional[int]) -> str:
+    src = data.decode("latin-1")
+    codepage = "cp1252"
+    stack: List[tuple] = []
+    ignorable = False
+    ucskip = 1
+    skip = 0
+    out: List[str] = []
+    for m in _RTF_TOKEN_RE.finditer(src):
+        word, arg, hexcode, char, brace, tchar = m.groups()
+        if brace:
+            skip = 0
+            if brace == "{":
+                stack.append((ucskip, ignorable))
+            elif stack:
+                ucskip, ignorable = stack.pop()
+        elif char:
+            skip = 0
+            if char == "*":
+                ignorable = True
+            elif ignorable:
+                continue
+            elif char == "~":
+                out.append(" ")
+            elif char in "{}\\":
+                out.append(char)
+            elif char in "\r\n":
+                out.append("\n")
+            elif char == "_":
+                out.append("-")  # неразрывный дефис; "\-" (мягкий перенос) выбрасываем
+        elif word:
+            skip = 0
+            if word in _RTF_SKIP:
+                ignorable = True
+            elif word == "ansicpg" and arg:
+                codepage = f"cp{arg}"
+            elif ignorable:
+                continue
+            elif word in _RTF_CHARS:
+                out.append(_RTF_CHARS[word])
+            elif word == "uc" and arg:
+                ucskip = int(arg)
+            elif word == "u" and arg:
+                code = int(arg)
+                out.append(chr(code + 65536 if code < 0 else code))
+                skip = ucskip  # следующий(ие) символ(ы) — ANSI-замена для старых читателей
+        elif hexcode:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                try:
+                    out.append(bytes([int(hexcode, 16)]).decode(codepage, errors="replace"))
+                except LookupError:
+                    out.append(bytes([int(hexcode, 16)]).decode("cp1252", errors="replace"))
+        elif tchar:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                out.append(tchar)
+    return "".join(out)
+
+
+def _text(data: bytes, max_pages: Optional[int]) -> str:
+    if data.startswith(b"\xef\xbb\xbf"):
+        return data[3:].decode("utf-8", errors="replace")
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16", errors="replace")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode(settings.TEXT_FALLBACK_ENCODING, errors="replace")
+
+
+register_backend("pdf", "pdf_pool", _pdf_pool)
+register_backend("pdf", "pypdf", _pdf_inline(pypdf_text), default=False)
+register_backend("pdf", "pdfminer", _pdf_inline(pdfminer_text), default=False)
+register_backend("docx", "python-docx", _docx_python_docx, available=_python_docx_available)
+register_backend("docx", "docx-xml", _docx_xml)
+register_backend("doc", "antiword", _doc_converter("antiword", ["-m", "UTF-8.txt"]), available=_on_path("antiword"))
+register_backend("doc", "catdoc", _doc_converter("catdoc", ["-d", "utf-8"]), available=_on_path("catdoc"))
+register_backend("doc", "doc-strings", _doc_strings)
+register_backend("rtf", "rtf", _rtf)
+register_backend("txt", "text", _text)
+
+
+# --- движок ---
+
+def extract_document(data: bytes, *, hint: Optional[str] = None, max_pages: Optional[int] = None,
+                     backend: Optional[str] = None) -> Extraction:
+    """
+    Текст документа (нормализованный) + формат и сработавший бэкенд.
+    hint — расширение/тип от вызывающего (только если сигнатура не распознана);
+    max_pages — для PDF (None — PDF_MAX_PAGES); backend — принудительно конкретный
+    (в т.ч. default=False, для сравнения). Бросает UnsupportedDocument / DocumentExtractionError /
+    PdfExtractionTimeout.
+    """
+    fmt = sniff_format(data, hint)
+    candidates = backends_for(fmt, include_optional=backend is not None)
+    if backend is not None:
+        candidates = [b for b in candidates if b.name == backend]
+    if not candidates:
+        raise UnsupportedDocument(f"no extraction backend for format {fmt!r}" + (f" ({backend})" if backend else ""))
+
+    errors: List[str] = []
+    empty: Optional[Extraction] = None
+    for b in candidates:
+        t0 = time.perf_counter()
+        try:
+            text = _normalize_text(b.fn(data, max_pages))
+        except PdfExtractionTimeout:
+            _failures.labels(format=fmt, backend=b.name).inc()
+            raise  # лимит времени на документ исчерпан — следующий бэкенд уже не пробуем
+        except Exception as e:  # сторонние парсеры на битых файлах бросают что угодно
+            _failures.labels(format=fmt, backend=b.name).inc()
+            errors.append(f"{b.name}: {type(e).__name__}: {e}")
+            logger.info("extract %s via %s failed: %s", fmt, b.name, e)
+            continue
+        elapsed = time.perf_counter() - t0
+        _seconds.labels(format=fmt, backend=b.name).observe(elapsed)
+        result = Extraction(text, fmt, b.name, elapsed)
+        if text:
+            return result
+        empty = empty or result  # пусто — пробуем следующий бэкенд
+    if empty is not None:
+        return empty
+    raise DocumentExtractionError(f"{fmt}: " + "; ".join(errors))
@@ -0,0 +1,496 @@
+# backend/app/services/embedding_service.py
+from __future__ import annotations
+"""
+Эмбеддинги резюме/вакансий и векторный поиск.
+
+- Провайдеры (EMBEDDING_PROVIDER): "hashing" — детерминированный локальный
+  hashing-vectorizer (без сети, для офлайна и тестов), "openai" — embeddings API.
+  Все векторы L2-нормированы, так что косинус = скалярное произведение.
+- VectorStore — плотная float32-матрица на диске (vectors.f32 + ids.i64),
+  читается через np.memmap; поиск top-k — пачечный matmul по блокам строк
+  + argpartition. Опционально IVF: k-means центроиды и номер списка на строку,
+  при поиске просматриваются только nprobe ближайших списков.
+- Хранилища по виду документа: "candidates" и "vacancies"
+  (каталог EMBEDDINGS_PATH, по умолчанию backend/temp/embeddings).
+
+Запись в хранилище не транзакционна с БД: векторы пишутся после коммита строк
+(ingest), а id, которых нет в БД, отфильтровываются на стороне вызывающего
+(matcher читает тексты по найденным id). Писатели из разных процессов (API, ingest,
+embedding_reindex) сериализуются файловой блокировкой <dir>/.lock; по счётчику
+version в meta.json процесс замечает чужую запись и перечитывает карту id.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: только блокировка внутри процесса
+    fcntl = None  # type: ignore[assignment]
+
+from backend.app.config import settings
+from backend.app.services.jaccard_matcher_service import _tokens
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "EmbeddingProvider", "HashingEmbeddingProvider", "OpenAIEmbeddingProvider",
+    "VectorStore", "get_provider", "get_store", "embed_documents", "reindex_embeddings",
+]
+
+DEFAULT_EMBEDDINGS_PATH = Path(__file__).resolve().parents[2] / "temp" / "embeddings"
+SEARCH_BLOCK_ROWS = 262_144
+
+
+# -------------------- провайдеры --------------------
+
+class EmbeddingProvider(Protocol):
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dim) float32, строки L2-нормированы."""
+        ...
+
+
+def _l2_normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (m / norms).astype(np.float32, copy=False)
+
+
+class HashingEmbeddingProvider:
+    """
+    Hashing trick по униграммам и биграммам токенов: индекс и знак из blake2b,
+    вес 1 + log(tf). Детерминирован между процессами и запусками.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = int(dim)
+        self.name = f"hashing-{self.dim}"
+
+    def _features(self, text: str) -> Dict[str, int]:
+        toks = _tokens(text)
+        feats: Dict[str, int] = {}
+        for t in toks:
+            feats[t] = feats.get(t, 0) + 1
+        for a, b in zip(toks, toks[1:]):
+            bg = f"{a} {b}"
+            feats[bg] = feats.get(bg, 0) + 1
+        return feats
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat, tf in self._features(text or "").items():
+                h = int.from_bytes(hashlib.blake2b(feat.encode("utf-8"), digest_size=8).digest(), "little")
+                sign = 1.0 if (h >> 63) & 1 else -1.0
+                out[row, h % self.dim] += sign * (1.0 + math.log(tf))
+        return _l2_normalize(out)
+
+
+class OpenAIEmbeddingProvider:
+    """Embeddings API (OpenAI-совместимый endpoint, base_url из OPENAI_BASE_URL)."""
+
+    def __init__(self, model: str, dim: Optional[int] = None, batch_size: int = 256, max_chars: int = 24_000) -> None:
+        self.model = model
+        self.dim = int(dim) if dim else 1536
+        self.name = f"openai-{model}-{self.dim}"
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        from backend.app.services.openai_clients import get_openai_client
+
+        # клиент берётся из реестра на каждый вызов (как ai_service._get_client): провайдер —
+        # синглтон, и закэшированный клиент пережил бы смену ключа в настройках
+        client = get_openai_client("embeddings")
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i in range(0, len(texts), self.batch_size):
+            chunk = [(t or " ")[: self.max_chars] for t in texts[i:i + self.batch_size]]
+            resp = client.embeddings.create(model=self.model, input=chunk, dimensions=self.dim)
+            for j, item in enumerate(resp.data):
+                out[i + j] = np.asarray(item.embedding, dtype=np.float32)
+        return _l2_normalize(out)
+
+
+_provider: Optional[EmbeddingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> EmbeddingProvider:
+    """Провайдер по настройкам EMBEDDING_PROVIDER/EMBEDDING_MODEL/EMBEDDING_DIM (синглтон)."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                name = settings.EMBEDDING_PROVIDER.lower()
+                if name == "hashing":
+                    _provider = HashingEmbeddingProvider(settings.EMBEDDING_DIM)
+                elif name == "openai":
+                    _provider = OpenAIEmbeddingProvider(settings.EMBEDDING_MODEL, settings.EMBEDDING_DIM)
+                else:
+                    raise ValueError(f"Unknown embedding provider: {settings.EMBEDDING_PROVIDER}")
+    return _provider
+
+
+# -------------------- хранилище --------------------
+
+def _append_at(path: Path, offset: int, data: bytes) -> None:
+    with open(path, "r+b" if path.exists() else "wb") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(data)
+
+
+class VectorStore:
+    """
+    Append-only матрица векторов на диске с перезаписью по id.
+
+    <dir>/meta.json   — {"dim", "provider", "count", "version"}
+    <dir>/vectors.f32 — count×dim float32 (row-major)
+    <dir>/ids.i64     — id строки (-1 — удалённая)
+    <dir>/ivf_centroids.npy, ivf_lists.i32 — опциональный IVF-индекс
+    """
+
+    def __init__(self, path: Path, dim: int, provider: str) -> None:
+        self.path = Path(path)
+        self.dim = int(dim)
+        self.provider = provider
+        self._lock = threading.RLock()
+        self._flock_held = False
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta = self._read_meta()
+        if meta and (meta["dim"] != self.dim or meta["provider"] != provider):
+            raise ValueError(
+                f"Vector store {self.path} was built with {meta['provider']} (dim={meta['dim']}), "
+                f"current provider is {provider} (dim={self.dim}); reindex into a clean directory"
+            )
+        self.count = int(meta["count"]) if meta else 0
+        self.version = int(meta.get("version", 0)) if meta else 0
+        self._id_to_row: Dict[int, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._ids: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[np.ndarray] = None
+        self._load()
+
+    # ---------- файлы ----------
+
+    @property
+    def _vec_file(self) -> Path:
+        return self.path / "vectors.f32"
+
+    @property
+    def _ids_file(self) -> Path:
+        return self.path / "ids.i64"
+
+    def _read_meta(self) -> Optional[dict]:
+        p = self.path / "meta.json"
+        return json.loads(p.read_text(encoding="utf-8")) if p.exists() else None
+
+    def _write_meta(self) -> None:
+        tmp = self.path / "meta.json.tmp"
+        self.version += 1
+        tmp.write_text(json.dumps({
+            "dim": self.dim, "provider": self.provider, "count": self.count, "version": self.version,
+        }), encoding="utf-8")
+        os.replace(tmp, self.path / "meta.json")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Эксклюзивная запись: блокировка потоков процесса + flock на <dir>/.lock между
+        процессами. Если с прошлого раза хранилище менял другой процесс (version в
+        meta.json другой) — состояние перечитывается до записи.
+        """
+        with self._lock:
+            if self._flock_held:
+                yield
+                return
+            with self._file_lock():
+                self._sync()
+                yield
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        with open(self.path / ".lock", "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._flock_held = True
+            try:
+                yield
+            finally:
+                self._flock_held = False
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _sync(self) -> bool:
+        """Перечитывает хранилище, если meta.json изменился после нашей последней записи/загрузки."""
+        meta = self._read_meta()
+        if not meta or int(meta.get("version", 0)) == self.version:
+            return False
+        self.count = int(meta["count"])
+        self.version = int(meta.get("version", 0))
+        self._load()
+        return True
+
+    def refresh(self) -> None:
+        """Подхватывает записи других процессов (дешёво, если их не было)."""
+        with self._lock:
+            self._sync()
+
+    def _load(self) -> None:
+        """Полная загрузка: отображения файлов + карта id -> строка."""
+        cpath = self.path / "ivf_centroids.npy"
+        self._centroids = np.load(cpath) if cpath.exists() else None
+        self._remap()
+        self._id_to_row = {i: r for r, i in enumerate(self._ids.tolist()) if i >= 0}
+
+    def _remap(self) -> None:
+        """Переоткрывает memmap'ы под текущий count (дёшево, файлы только растут)."""
+        if self.count:
+            self._vectors = np.memmap(self._vec_file, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+            self._ids = np.memmap(self._ids_file, dtype=np.int64, mode="r", shape=(self.count,))
+        else:
+            self._vectors, self._ids = None, np.zeros(0, dtype=np.int64)
+        lpath = self.path / "ivf_lists.i32"
+        self._lists = None
+        if self._centroids is not None and lpath.exists() and self.count:
+            # строки, добавленные после построения IVF, получают список при записи (см. upsert);
+            # если списков меньше, чем строк (запись без IVF, оборванная дозапись), хвост
+            # назначается по центроидам, а не выключает IVF молча
+            covered = lpath.stat().st_size // 4
+            if covered < self.count:
+                self._assign_ivf_tail(lpath, covered)
+            self._lists = np.memmap(lpath, dtype=np.int32, mode="r", shape=(self.count,))
+
+    def _assign_ivf_tail(self, lpath: Path, covered: int) -> None:
+        if not self._flock_held:
+            # вызов не из записи (загрузка, refresh) — дописываем списки под той же блокировкой
+            with self._lock, self._file_lock():
+                covered = lpath.stat().st_size // 4
+                if covered < self.count:
+                    self._assign_ivf_tail(lpath, covered)
+            return
+        logger.warning(
+            "vector store %s: IVF lists cover %d of %d rows, assigning the rest to nearest centroids",
+            self.path, covered, self.count,
+        )
+        with open(lpath, "r+b") as f:
+            f.truncate(covered * 4)  # обрезанная на середине запись
+            f.seek(0, os.SEEK_END)
+            for s in range(covered, self.count, SEARCH_BLOCK_ROWS):
+                block = np.asarray(self._vectors[s:min(self.count, s + SEARCH_BLOCK_ROWS)])
+                f.write(np.argmax(block @ self._centroids.T, axis=1).astype(np.int32).tobytes())
+
+    def __len__(self) -> int:
+        return len(self._id_to_row)
+
+    def __contains__(self, cid: object) -> bool:
+        return cid in self._id_to_row
+
+    # ---------- запись ----------
+
+    def upsert(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Перезаписывает векторы существующих id на месте, новые — дописывает в конец."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"expected ({len(ids)}, {self.dim}) vectors, got {vectors.shape}")
+        with self._locked():
+            new_ids: List[int] = []
+            new_rows: List[int] = []
+            if self._id_to_row:
+                rw = np.memmap(self._vec_file, dtype=np.float32, mode="r+", shape=(self.count, self.dim))
+                for k, cid in enumerate(ids):
+                    row = self._id_to_row.get(int(cid))
+                    if row is None:
+                        new_ids.append(int(cid))
+                        new_rows.append(k)
+                    else:
+                        rw[row] = vectors[k]
+                rw.flush()
+                del rw
+            else:
+                new_ids, new_rows = [int(c) for c in ids], list(range(len(ids)))
+
+            if new_ids:
+                # дубли id внутри одной пачки — берём последний вектор
+                last: Dict[int, int] = {}
+                for cid, k in zip(new_ids, new_rows):
+                    last[cid] = k
+                new_ids, new_rows = list(last), list(last.values())
+                # дописываем с позиции count, а не с конца файла: хвост оборванной записи затирается
+                _append_at(self._vec_file, self.count * self.dim * 4, vectors[new_rows].tobytes())
+                _append_at(self._ids_file, self.count * 8, np.asarray(new_ids, dtype=np.int64).tobytes())
+                if self._centroids is not None and self._lists is not None:
+                    assign = np.argmax(vectors[new_rows] @ self._centroids.T, axis=1).astype(np.int32)
+                    _append_at(self.path / "ivf_lists.i32", self.count * 4, assign.tobytes())
+                for n, cid in enumerate(new_ids):
+                    self._id_to_row[cid] = self.count + n
+                self.count += len(new_ids)
+                self._write_meta()
+                self._remap()
+
+    def delete(self, ids: Iterable[int]) -> int:
+        with self._locked():
+            rows = [self._id_to_row[int(i)] for i in ids if int(i) in self._id_to_row]
+            if not rows:
+                return 0
+            ids_rw = np.memmap(self._ids_file, dtype=np.int64, mode="r+", shape=(self.count,))
+            ids_rw[rows] = -1
+            ids_rw.flush()
+            del ids_rw
+            for i in ids:
+                self._id_to_row.pop(int(i), None)
+            self._write_meta()
+            self._remap()
+            return len(rows)
+
+    def get(self, cid: int) -> Optional[np.ndarray]:
+        row = self._id_to_row.get(int(cid))
+        return None if row is None else np.array(self._vectors[row])
+
+    # ---------- IVF ----------
+
+    def build_ivf(self, n_lists: Optional[int] = None, *, iters: int = 10, sample: int = 100_000, seed: int = 0) -> int:
+        """Сферический k-means по выборке строк; n_lists по умолчанию ~ sqrt(N)."""
+        with self._locked():
+            if not self.count:
+                return 0
+            n_lists = int(n_lists or max(1, int(math.sqrt(self.count))))
+            rng = np.random.default_rng(seed)
+            idx = np.sort(rng.choice(self.count, size=min(sample, self.count), replace=False))
+            x = np.asarray(self._vectors[idx])
+            n_lists = min(n_lists, len(x))
+            cent = x[rng.choice(len(x), size=n_lists, replace=False)].copy()
+            for _ in range(iters):
+                assign = np.argmax(x @ cent.T, axis=1)
+                for c in range(n_lists):
+                    members = x[assign == c]
+                    if len(members):
+                        cent[c] = members.sum(axis=0)
+                cent = _l2_normalize(cent)
+
+            lists = np.empty(self.count, dtype=np.int32)
+            for s in range(0, self.count, SEARCH_BLOCK_ROWS):
+                block = np.asarray(self._vectors[s:s + SEARCH_BLOCK_ROWS])
+                lists[s:s + len(block)] = np.argmax(block @ cent.T, axis=1)
+            np.save(self.path / "ivf_centroids.npy", cent)
+            lists.tofile(self.path / "ivf_lists.i32")
+            self._write_meta()
+            self._load()
+            logger.info("vector store %s: IVF built, %d lists over %d rows", self.path, n_lists, self.count)
+            return n_lists
+
+    # ---------- поиск ----------
+
+    def search(self, query: np.ndarray, k: int = 10, *, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        top-k по косинусу для одного запроса. nprobe — сколько IVF-списков
+        просматривать (None — EMBEDDING_IVF_NPROBE; 0 — полный перебор).
+        """
+        q = _l2_normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        vectors, ids, lists, cent = self._vectors, self._ids, self._lists, self._centroids
+        if vectors is None or k <= 0:
+            return []
+        nprobe = settings.EMBEDDING_IVF_NPROBE if nprobe is None else nprobe
+
+        if nprobe and cent is not None and lists is not None and nprobe < len(cent):
+            probe = np.argpartition(-(cent @ q), nprobe - 1)[:nprobe]
+            rows = np.flatnonzero(np.isin(lists, probe))
+            scores = np.asarray(vectors[rows]) @ q
+            cand_rows, cand_scores = rows, scores
+        else:
+            parts_r, parts_s = [], []
+            for s in range(0, len(ids), SEARCH_BLOCK_ROWS):
+                sc = np.asarray(vectors[s:s + SEARCH_BLOCK_ROWS]) @ q
+                if len(sc) > k:
+                    top = np.argpartition(-sc, k - 1)[:k]
+                else:
+                    top = np.arange(len(sc))
+                parts_r.append(top + s)
+                parts_s.append(sc[top])
+            cand_rows, cand_scores = np.concatenate(parts_r), np.concatenate(parts_s)
+
+        alive = ids[cand_rows] >= 0
+        cand_rows, cand_scores = cand_rows[alive], cand_scores[alive]
+        if len(cand_scores) > k:
+            top = np.argpartition(-cand_scores, k - 1)[:k]
+            cand_rows, cand_scores = cand_rows[top], cand_scores[top]
+        order = np.lexsort((ids[cand_rows], -cand_scores))
+        return [(int(ids[cand_rows[i]]), float(cand_scores[i])) for i in order]
+
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(kind: str) -> VectorStore:
+    """Хранилище векторов вида kind ("candidates" | "vacancies") для текущего провайдера."""
+    with _stores_lock:
+        store = _stores.get(kind)
+        if store is None:
+            provider = get_provider()
+            base = Path(settings.EMBEDDINGS_PATH or DEFAULT_EMBEDDINGS_PATH)
+            store = _stores[kind] = VectorStore(base / kind, provider.dim, provider.name)
+    store.refresh()
+    return store
+
+
+def embed_documents(kind: str, docs: Sequence[Tuple[int, Optional[str]]]) -> int:
+    """Считает и сохраняет векторы для [(id, text), ...]. Возвращает число записанных."""
+    docs = [(i, t) for i, t in docs if (t or "").strip()]
+    if not docs:
+        return 0
+    vectors = get_provider().embed([t for _, t in docs])
+    get_store(kind).upsert([i for i, _ in docs], vectors)
+    return len(docs)
+
+
+def reindex_embeddings(
+    db,
+    kind: str,
+    *,
+    only_missing: bool = True,
+    batch_size: int = 1000,
+    build_ivf: bool = False,
+    progress: Optional[Callable[..., None]] = None,
+) -> int:
+    """Досчитывает (или пересчитывает) векторы по БД пачками по id."""
+    from backend.app.models.candidate import Candidate
+    from backend.app.models.vacancy import Vacancy
+
+    model = {"candidates": Candidate, "vacancies": Vacancy}[kind]
+    store = get_store(kind)
+    total = db.query(model.id).count()
+    done = written = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(model.id, model.original_text)
+              .filter(model.id > last_id)
+              .order_by(model.id)
+              .limit(batch_size)
+              .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        done += len(rows)
+        todo = [(r.id, r.original_text) for r in rows if not (only_missing and r.id in store)]
+        written += embed_documents(kind, todo)
+        if progress is not None:
+            progress(done, total)
+    if build_ivf:
+        store.build_ivf()
+    logger.info("embeddings %s: %d vectors written", kind, written)
+    return written
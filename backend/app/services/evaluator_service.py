@@ -1,6 +1,8 @@
 from __future__ import annotations
 from typing import Dict, Any, Iterable
-import math, re
+import math
+
+from backend.app.services.text_patterns import YEARS_COUNT_RE
 
 def evaluate_resume(parsed: Dict[str, Any], criteria: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -37,7 +39,7 @@ def evaluate_resume(parsed: Dict[str, Any], criteria: Dict[str, Any]) -> Dict[st
     if years_req:
         max_score += 1
         found = 0
-        for m in re.finditer(r"(\d+)\s*(?:год|лет|года)", text):
+        for m in YEARS_COUNT_RE.finditer(text):
             try:
                 found = max(found, int(m.group(1)))
             except Exception: pass
@@ -2,16 +2,30 @@
 from __future__ import annotations
 
 import os
-import re
 import hashlib
+import logging
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Literal, Tuple, Dict, Any
+from typing import Literal, Tuple, Dict, Any, Callable, Iterator, Iterable, List, NamedTuple, Optional
 
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from backend.app.config import settings
+from backend.app.services.dedup_service import MinHashLSH, find_near_duplicates, minhash, store_signatures
+from backend.app.services.document_extractor import DocumentExtractionError, extract_document
+from backend.app.services.parse_cache import get_parse_cache, make_key, sha256_bytes
+from backend.app.services.pdf_extractor import PdfExtractionTimeout
+from backend.app.services.text_patterns import EMAIL_RE
 from backend.app.models.candidate import Candidate  # модель с original_text (+ опц. original_text_hash)
 from backend.app.models.vacancy import Vacancy, VacancyStatus
 
+logger = logging.getLogger(__name__)
+
 # --- Конфиг входных источников ------------------------------------------------
 
 STORAGE = os.getenv("STORAGE_BACKEND", "local").lower()
@@ -19,42 +33,48 @@ ROOT = Path(__file__).resolve().parents[3]  # .../hr-assistant
 INBOX_RESUMES = ROOT / "inbox" / "job_applications"
 INBOX_VACANCIES = ROOT / "inbox" / "job_openings"
 
+INGEST_EXTS = {".txt", ".doc", ".docx", ".pdf", ".rtf"}
+
 # --- Вспомогательные ----------------------------------------------------------------
 
-EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# Версия извлечения текста — входит в ключ кэша парсинга
+PARSER_VERSION = "2"
 
-def _read_txt(path: Path) -> str:
-    return path.read_text(encoding="utf-8", errors="ignore")
 
-def _read_docx(path: Path) -> str:
+def _read_bytes(data: bytes, ext: str) -> str:
+    # формат — по сигнатуре (расширение — подсказка), PDF — все страницы
     try:
-        from docx import Document
-        return "\n".join(p.text for p in Document(str(path)).paragraphs)
-    except Exception:
+        return extract_document(data, hint=ext, max_pages=0).text
+    except DocumentExtractionError as e:
+        logger.info("ingest: no text extracted (%s): %s", ext, e)
         return ""
 
-def _read_pdf(path: Path) -> str:
-    try:
-        from pypdf import PdfReader
-        reader = PdfReader(str(path))
-        return "\n".join(page.extract_text() or "" for page in reader.pages)
-    except Exception:
-        return ""
+def _read_cached(data: bytes, ext: str, doc_hash: str | None = None) -> str:
+    # пустой текст (в т.ч. неудачное извлечение) не кэшируем — иначе ошибка разбора
+    # «запомнилась» бы навсегда и файл не перечитывался бы после починки парсера
+    cache = get_parse_cache()
+    key = make_key("ingest.text", PARSER_VERSION, doc_hash or sha256_bytes(data), ext=ext)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached["text"]
+    text = _read_bytes(data, ext)
+    if text:
+        cache.set(key, {"text": text})
+    return text
 
 def _read_file(path: Path) -> str:
     ext = path.suffix.lower()
-    if ext == ".txt":
-        return _read_txt(path)
-    if ext == ".docx":
-        return _read_docx(path)
-    if ext == ".pdf":
-        return _read_pdf(path)
-    # .doc можно пропустить / доп. обработчик, если хочется
-    return ""
+    if ext not in INGEST_EXTS:
+        return ""
+    return _read_cached(path.read_bytes(), ext)
 
 def _hash_text(text: str) -> str:
     return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
 
+def _md5_text(text: str) -> str:
+    # совпадает с md5(original_text) на стороне Postgres (UTF8)
+    return hashlib.md5(text.encode("utf-8", errors="ignore")).hexdigest()
+
 def _split_name_from_filename(path: Path) -> Tuple[str, str]:
     """Простейшая эвристика: 'Фамилия Имя ...' -> ('Имя','Фамилия')"""
     name = path.stem.replace("_", " ").replace("-", " ").strip()
@@ -81,6 +101,7 @@ ALLOWED_CANDIDATE_FIELDS = {
     "resume_file_path",
     "original_text",
     "original_text_hash",  # если колонка есть
+    "doc_hash",
 }
 
 ALLOWED_VACANCY_FIELDS = {
@@ -94,88 +115,455 @@ ALLOWED_VACANCY_FIELDS = {
 def _filter_allowed(data: Dict[str, Any], allowed: set[str]) -> Dict[str, Any]:
     return {k: v for k, v in data.items() if k in allowed and v is not None}
 
+# --- Статистика ----------------------------------------------------------------
+
+@dataclass
+class IngestStats:
+    """Счётчики и тайминги одного прогона импорта (секунды)."""
+
+    kind: str
+    files_seen: int = 0
+    parsed: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    near_duplicates: int = 0
+    empty: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    # scan/preload/parse_wait/dedup/near_dup/insert/index/embed/commit — «стеночное» время основного потока,
+    # parse_cpu — суммарное время парсинга в воркерах; MinHash-проверка входит в dedup,
+    # near_dup — запись подписей/LSH-бакетов; при merge near_duplicates учитываются и в duplicates
+    stages: Dict[str, float] = field(default_factory=lambda: {
+        "scan": 0.0, "preload": 0.0, "parse_wait": 0.0, "parse_cpu": 0.0,
+        "dedup": 0.0, "near_dup": 0.0, "insert": 0.0, "index": 0.0, "embed": 0.0, "commit": 0.0,
+    })
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files_seen / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "files_seen": self.files_seen,
+            "parsed": self.parsed,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "near_duplicates": self.near_duplicates,
+            "empty": self.empty,
+            "failed": self.failed,
+            "elapsed_sec": round(self.elapsed, 3),
+            "files_per_sec": round(self.files_per_sec, 2),
+            "stages_sec": {k: round(v, 3) for k, v in self.stages.items()},
+        }
+
+# --- Парсинг (выполняется в процессах пула) -------------------------------------
+
+class _Parsed(NamedTuple):
+    path: str
+    text: str
+    doc_hash: str | None
+    seconds: float
+    error: str | None
+
+
+# лимит времени на документ в процессе пула импорта (см. _init_parse_worker)
+_worker_timeout: Optional[float] = None
+
+
+def _on_parse_timeout(signum, frame) -> None:
+    raise PdfExtractionTimeout(f"document parse exceeded {_worker_timeout:g}s")
+
+
+def _init_parse_worker() -> None:
+    """
+    Инициализация процесса пула импорта. Он сам по себе изолирован от сервера, поэтому
+    PDF разбирается прямо в нём (PDF_ISOLATED=False), а не через свой PdfWorkerPool —
+    иначе каждый процесс импорта поднимал бы ещё PDF_WORKERS процессов и гонял каждый
+    документ через лишний pipe. Вместо таймаута пула — SIGALRM на документ (POSIX).
+    """
+    global _worker_timeout
+    settings.PDF_ISOLATED = False
+    if hasattr(signal, "setitimer"):
+        _worker_timeout = settings.PDF_EXTRACT_TIMEOUT
+        signal.signal(signal.SIGALRM, _on_parse_timeout)
+
+
+def _parse_file(path_str: str) -> _Parsed:
+    """Читает и парсит один файл. Функция верхнего уровня — чтобы пиклиться в ProcessPool."""
+    t0 = time.perf_counter()
+    path = Path(path_str)
+    if _worker_timeout:
+        signal.setitimer(signal.ITIMER_REAL, _worker_timeout)
+    try:
+        data = path.read_bytes()
+        doc_hash = sha256_bytes(data)
+        text = _read_cached(data, path.suffix.lower(), doc_hash)
+        return _Parsed(path_str, text, doc_hash, time.perf_counter() - t0, None)
+    except Exception as e:
+        return _Parsed(path_str, "", None, time.perf_counter() - t0, f"{type(e).__name__}: {e}")
+    finally:
+        if _worker_timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _iter_inbox(folder: Path, stats: IngestStats) -> Iterator[Path]:
+    """Ленивый обход папки — без построения полного списка файлов."""
+    walker = os.walk(folder)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            dirpath, _dirs, filenames = next(walker)
+        except StopIteration:
+            stats.stages["scan"] += time.perf_counter() - t0
+            return
+        stats.stages["scan"] += time.perf_counter() - t0
+        for name in filenames:
+            p = Path(dirpath) / name
+            if p.suffix.lower() in INGEST_EXTS:
+                yield p
+
+
+def _parse_stream(
+    paths: Iterable[Path],
+    stats: IngestStats,
+    *,
+    workers: int,
+    max_in_flight: int,
+) -> Iterator[_Parsed]:
+    """
+    Парсит файлы в пуле процессов, держа в работе не более max_in_flight задач.
+    Результаты отдаются по мере готовности (порядок не гарантируется).
+    """
+    if workers <= 0:
+        for p in paths:
+            yield _parse_file(str(p))
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker)
+    pending: set = set()
+    try:
+        for p in paths:
+            pending.add(pool.submit(_parse_file, str(p)))
+            if len(pending) < max_in_flight:
+                continue
+            t0 = time.perf_counter()
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            stats.stages["parse_wait"] += time.perf_counter() - t0
+            for fut in done:
+                yield fut.result()
+
+        while pending:
+            t0 = time.perf_counter()
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            stats.stages["parse_wait"] += time.perf_counter() - t0
+            for fut in done:
+                yield fut.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+# --- Запись в БД -----------------------------------------------------------------
+
+def _insert_batch(db: Session, model, rows: List[Dict[str, Any]], stats: IngestStats) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Bulk insert пачки в savepoint. Если пачка упала на ограничении (например,
+    email уже занят) — повторяем построчно и пропускаем только проблемные строки.
+    Возвращает [(id, row), ...] вставленных строк (нужны для обновления поискового индекса).
+    """
+    if not rows:
+        return []
+    t0 = time.perf_counter()
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    try:
+        with db.begin_nested():
+            ids = db.execute(stmt, rows).scalars().all()
+        inserted = list(zip(ids, rows))
+    except IntegrityError:
+        inserted = []
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    inserted.append((db.execute(stmt, [row]).scalar_one(), row))
+            except IntegrityError as e:
+                stats.failed += 1
+                logger.warning("ingest: строка отклонена БД (%s): %s",
+                               row.get("resume_file_path") or row.get("source_file_path"), e.orig)
+    stats.stages["insert"] += time.perf_counter() - t0
+    return inserted
+
+
+def _index_batch(db: Session, inserted: List[Tuple[int, Dict[str, Any]]], stats: IngestStats) -> None:
+    """Инкрементально добавляет вставленные резюме в поисковый индекс (та же транзакция)."""
+    if not inserted or not settings.SEARCH_INDEX_ENABLED:
+        return
+    from backend.app.services.search_service import index_documents
+
+    t0 = time.perf_counter()
+    index_documents(db, [(cid, row.get("original_text")) for cid, row in inserted])
+    stats.stages["index"] += time.perf_counter() - t0
+
+
+def _embed_batch(kind: str, inserted: List[Tuple[int, Dict[str, Any]]], stats: IngestStats) -> None:
+    """Векторы для закоммиченных документов (хранилище embedding_service)."""
+    if not inserted or not settings.EMBEDDINGS_ON_INGEST:
+        return
+    from backend.app.services.embedding_service import embed_documents
+
+    t0 = time.perf_counter()
+    try:
+        embed_documents(kind, [(i, row.get("original_text")) for i, row in inserted])
+    except Exception as e:
+        # импорт важнее векторов: пропущенные досчитает embedding_reindex
+        logger.warning("ingest: не удалось посчитать эмбеддинги: %s", e)
+    stats.stages["embed"] += time.perf_counter() - t0
+
+
+def _check_near_duplicate(
+    db: Session,
+    text: str,
+    path: str,
+    run_lsh: MinHashLSH,
+    pending_sigs: Dict[str, Tuple[Any, Any, Optional[float]]],
+    action: str,
+) -> Tuple[bool, bool]:
+    """
+    MinHash-проверка резюме, прошедшего точный дедуп. Ищет почти-дубликат среди
+    принятых в этом прогоне (в памяти) и уже сохранённых (LSH-бакеты в БД).
+    Возвращает (найден почти-дубликат, пропустить резюме):
+    action="merge" — резюме не импортируется (считается повтором найденного);
+    "flag" — импортируется с duplicate_of/similarity.
+    """
+    sig = minhash(text)
+    if sig is None:
+        return False, False
+    hits: List[Tuple[Any, float]] = run_lsh.query(sig) or find_near_duplicates(db, sig)
+    dup_ref, sim = hits[0] if hits else (None, None)
+    if dup_ref is not None:
+        logger.info("ingest: %s — почти-дубликат %s (jaccard≈%.2f), действие: %s", path, dup_ref, sim, action)
+        if action == "merge":
+            return True, True
+    run_lsh.insert(path, sig)
+    pending_sigs[path] = (sig, dup_ref, sim)
+    return dup_ref is not None, False
+
+
+def _commit(db: Session, stats: IngestStats) -> None:
+    t0 = time.perf_counter()
+    db.commit()
+    stats.stages["commit"] += time.perf_counter() - t0
+
 # --- Основной импорт -----------------------------------------------------------
 
-def ingest_all(db: Session, kind: Literal["resumes", "vacancies"]) -> int:
+def ingest_stream(
+    db: Session,
+    kind: Literal["resumes", "vacancies"],
+    *,
+    workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    commit_every: Optional[int] = None,
+    progress: Optional[Callable[..., None]] = None,
+) -> IngestStats:
     """
-    Импортирует все файлы из inbox/... (или из GDrive в перспективе).
-    Возвращает количество добавленных записей.
+    Потоковый импорт inbox/...: ленивый обход файлов -> парсинг в пуле процессов
+    (ограниченное число задач в работе) -> дедуп по заранее загруженным путям/хэшам
+    -> bulk insert пачками с периодическим коммитом.
+
+    progress(done, total=None, **info) вызывается на каждый обработанный файл
+    (фоновые задачи троттлят запись сами); исключение из него прерывает импорт.
     """
+    stats = IngestStats(kind=kind)
+    started = time.perf_counter()
     _ensure_dirs()
 
     if STORAGE == "gdrive":
         # TODO: подключить текущий gdrive_service и скачать файлы во временную папку
-        return 0  # заглушка, чтобы не ломать логику
-
-    folder = INBOX_RESUMES if kind == "resumes" else INBOX_VACANCIES
-    exts = {".txt", ".doc", ".docx", ".pdf"}
-    files = [p for p in folder.glob("**/*") if p.is_file() and p.suffix.lower() in exts]
-
-    imported = 0
-
-    for path in files:
-        text = _read_file(path)
+        return stats  # заглушка, чтобы не ломать логику
+
+    if workers is None:
+        workers = settings.INGEST_WORKERS if settings.INGEST_WORKERS is not None else (os.cpu_count() or 1)
+    max_in_flight = max(1, max_in_flight or settings.INGEST_MAX_IN_FLIGHT)
+    batch_size = max(1, batch_size or settings.INGEST_BATCH_SIZE)
+    commit_every = max(batch_size, commit_every or settings.INGEST_COMMIT_EVERY)
+
+    is_resumes = kind == "resumes"
+    has_text_hash = hasattr(Candidate, "original_text_hash")
+    folder = INBOX_RESUMES if is_resumes else INBOX_VACANCIES
+
+    # 1) Всё, что уже есть в БД, — одним запросом
+    t0 = time.perf_counter()
+    seen_paths: set[str] = set()
+    seen_hashes: set[str] = set()
+    seen_emails: set[str] = set()
+    if is_resumes:
+        cols = [Candidate.resume_file_path, Candidate.doc_hash, Candidate.email]
+        if has_text_hash:
+            cols.append(Candidate.original_text_hash)
+        for row in db.query(*cols).yield_per(10_000):
+            if row[0]:
+                seen_paths.add(row[0])
+            if row[1]:
+                seen_hashes.add(row[1])
+            if row[2]:
+                seen_emails.add(row[2].lower())
+            if has_text_hash and row[3]:
+                seen_hashes.add(row[3])
+    else:
+        for path_val, text_md5 in db.query(Vacancy.source_file_path, func.md5(Vacancy.original_text)).yield_per(10_000):
+            if path_val:
+                seen_paths.add(path_val)
+            if text_md5:
+                seen_hashes.add(text_md5)
+    stats.stages["preload"] += time.perf_counter() - t0
+
+    def _new_paths() -> Iterator[Path]:
+        for p in _iter_inbox(folder, stats):
+            stats.files_seen += 1
+            if str(p) in seen_paths:
+                stats.duplicates += 1
+                continue
+            yield p
+
+    model = Candidate if is_resumes else Vacancy
+    batch: List[Dict[str, Any]] = []
+    since_commit = 0
+
+    # почти-дубликаты (MinHash/LSH): индекс текущего прогона в памяти + таблицы в БД
+    near_dup_action = settings.NEAR_DUP_ACTION.lower() if is_resumes else "off"
+    run_lsh = MinHashLSH() if near_dup_action != "off" else None
+    pending_sigs: Dict[str, Tuple[Any, Any, Optional[float]]] = {}   # path -> (sig, dup_ref, sim)
+    run_ids: Dict[str, int] = {}                                      # path -> id вставленного кандидата
+    # векторы пишутся только после коммита их строк: откат или падение до коммита
+    # не оставят в хранилище векторов id, которых нет в БД
+    to_embed: List[Tuple[int, Dict[str, Any]]] = []
+
+    def _store_sigs(inserted: List[Tuple[int, Dict[str, Any]]]) -> None:
+        if run_lsh is None or not inserted:
+            return
+        t0 = time.perf_counter()
+        rows = []
+        for cid, row in inserted:
+            run_ids[row["resume_file_path"]] = cid
+        for cid, row in inserted:
+            meta = pending_sigs.pop(row["resume_file_path"], None)
+            if meta is None:
+                continue
+            sig, dup_ref, sim = meta
+            dup_of = run_ids.get(dup_ref) if isinstance(dup_ref, str) else dup_ref
+            rows.append((cid, sig, dup_of, sim))
+        store_signatures(db, rows)
+        stats.stages["near_dup"] += time.perf_counter() - t0
+
+    def _drop_rejected(rows: List[Dict[str, Any]], inserted: List[Tuple[int, Dict[str, Any]]]) -> None:
+        # строки, отклонённые БД (построчный повтор в _insert_batch): их подписи не ждут id,
+        # а в индексе прогона они не должны находиться как «оригинал» для следующих резюме
+        if run_lsh is None or len(inserted) == len(rows):
+            return
+        kept = {row["resume_file_path"] for _, row in inserted}
+        for row in rows:
+            path = row["resume_file_path"]
+            if path not in kept and pending_sigs.pop(path, None) is not None:
+                run_lsh.remove(path)
+
+    def _flush(rows: List[Dict[str, Any]]) -> int:
+        inserted = _insert_batch(db, model, rows, stats)
+        if is_resumes:
+            _drop_rejected(rows, inserted)
+            _store_sigs(inserted)
+            _index_batch(db, inserted, stats)
+        to_embed.extend(inserted)
+        stats.imported += len(inserted)
+        return len(inserted)
+
+    def _commit_and_embed() -> None:
+        _commit(db, stats)
+        _embed_batch("candidates" if is_resumes else "vacancies", to_embed, stats)
+        to_embed.clear()
+
+    for parsed in _parse_stream(_new_paths(), stats, workers=workers, max_in_flight=max_in_flight):
+        if progress is not None:
+            progress(stats.files_seen, imported=stats.imported, duplicates=stats.duplicates)
+        stats.stages["parse_cpu"] += parsed.seconds
+        if parsed.error:
+            stats.failed += 1
+            logger.warning("ingest: не удалось прочитать %s: %s", parsed.path, parsed.error)
+            continue
+        text = parsed.text
         if not text.strip():
+            stats.empty += 1
             continue
+        stats.parsed += 1
 
-        text_hash = _hash_text(text)
-
-        if kind == "resumes":
-            # дедуп: по пути или по хэшу (если колонка есть)
-            if hasattr(Candidate, "original_text_hash"):
-                exists = db.query(Candidate).filter(
-                    (Candidate.resume_file_path == str(path))
-                    | (Candidate.original_text_hash == text_hash)
-                ).first()
-            else:
-                exists = db.query(Candidate).filter(
-                    Candidate.resume_file_path == str(path)
-                ).first()
-
-            if exists:
-                continue
-
-            first, last = _split_name_from_filename(path)
+        # 2) дедуп в памяти (БД + уже принятые в этом прогоне)
+        t0 = time.perf_counter()
+        path = Path(parsed.path)
+        if is_resumes:
+            text_hash = _hash_text(text)
             email = _find_email(text)
-
-            payload = {
-                "first_name": first or None,
-                "last_name": last or None,
-                "email": email,
-                "resume_file_path": str(path),
-                "original_text": text,
-                # добавим хэш, если колонка существует
-                "original_text_hash": text_hash if hasattr(Candidate, "original_text_hash") else None,
-            }
-
-            payload = _filter_allowed(payload, ALLOWED_CANDIDATE_FIELDS)
-            candidate = Candidate(**payload)
-            db.add(candidate)
-            imported += 1
-
+            keys = [h for h in (parsed.doc_hash, text_hash if has_text_hash else None) if h]
+            dup = any(h in seen_hashes for h in keys) or (email is not None and email.lower() in seen_emails)
+            if not dup:
+                seen_hashes.update(keys)
+                if email:
+                    seen_emails.add(email.lower())
+                if run_lsh is not None:
+                    found, dup = _check_near_duplicate(db, text, parsed.path, run_lsh, pending_sigs, near_dup_action)
+                    stats.near_duplicates += found
+            if not dup:
+                first, last = _split_name_from_filename(path)
+                payload = {
+                    "first_name": first or None,
+                    "last_name": last or None,
+                    "email": email,
+                    "resume_file_path": parsed.path,
+                    "original_text": text,
+                    "doc_hash": parsed.doc_hash,
+                    # добавим хэш, если колонка существует
+                    "original_text_hash": text_hash if has_text_hash else None,
+                }
+                batch.append(_filter_allowed(payload, ALLOWED_CANDIDATE_FIELDS))
         else:
             # вакансии: дубль по пути или по полностью одинаковому тексту
-            exists = db.query(Vacancy).filter(
-                (Vacancy.source_file_path == str(path)) | (Vacancy.original_text == text)
-            ).first()
-            if exists:
-                continue
+            text_md5 = _md5_text(text)
+            dup = text_md5 in seen_hashes
+            if not dup:
+                seen_hashes.add(text_md5)
+                payload = {
+                    "title": path.stem[:120],
+                    "description": text[:4000],  # защитимся от мегатекстов
+                    "status": VacancyStatus.open if hasattr(Vacancy, "status") else None,
+                    "source_file_path": parsed.path,
+                    "original_text": text,
+                    "location": "Unknown",
+                }
+                batch.append(_filter_allowed(payload, ALLOWED_VACANCY_FIELDS))
+        seen_paths.add(parsed.path)
+        stats.stages["dedup"] += time.perf_counter() - t0
+        if dup:
+            stats.duplicates += 1
+            continue
+
+        # 3) запись пачками
+        if len(batch) >= batch_size:
+            since_commit += _flush(batch)
+            batch = []
+            if since_commit >= commit_every:
+                _commit_and_embed()
+                since_commit = 0
 
-            payload = {
-                "title": path.stem[:120],
-                "description": text[:4000],  # защитимся от мегатекстов
-                "status": VacancyStatus.open if hasattr(Vacancy, "status") else None,
-                "source_file_path": str(path),
-                "original_text": text,
-                "location": "Unknown",
-            }
+    if batch:
+        since_commit += _flush(batch)
+    if since_commit:
+        _commit_and_embed()
 
-            payload = _filter_allowed(payload, ALLOWED_VACANCY_FIELDS)
-            vacancy = Vacancy(**payload)
-            db.add(vacancy)
-            imported += 1
+    stats.elapsed = time.perf_counter() - started
+    logger.info("ingest %s: %s", kind, stats.as_dict())
+    return stats
 
-    if imported:
-        db.commit()
 
-    return imported
+def ingest_all(db: Session, kind: Literal["resumes", "vacancies"]) -> int:
+    """
+    Импортирует все файлы из inbox/... (или из GDrive в перспективе).
+    Возвращает количество добавленных записей.
+    """
+    return ingest_stream(db, kind).imported
@@ -1,9 +1,21 @@
 from __future__ import annotations
-from typing import Dict, Any, Iterable
+from typing import Dict, Any, Iterable, List, Sequence
+from collections import OrderedDict
+import hashlib
 import re
+import threading
+
+import numpy as np
+from scipy import sparse
+
+TOKEN_RE = re.compile(r"[a-zA-Zа-яА-Я0-9_#+]{2,}")
+
+def _tokens(s: str) -> list[str]:
+    """Токены с повторами (нужны частоты для BM25); та же токенизация, что и у _tokenize."""
+    return TOKEN_RE.findall((s or "").lower())
 
 def _tokenize(s: str) -> set[str]:
-    return set(re.findall(r"[a-zA-Zа-яА-Я0-9_#+]{2,}", (s or "").lower()))
+    return set(_tokens(s))
 
 def match_resume_to_vacancy(parsed: Dict[str, Any], vacancy: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -24,3 +36,127 @@ def match_resume_to_vacancy(parsed: Dict[str, Any], vacancy: Dict[str, Any]) ->
         "resume_tokens": len(a),
         "vacancy_tokens": len(b),
     }
+
+
+# -------------------- пакетный режим --------------------
+# Одна вакансия × N резюме или M вакансий × N резюме: общий словарь,
+# бинарные CSR-матрицы токенов, пересечения — одним разреженным matmul,
+# объединения — из размеров множеств. Множества токенов кэшируются по хэшу текста.
+# Словарь ограничен VOCAB_MAX_TOKENS: переполненный заменяется новым «поколением»,
+# записи кэша старого поколения пересчитываются при следующем обращении.
+
+TOKEN_CACHE_SIZE = 200_000
+VOCAB_MAX_TOKENS = 2_000_000
+BATCH_COLUMNS = 8192  # резюме на один блок matmul (ограничивает пиковую память M×блок)
+
+
+class Vocabulary:
+    """Растущий словарь токен -> id одного поколения (id внутри поколения не переиспользуются)."""
+
+    def __init__(self, generation: int = 0) -> None:
+        self.generation = generation
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def ids(self, tokens: Sequence[str]) -> np.ndarray:
+        out = list(map(self._ids.get, tokens))
+        if None in out:
+            with self._lock:
+                for k, t in enumerate(tokens):
+                    if out[k] is None:
+                        out[k] = self._ids.setdefault(t, len(self._ids))
+        return np.asarray(out, dtype=np.int32)
+
+
+_vocab = Vocabulary()
+_vocab_lock = threading.Lock()
+# sha1 текста -> (поколение словаря, отсортированные id уникальных токенов)
+_token_cache: "OrderedDict[bytes, tuple[int, np.ndarray]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def _current_vocab() -> Vocabulary:
+    """Словарь для нового вызова; переполненный заменяется пустым следующего поколения."""
+    global _vocab
+    with _vocab_lock:
+        if len(_vocab) > VOCAB_MAX_TOKENS:
+            _vocab = Vocabulary(_vocab.generation + 1)
+        return _vocab
+
+
+def _token_ids(text: str, vocab: Vocabulary) -> np.ndarray:
+    """Отсортированные id уникальных токенов документа в словаре vocab (LRU-кэш по sha1 текста)."""
+    key = hashlib.sha1((text or "").encode("utf-8")).digest()
+    with _token_cache_lock:
+        hit = _token_cache.get(key)
+        if hit is not None and hit[0] == vocab.generation:
+            _token_cache.move_to_end(key)
+            return hit[1]
+    ids = np.sort(vocab.ids(list(_tokenize(text))))
+    with _token_cache_lock:
+        _token_cache[key] = (vocab.generation, ids)
+        _token_cache.move_to_end(key)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return ids
+
+
+def _token_matrix(texts: Sequence[str], vocab: Vocabulary) -> sparse.csr_matrix:
+    rows = [_token_ids(t, vocab) for t in texts]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=indptr[1:])
+    indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), max(1, len(vocab))))
+
+
+def jaccard_matrix(vacancy_texts: Sequence[str], resume_texts: Sequence[str]) -> np.ndarray:
+    """
+    Матрица Jaccard M×N (float32): строки — вакансии, столбцы — резюме.
+    Результат совпадает с попарным len(a & b) / max(1, len(a | b)).
+    """
+    m, n = len(vacancy_texts), len(resume_texts)
+    out = np.zeros((m, n), dtype=np.float32)
+    if not m or not n:
+        return out
+
+    # один словарь (поколение) на весь вызов: id вакансий и резюме сопоставимы
+    vocab = _current_vocab()
+    a = _token_matrix(vacancy_texts, vocab)
+    a_sizes = np.diff(a.indptr).astype(np.float32)
+    for s in range(0, n, BATCH_COLUMNS):
+        b = _token_matrix(resume_texts[s:s + BATCH_COLUMNS], vocab)
+        width = max(a.shape[1], b.shape[1])
+        a.resize((m, width))
+        b.resize((b.shape[0], width))
+        inter = (a @ b.T).toarray()
+        union = a_sizes[:, None] + np.diff(b.indptr).astype(np.float32)[None, :] - inter
+        np.divide(inter, np.maximum(union, 1.0), out=out[:, s:s + b.shape[0]])
+    return out
+
+
+def jaccard_one_to_many(vacancy_text: str, resume_texts: Sequence[str]) -> np.ndarray:
+    """Jaccard одной вакансии против N резюме (вектор длины N)."""
+    return jaccard_matrix([vacancy_text], resume_texts)[0]
+
+
+def match_batch(parsed_list: List[Dict[str, Any]], vacancy: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Пакетный аналог match_resume_to_vacancy (без common_tokens — только числа)."""
+    vacancy_text = " ".join([vacancy.get("description","")] + vacancy.get("skills",[]) + vacancy.get("languages",[]))
+    resume_texts = [
+        " ".join([p.get("text","")] + p.get("skills",[]) + p.get("languages",[])) for p in parsed_list
+    ]
+    scores = jaccard_one_to_many(vacancy_text, resume_texts)
+    vocab = _current_vocab()
+    vac_tokens = len(_token_ids(vacancy_text, vocab))
+    return [
+        {
+            "jaccard": float(j),
+            "resume_tokens": len(_token_ids(t, vocab)),
+            "vacancy_tokens": vac_tokens,
+        }
+        for j, t in zip(scores, resume_texts)
+    ]
@@ -0,0 +1,374 @@
+# backend/app/services/job_service.py
+from __future__ import annotations
+"""
+Очередь фоновых задач: таблица jobs + локальный пул потоков.
+
+HTTP-обработчик только создаёт строку Job и сразу возвращает её id; сама работа
+выполняется в отдельном ThreadPoolExecutor (не в пуле FastAPI), так что тяжёлые
+импорты/ранжирование не занимают слоты обработки запросов. Прогресс и отмена —
+через ту же строку: воркер пишет progress_*, API выставляет cancel_requested,
+задача проверяет флаг при каждом отчёте о прогрессе (кооперативная отмена).
+
+Задачу могут выполнять несколько процессов приложения (захват — атомарным UPDATE).
+Воркер держит аренду своих running-задач: раз в JOB_HEARTBEAT_INTERVAL продлевает
+jobs.heartbeat_at. Задача без продления дольше JOB_LEASE_TIMEOUT — воркер умер —
+помечается failed любым живым процессом (при старте и затем на каждом heartbeat);
+чужие живые задачи при рестарте одного из процессов не трогаются.
+"""
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from backend.app.config import settings
+from backend.app.database import SessionLocal
+from backend.app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["JobCancelled", "JobContext", "JobRunner", "register_job", "get_job_runner"]
+
+
+class JobCancelled(Exception):
+    """Поднимается внутри задачи, когда пользователь запросил отмену."""
+
+
+class JobContext:
+    """То, что видит обработчик задачи: своя сессия БД, прогресс и проверка отмены."""
+
+    def __init__(self, runner: "JobRunner", job_id: int, db: Session) -> None:
+        self.runner = runner
+        self.job_id = job_id
+        self.db = db
+        self._last_flush = 0.0
+
+    def check_cancelled(self) -> None:
+        if self.runner.is_cancel_requested(self.job_id):
+            raise JobCancelled(f"job {self.job_id} cancelled")
+
+    def progress(self, done: int, total: Optional[int] = None, *, force: bool = False, **info: Any) -> None:
+        """
+        Отчёт о прогрессе. Пишется в БД не чаще JOB_PROGRESS_INTERVAL секунд
+        (отдельной короткой сессией — транзакцию задачи не трогаем).
+        Заодно проверяет запрос отмены.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_flush < settings.JOB_PROGRESS_INTERVAL:
+            return
+        self._last_flush = now
+        with SessionLocal() as s:
+            job = s.get(Job, self.job_id)
+            if job is None:
+                return
+            job.progress_done = int(done)
+            job.heartbeat_at = datetime.utcnow()
+            if total is not None:
+                job.progress_total = int(total)
+            if info:
+                job.progress_info = {**(job.progress_info or {}), **info}
+            if job.cancel_requested:
+                self.runner._cancel_flags.add(self.job_id)
+            s.commit()
+        self.check_cancelled()
+
+
+JobHandler = Callable[[JobContext, Dict[str, Any]], Any]
+_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def register_job(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Декоратор регистрации обработчика задачи данного типа."""
+    def deco(fn: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = fn
+        return fn
+    return deco
+
+
+class JobRunner:
+    """Локальный пул воркеров поверх таблицы jobs."""
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._cancel_flags: set[int] = set()
+        self._running: set[int] = set()          # задачи, которые выполняет этот процесс
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    # ---------- постановка/отмена ----------
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> int:
+        if kind not in _HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with SessionLocal() as s:
+            job = Job(kind=kind, params=params or {}, status=JobStatus.QUEUED.value,
+                      progress_done=0, cancel_requested=False)
+            s.add(job)
+            s.commit()
+            job_id = job.id
+        self._executor.submit(self._run, job_id)
+        logger.info("job %s (%s) queued", job_id, kind)
+        return job_id
+
+    def cancel(self, job_id: int) -> Optional[Job]:
+        """Queued — отменяется сразу; running — выставляется флаг, задача остановится сама."""
+        with SessionLocal() as s:
+            job = s.get(Job, job_id)
+            if job is None:
+                return None
+            if job.status == JobStatus.QUEUED.value:
+                job.status = JobStatus.CANCELLED.value
+                job.finished_at = datetime.utcnow()
+            elif job.status == JobStatus.RUNNING.value:
+                job.cancel_requested = True
+                self._cancel_flags.add(job_id)
+            s.commit()
+            return job
+
+    def is_cancel_requested(self, job_id: int) -> bool:
+        return job_id in self._cancel_flags
+
+    # ---------- выполнение ----------
+
+    def _finish(self, job_id: int, status: JobStatus, *, result: Any = None, error: Optional[str] = None) -> None:
+        with SessionLocal() as s:
+            job = s.get(Job, job_id)
+            if job is None:
+                return
+            job.status = status.value
+            job.result = result
+            job.error = error
+            job.finished_at = datetime.utcnow()
+            s.commit()
+        self._cancel_flags.discard(job_id)
+
+    def _run(self, job_id: int) -> None:
+        with SessionLocal() as s:
+            # атомарный захват: задачу не запустят дважды, даже если её видят несколько процессов
+            claimed = s.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatus.QUEUED.value)
+                .values(status=JobStatus.RUNNING.value, started_at=datetime.utcnow(), heartbeat_at=datetime.utcnow())
+            ).rowcount
+            s.commit()
+            if not claimed:
+                return  # отменена до старта или уже взята
+            with self._lock:
+                self._running.add(job_id)
+            self._ensure_heartbeat()
+            job = s.get(Job, job_id)
+            kind, params = job.kind, dict(job.params or {})
+
+        handler = _HANDLERS[kind]
+        t0 = time.perf_counter()
+        db = SessionLocal()
+        try:
+            result = handler(JobContext(self, job_id, db), params)
+            db.commit()
+            self._finish(job_id, JobStatus.SUCCEEDED, result=result)
+            logger.info("job %s (%s) done in %.1fs", job_id, kind, time.perf_counter() - t0)
+        except JobCancelled:
+            db.rollback()
+            self._finish(job_id, JobStatus.CANCELLED)
+            logger.info("job %s (%s) cancelled", job_id, kind)
+        except Exception as e:
+            db.rollback()
+            self._finish(job_id, JobStatus.FAILED, error=f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}")
+            logger.exception("job %s (%s) failed", job_id, kind)
+        finally:
+            db.close()
+            with self._lock:
+                self._running.discard(job_id)
+
+    # ---------- аренда (heartbeat) и восстановление ----------
+
+    def _ensure_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat is not None or self._stop.is_set():
+                return
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+            try:
+                with self._lock:
+                    running = list(self._running)
+                with SessionLocal() as s:
+                    if running:
+                        s.execute(
+                            update(Job)
+                            .where(Job.id.in_(running), Job.status == JobStatus.RUNNING.value)
+                            .values(heartbeat_at=datetime.utcnow())
+                        )
+                    expired = self._fail_expired(s)
+                    s.commit()
+                if expired:
+                    logger.warning("jobs: %d running job(s) lost their worker, marked failed", expired)
+            except Exception as e:
+                logger.warning("job heartbeat failed: %s", e)
+
+    def _fail_expired(self, s: Session) -> int:
+        """Running-задачи с истёкшей арендой (кроме своих) -> failed. Коммит — на вызывающей стороне."""
+        deadline = datetime.utcnow() - timedelta(seconds=settings.JOB_LEASE_TIMEOUT)
+        with self._lock:
+            own = list(self._running)
+        stmt = (
+            update(Job)
+            .where(
+                Job.status == JobStatus.RUNNING.value,
+                func.coalesce(Job.heartbeat_at, Job.started_at, Job.created_at) < deadline,
+            )
+            .values(status=JobStatus.FAILED.value, error="interrupted: worker lease expired",
+                    finished_at=datetime.utcnow())
+        )
+        if own:
+            stmt = stmt.where(Job.id.notin_(own))
+        return s.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+    def recover(self) -> None:
+        """
+        При старте процесса: running-задачи с истёкшей арендой помечаются failed (их воркер
+        умер), queued — снова отправляются в пул (возьмёт тот процесс, что захватит первым).
+        Задачи, оставшиеся от прошлого запуска этого же процесса, дойдут до failed, когда
+        их аренда истечёт, — это сделает heartbeat.
+        """
+        with SessionLocal() as s:
+            stale = self._fail_expired(s)
+            queued: List[int] = [
+                j for (j,) in s.query(Job.id).filter(Job.status == JobStatus.QUEUED.value).order_by(Job.id)
+            ]
+            s.commit()
+        self._ensure_heartbeat()
+        for job_id in queued:
+            self._executor.submit(self._run, job_id)
+        if stale or queued:
+            logger.info("jobs recovered: %d interrupted, %d re-queued", stale, len(queued))
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._stop.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner(max_workers=settings.JOB_WORKERS)
+    return _runner
+
+
+# -------------------- обработчики --------------------
+# Импорты внутри функций: сервисы тянут OpenAI/парсеры, а job_service импортируется из API.
+
+@register_job("ingest")
+def _ingest_job(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.app.services.ingest_service import ingest_stream
+
+    stats = ingest_stream(ctx.db, params.get("kind", "resumes"), progress=ctx.progress)
+    return {"imported": stats.imported, "stats": stats.as_dict()}
+
+
+@register_job("rank")
+def _rank_job(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.app.services import matcher_service as ms
+
+    items = ms.rank_candidates_for_vacancy(
+        ctx.db,
+        vacancy_id=int(params["vacancy_id"]),
+        top_k=int(params.get("top_k", 5)),
+        weights=params.get("weights"),
+        progress=ctx.progress,
+        recall_scorer=params.get("recall", ms.DEFAULT_RECALL),
+        recall_top_n=params.get("recall_top_n", ms.DEFAULT_RECALL_TOP_N),
+        llm_scorer=params.get("llm_scorer", ms.DEFAULT_LLM_SCORER),
+        use_cache=bool(params.get("use_cache", True)),
+        incremental=bool(params.get("incremental", True)),
+    )
+    return {"items": items}
+
+
+@register_job("search_reindex")
+def _search_reindex_job(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.app.services.search_service import reindex_all
+
+    indexed = reindex_all(ctx.db, only_missing=not params.get("full"), progress=ctx.progress)
+    return {"indexed": indexed}
+
+
+@register_job("embedding_reindex")
+def _embedding_reindex_job(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.app.services.embedding_service import reindex_embeddings
+
+    written = reindex_embeddings(
+        ctx.db,
+        params.get("kind", "candidates"),
+        only_missing=not params.get("full"),
+        build_ivf=bool(params.get("build_ivf")),
+        progress=ctx.progress,
+    )
+    return {"written": written}
+
+
+@register_job("interview_evaluation")
+def _interview_evaluation_job(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.app.models import Interview, Vacancy
+    from backend.app.models.evaluation import Evaluation, EvaluationDecision
+    from backend.app.models.interview_message import InterviewMessage, MessageRole
+    from backend.app.services.ai_service import AIInterviewer
+
+    db = ctx.db
+    interview = db.query(Interview).filter(Interview.id == int(params["interview_id"])).first()
+    if interview is None:
+        raise ValueError(f"Interview {params['interview_id']} not found")
+    vacancy = db.query(Vacancy).filter(Vacancy.id == interview.vacancy_id).first()
+
+    messages = db.query(InterviewMessage).filter(
+        InterviewMessage.interview_id == interview.id
+    ).order_by(InterviewMessage.timestamp).all()
+    conversation_history = [
+        {"role": "assistant" if m.role == MessageRole.INTERVIEWER else "user", "content": m.content}
+        for m in messages
+    ]
+    ctx.check_cancelled()
+
+    # ValueError при неразборчивом ответе модели — задача падает, оценка не пишется
+    result = AIInterviewer().evaluate_interview(conversation_history, vacancy)
+    decision = {
+        "next_stage": EvaluationDecision.NEXT_STAGE, "reserve": EvaluationDecision.RESERVE,
+        "reject": EvaluationDecision.REJECT,
+    }[result["recommendation"]]
+    answered = sum(1 for m in messages if m.role == MessageRole.CANDIDATE)
+    asked = sum(1 for m in messages if m.role == MessageRole.INTERVIEWER)
+
+    evaluation = db.query(Evaluation).filter(Evaluation.interview_id == interview.id).first()
+    if evaluation is None:
+        evaluation = Evaluation(interview_id=interview.id, candidate_id=interview.candidate_id)
+        db.add(evaluation)
+    evaluation.total_score = result["overall_score"]
+    evaluation.max_possible_score = 100.0
+    evaluation.score_percentage = result["overall_score"]
+    evaluation.scores_breakdown = {
+        "technical": result["technical_score"],
+        "communication": result["communication_score"],
+        "motivation": result["motivation_score"],
+    }
+    evaluation.response_rate = round(100.0 * min(answered, asked) / asked, 1) if asked else 0.0
+    evaluation.strengths = result["strengths"]
+    evaluation.weaknesses = result["weaknesses"]
+    evaluation.decision = decision.value
+    evaluation.gpt_summary = result["hr_comment"]
+    interview.evaluated_at = datetime.utcnow()
+    return {"interview_id": interview.id, "overall_score": result["overall_score"], "decision": decision.value}
@@ -0,0 +1,69 @@
+# backend/app/services/llm_cache.py
+from __future__ import annotations
+"""
+Персистентный кэш ответов LLM для скоринга пар вакансия/резюме.
+
+Ключ — SHA-256 от (тип запроса, модель, версия промпта, temperature, хэш текста
+вакансии, хэш текста резюме, доп. параметры): любая правка промпта или текста
+даёт новый ключ, старые записи доживают до TTL или вытесняются LRU. Хранилище —
+тот же DiskCache (SQLite), что и у кэша парсинга, но отдельный файл.
+
+Кэшируются только успешные ответы: фолбэки (ошибка API, неразобранный JSON)
+повторно запрашиваются при следующем ранжировании.
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from backend.app.config import settings
+from backend.app.services.parse_cache import DiskCache
+
+__all__ = ["text_hash", "llm_cache_key", "get_llm_cache"]
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[2] / "temp" / "llm_cache.sqlite"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()
+
+
+def llm_cache_key(
+    kind: str,
+    *,
+    model: str,
+    prompt_version: str,
+    temperature: float,
+    vacancy_text: str,
+    resume_text: str,
+    **params: Any,
+) -> str:
+    """Ключ записи; params — всё, что ещё влияет на ответ (например, веса критериев)."""
+    raw = json.dumps(
+        [kind, model, prompt_version, round(float(temperature), 3),
+         text_hash(vacancy_text), text_hash(resume_text), params],
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return f"{kind}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+_llm_cache: Optional[DiskCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> DiskCache:
+    """Процессный синглтон кэша ответов LLM (настройки LLM_CACHE_*)."""
+    global _llm_cache
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                ttl_days = settings.LLM_CACHE_TTL_DAYS
+                _llm_cache = DiskCache(
+                    settings.LLM_CACHE_PATH or DEFAULT_CACHE_PATH,
+                    max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+                    enabled=settings.LLM_CACHE_ENABLED,
+                    ttl=ttl_days * 86400 if ttl_days and ttl_days > 0 else None,
+                )
+    return _llm_cache
+
@@ -1,22 +1,181 @@
 # backend/app/services/matcher_service.py
 from __future__ import annotations
-from typing import Dict, List
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from backend.app.models.vacancy import Vacancy
-from backend.app.models.candidate import Candidate
 from backend.app.models.vacancy_match import VacancyMatch
-from backend.app.services.ai_service import score_match
+from backend.app.services.candidate_stream import fetch_texts, stream_candidates
+from backend.app.services.embedding_service import get_provider, get_store
+from backend.app.services.llm_cache import text_hash
+from backend.app.services.recall_service import recall
+from backend.app.services.scoring_engine import ScoreResult, ScoringEngine
+from backend.app.services.topk import TopK
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_WEIGHTS = {"skills": 4, "recent": 3, "communication": 2, "culture": 1}
+DEFAULT_RECALL = "bm25"
+DEFAULT_RECALL_TOP_N = 50
+DEFAULT_LLM_SCORER = "pointwise"
+LLM_SCORERS = ("pointwise", "listwise", "none")
+UPSERT_CHUNK_SIZE = 1000
+LEADERBOARD_SIZE = 10  # сколько лучших отдавать в промежуточном лидерборде (progress_info задачи)
+
+# (candidate_id, {"score", "details", "error"}, done); error — оценка не от модели (сбой/заглушка), не сохраняется
+OnResult = Callable[[int, Dict[str, Any], int], None]
+
+
+def _score_pointwise(
+    vtext: str,
+    items: List[tuple[int, str]],
+    weights: Dict[str, int],
+    on_result: OnResult,
+    use_cache: bool = True,
+) -> None:
+    """score_match по каждой паре, параллельно через ScoringEngine; результаты — по мере готовности."""
+    done = llm_calls = 0
+
+    def _on_result(res: ScoreResult) -> None:
+        nonlocal done, llm_calls
+        done += 1
+        llm_calls += res.attempts
+        on_result(res.key, {"score": res.score, "details": res.details, "error": res.error}, done)
+
+    ScoringEngine(use_cache=use_cache).score_all(vtext, items, on_result=_on_result)
+    logger.info("pointwise scoring: %d items, %d LLM calls", len(items), llm_calls)
+
+
+def _score_listwise(
+    vtext: str,
+    items: List[tuple[int, str]],
+    weights: Dict[str, int],
+    on_result: OnResult,
+    use_cache: bool = True,
+) -> None:
+    """ai_matcher_service.rank_candidates на весь шорт-лист (пачками, см. prompt packing)."""
+    from backend.app.services.ai_matcher_service import rank_candidates
+
+    ranked = rank_candidates(
+        vtext,
+        [{"id": cid, "name": str(cid), "text": text} for cid, text in items],
+        top_k=0,
+        weights=weights,
+        use_cache=use_cache,
+    )
+    for done, it in enumerate(ranked, 1):
+        score = int(it["score"])
+        on_result(it["id"], {
+            "score": score,
+            "details": {"score": score, "reasons": it.get("reasons", "")},
+            "error": "fallback" if it.get("fallback") else None,
+        }, done)
+
+
+def _vector_recall(
+    db: Session, vac: Vacancy, vtext: str, top_n: int
+) -> tuple[List[tuple[int, float]], Dict[int, str]]:
+    """
+    top-N по косинусу в хранилище эмбеддингов кандидатов; из БД читаются
+    только тексты найденных (кандидаты без вектора в отбор не попадают).
+    """
+    qvec = get_store("vacancies").get(vac.id)
+    if qvec is None:
+        qvec = get_provider().embed([vtext])[0]
+    hits = get_store("candidates").search(qvec, top_n)
+    texts = fetch_texts(db, [cid for cid, _ in hits], exclude_duplicates=True)
+    return [(cid, s) for cid, s in hits if cid in texts], texts
+
+
+def upsert_matches(db: Session, rows: Iterable[Dict[str, Any]], chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+    """
+    Bulk-запись оценок: INSERT ... ON CONFLICT (vacancy_id, candidate_id) DO UPDATE
+    пачками по chunk_size (конфликт разрешается по uq_vacancy_candidate).
+    rows — словари с vacancy_id, candidate_id, score, details и отпечатком скоринга.
+    Коммит — на вызывающей стороне.
+    """
+    # дубли ключа в одной команде Postgres не принимает; сортировка — стабильный
+    # порядок блокировок при параллельных ранжированиях
+    by_key = {(r["vacancy_id"], r["candidate_id"]): r for r in rows}
+    batch = [by_key[k] for k in sorted(by_key)]
+    if not batch:
+        return 0
+    t0 = time.perf_counter()
+    now = datetime.utcnow()
+    for i in range(0, len(batch), chunk_size):
+        stmt = pg_insert(VacancyMatch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VacancyMatch.vacancy_id, VacancyMatch.candidate_id],
+            set_={
+                col: stmt.excluded[col]
+                for col in ("score", "details", "resume_hash", "vacancy_hash", "scoring_version", "scored_at")
+            },
+        )
+        db.execute(stmt, [{**r, "scored_at": now} for r in batch[i:i + chunk_size]])
+    dt = time.perf_counter() - t0
+    logger.info("upsert vacancy_matches: %d rows in %.3fs (%.0f rows/s)", len(batch), dt, len(batch) / max(dt, 1e-9))
+    return len(batch)
+
+
+def scoring_version(llm_scorer: str, weights: Dict[str, int]) -> str:
+    """
+    Отпечаток способа скоринга: скорер, версия промпта, модель и веса.
+    Смена любого из них делает сохранённые VacancyMatch устаревшими.
+    """
+    from backend.app.services import ai_matcher_service, ai_service
+
+    if llm_scorer == "pointwise":
+        parts = [ai_service.SCORE_PROMPT_VERSION, ai_service.MODEL]
+    elif llm_scorer == "listwise":
+        parts = [ai_matcher_service.RANK_PROMPT_VERSION, ai_matcher_service.DEFAULT_MODEL, weights]
+    else:
+        parts = []
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return f"{llm_scorer}:{digest}"
+
 
 def rank_candidates_for_vacancy(
     db: Session,
     vacancy_id: int,
     top_k: int = 5,
     weights: Dict[str, int] | None = None,
+    progress: Optional[Callable[..., None]] = None,
+    *,
+    recall_scorer: str = DEFAULT_RECALL,
+    recall_top_n: int | None = DEFAULT_RECALL_TOP_N,
+    llm_scorer: str = DEFAULT_LLM_SCORER,
+    use_cache: bool = True,
+    incremental: bool = True,
 ) -> List[Dict]:
+    """
+    Двухэтапное ранжирование:
+      1) recall — лексический скорер (bm25/jaccard/none) по всем кандидатам или
+         косинус по эмбеддингам (vector, без загрузки кандидатов из БД); остаются top-N;
+      2) LLM — только по шорт-листу: pointwise (score_match на пару, параллельно),
+         listwise (ai_matcher_service.rank_candidates одним запросом) или none
+         (итоговый score = recall-score, нормированный к 0..100).
+         Ответы LLM кэшируются (llm_cache); use_cache=False — перескорить в обход кэша.
+
+    incremental: LLM-скорятся только кандидаты шорт-листа без актуальной записи
+    VacancyMatch (нет записи, изменился текст резюме/вакансии или scoring_version);
+    итоговый top-k — слияние новых оценок с актуальными сохранёнными по всему
+    загруженному пулу. Для llm_scorer="none" оценки относительные и всегда
+    пересчитываются.
+    Неудачные оценки (ошибка LLM, эвристика вместо ответа, кандидат не вернулся
+    из listwise) попадают в выдачу, но не сохраняются — следующий запуск их перескорит.
+
+    progress(done, total) — колбэк прогресса (фоновые задачи); исключение из него
+    прерывает ранжирование до коммита.
+    """
     weights = weights or DEFAULT_WEIGHTS
+    if llm_scorer not in LLM_SCORERS:
+        raise ValueError(f"Unknown llm scorer: {llm_scorer!r} (expected one of {LLM_SCORERS})")
 
     vac: Vacancy | None = db.query(Vacancy).filter(Vacancy.id == vacancy_id).first()
     if not vac:
@@ -26,34 +185,138 @@ def rank_candidates_for_vacancy(
     if not vtext.strip():
         return []
 
-    candidates = db.query(Candidate).all()
-    results = []
-    for c in candidates:
-        rtext = c.original_text or ""
-        if not rtext.strip():
-            continue
-        sj = score_match(vtext, rtext)  # {score, skills_coverage, ...}
-        score = int(sj.get("score", 0))
-
-        # апсертим в vacancy_matches (если нужна история — можно не перезаписывать)
-        vm = (
-            db.query(VacancyMatch)
-              .filter(VacancyMatch.vacancy_id == vac.id,
-                      VacancyMatch.candidate_id == c.id)
-              .first()
-        )
-        if not vm:
-            vm = VacancyMatch(vacancy_id=vac.id, candidate_id=c.id, score=score)
-            db.add(vm)
-        else:
-            vm.score = score
+    version = scoring_version(llm_scorer, weights)
+    vhash = text_hash(vtext)
+    incremental = incremental and llm_scorer != "none"
+    existing: Dict[int, VacancyMatch] = {
+        vm.candidate_id: vm
+        for vm in db.query(VacancyMatch).filter(VacancyMatch.vacancy_id == vac.id)
+    }
+    # хэши текущих текстов: для шорт-листа и для кандидатов с сохранённой оценкой
+    rhash: Dict[int, str] = {}
+
+    t0 = time.perf_counter()
+    if recall_scorer == "vector":
+        shortlist, texts = _vector_recall(db, vac, vtext, recall_top_n or DEFAULT_RECALL_TOP_N)
+        n_pool = len(get_store("candidates"))
+    else:
+        n_pool = 0
+
+        def _docs():
+            # поток из БД: тексты не накапливаются, хэш считается попутно
+            nonlocal n_pool
+            for cid, text in stream_candidates(db):
+                if not text.strip():
+                    continue
+                n_pool += 1
+                if cid in existing:
+                    rhash[cid] = text_hash(text)
+                yield cid, text
+
+        shortlist = recall(vtext, _docs(), scorer=recall_scorer, top_n=recall_top_n)
+        texts = fetch_texts(db, [cid for cid, _ in shortlist])
+        shortlist = [(cid, s) for cid, s in shortlist if cid in texts]
+    t_recall = time.perf_counter() - t0
+
+    def _is_fresh(cid: int) -> bool:
+        vm = existing.get(cid)
+        if vm is None or vm.score is None:
+            return False
+        if cid not in rhash and cid in texts:
+            rhash[cid] = text_hash(texts[cid])
+        return (cid in rhash and vm.vacancy_hash == vhash
+                and vm.scoring_version == version and vm.resume_hash == rhash[cid])
 
-        results.append({
-            "candidate_id": c.id,
+    recall_scores = dict(shortlist)
+    items = [
+        (cid, texts[cid]) for cid, _ in shortlist
+        if not (incremental and _is_fresh(cid))
+    ]
+    total = len(items)
+
+    # top-k копится по мере поступления оценок; при равенстве выше тот, кто выше по recall
+    recall_pos = {cid: i for i, (cid, _) in enumerate(shortlist)}
+    board: TopK[Dict[str, Any]] = TopK(max(top_k, LEADERBOARD_SIZE) if top_k else None)
+
+    def _push(entry: Dict[str, Any]) -> None:
+        board.push(entry, entry["score"], recall_pos.get(entry["candidate_id"], len(recall_pos)))
+
+    def _leaderboard() -> List[Dict[str, Any]]:
+        return [{"candidate_id": e["candidate_id"], "score": e["score"]} for e in board.snapshot(LEADERBOARD_SIZE)]
+
+    reused = 0
+    if incremental:
+        # актуальные сохранённые оценки (шорт-лист + остальной загруженный пул) —
+        # сразу в рейтинг, до LLM-скоринга
+        scored_ids = {cid for cid, _ in items}
+        for cid in existing:
+            if cid in scored_ids or not _is_fresh(cid):
+                continue
+            reused += 1
+            rs = recall_scores.get(cid)
+            _push({
+                "candidate_id": cid,
+                "score": int(existing[cid].score),
+                "recall_score": round(rs, 4) if rs is not None else None,
+                "details": existing[cid].details or {},
+                "cached": True,
+            })
+
+    rows: List[Dict[str, Any]] = []
+    seen: set[int] = set()
+
+    failed = 0
+
+    def _on_result(cid: int, res: Dict[str, Any], done: int) -> None:
+        nonlocal failed
+        seen.add(cid)
+        score = int(res["score"])
+        if res.get("error"):
+            # оценка не от модели (сбой LLM, эвристика, кандидат пропущен) — в рейтинг текущего
+            # запуска, но не в VacancyMatch: иначе она сочтётся актуальной и не будет перескорена
+            failed += 1
+        else:
+            rows.append({
+                "vacancy_id": vac.id,
+                "candidate_id": cid,
+                "score": score,
+                "details": res["details"] or None,
+                "resume_hash": rhash.get(cid) or text_hash(texts[cid]),
+                "vacancy_hash": vhash,
+                "scoring_version": version,
+            })
+        _push({
+            "candidate_id": cid,
             "score": score,
-            "details": sj,
+            "recall_score": round(recall_scores[cid], 4),
+            "details": res["details"],
         })
+        if progress is not None:
+            progress(done, total, leaderboard=_leaderboard())
+
+    if not items:
+        pass
+    elif llm_scorer == "pointwise":
+        _score_pointwise(vtext, items, weights, _on_result, use_cache)
+    elif llm_scorer == "listwise":
+        _score_listwise(vtext, items, weights, _on_result, use_cache)
+    else:
+        top = max((s for _, s in shortlist), default=0.0) or 1.0
+        for done, (cid, s) in enumerate(shortlist, 1):
+            _on_result(cid, {"score": max(0, int(round(100 * s / top))), "details": {}}, done)
+    # кого скорер не вернул (listwise может пропустить кандидата) — score 0 без сохранения
+    for cid, _ in items:
+        if cid not in seen:
+            _on_result(cid, {"score": 0, "details": {}, "error": "missing"}, len(seen) + 1)
+    t_llm = time.perf_counter() - t0 - t_recall
 
+    if progress is not None:
+        progress(total, total, force=True, leaderboard=_leaderboard())
+    upsert_matches(db, rows)
     db.commit()
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:top_k]
+    logger.info(
+        "rank vacancy=%s: %d candidates -> %d shortlisted (%s, %.3fs) -> %s scoring of %d new/stale %.2fs, "
+        "%d reused, %d failed (not stored)",
+        vacancy_id, n_pool, len(shortlist), recall_scorer, t_recall, llm_scorer, total, t_llm, reused, failed,
+    )
+    return board.items()[:top_k] if top_k else board.items()
@@ -0,0 +1,272 @@
+# backend/app/services/metrics.py
+from __future__ import annotations
+"""
+Минимальный реестр метрик процесса (без внешних зависимостей).
+
+  - Counter   — монотонный счётчик;
+  - Gauge     — текущее значение (или функция, вычисляемая при снятии);
+  - Histogram — распределение по фиксированным бакетам + сумма/число;
+    квантили оцениваются линейной интерполяцией внутри бакета.
+
+Метрики с метками: metric.labels(model="gpt-4o-mini").observe(...).
+Снимок — snapshot() (JSON) или render_prometheus() (text exposition format,
+отдаётся на GET /metrics).
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+__all__ = ["Counter", "Gauge", "Histogram", "MetricsRegistry", "get_registry", "LATENCY_BUCKETS"]
+
+# секунды: от 5 мс до 2 мин
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def _collapse(values: Dict[str, Any]) -> Any:
+    # метрика без меток — просто значение, а не {"": value}
+    return values[""] if list(values) == [""] else values
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str = "") -> None:
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._children: Dict[LabelKey, Any] = {}
+
+    def labels(self, **labels: Any):
+        key = _label_key(labels)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _new_child(self):  # pragma: no cover - переопределяется
+        raise NotImplementedError
+
+    def _default(self):
+        return self.labels()
+
+    def _items(self) -> List[Tuple[LabelKey, Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+class _CounterChild:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value += n
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, n: float = 1.0) -> None:
+        self._default().inc(n)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return _collapse({_fmt_labels(k) or "": c.value for k, c in self._items()})
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(k)} {c.value:g}" for k, c in self._items()]
+
+
+class _GaugeChild:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self.fn = fn
+
+    def get(self) -> float:
+        if self.fn is not None:
+            try:
+                return float(self.fn())
+            except Exception:
+                return math.nan
+        return self.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._default().set_function(fn)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return _collapse({_fmt_labels(k) or "": c.get() for k, c in self._items()})
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(k)} {c.get():g}" for k, c in self._items()]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последний — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return None
+        rank = q * total
+        acc = 0
+        for i, n in enumerate(counts):
+            if acc + n >= rank and n:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - acc) / n
+            acc += n
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self.count, self.sum
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "avg": round(total / count, 6) if count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return _collapse({_fmt_labels(k) or "": c.summary() for k, c in self._items()})
+
+    def render(self) -> List[str]:
+        out: List[str] = []
+        for key, c in self._items():
+            with c._lock:
+                counts, total, count = list(c.counts), c.sum, c.count
+            acc = 0
+            for le, n in zip(list(self.buckets) + [math.inf], counts):
+                acc += n
+                le_s = "+Inf" if le == math.inf else f"{le:g}"
+                out.append(f"{self.name}_bucket{_fmt_labels(key, ('le', le_s))} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(key)} {total:g}")
+            out.append(f"{self.name}_count{_fmt_labels(key)} {count}")
+        return out
+
+
+class MetricsRegistry:
+    """Метрики по имени; повторная регистрация возвращает уже созданную."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get(self, cls, name: str, help: str, **kw: Any):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, **kw)
+            elif not isinstance(m, cls):
+                raise ValueError(f"metric {name!r} already registered as {m.kind}")
+            return m
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.snapshot() for m in metrics}
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for m in metrics:
+            if m.help:
+                lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
@@ -0,0 +1,259 @@
+# backend/app/services/openai_clients.py
+"""
+Общий на процесс реестр клиентов OpenAI.
+
+Раньше клиент создавался на каждый вызов ранжирования (и с ним — новый пул
+соединений, TLS-рукопожатие, а иногда и расшифровка хранилища ключей), а
+ai_service строил клиента при импорте, с ключом, зафиксированным на старте.
+
+Теперь:
+  - клиенты создаются лениво, по имени потребителя ("interviewer", "scoring",
+    "ranking", "embeddings") — имя идёт меткой в метрики;
+  - все sync-клиенты делят один httpx.Client, async-клиенты одного event loop —
+    один httpx.AsyncClient: keep-alive, HTTP/2 (если установлен h2), лимиты из
+    OPENAI_MAX_CONNECTIONS/OPENAI_MAX_KEEPALIVE;
+  - ключ резолвится один раз (env → шифро-хранилище APIKeyManager) и меняется
+    на лету через set_api_key (/config/set-api-key): клиенты-обёртки пересоздаются
+    при следующем обращении, пул соединений остаётся прежним (ключ — это только
+    заголовок запроса);
+  - event hooks httpx пишут латентность (до заголовков ответа, для стримов это
+    время до первого байта) в гистограмму openai_request_seconds{client}, число
+    ответов — в openai_requests_total{client, status}.
+
+Async-пул привязан к event loop: для каждого loop (uvicorn, asyncio.run в фоновой
+задаче) создаётся свой; словарь слабый — пул уходит вместе с закрытым loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI, OpenAIError
+
+from backend.app.config import settings
+from backend.app.services.api_key_manager import APIKeyManager
+from backend.app.services.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["OpenAIClientRegistry", "get_client_registry", "get_openai_client", "get_async_openai_client"]
+
+_latency = get_registry().histogram("openai_request_seconds", "Латентность HTTP-запросов к OpenAI (до заголовков ответа)")
+_requests = get_registry().counter("openai_requests_total", "HTTP-запросы к OpenAI")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _get_passphrase(explicit: Optional[str] = None) -> Optional[str]:
+    """
+    Источник пароля для расшифровки:
+      1) аргумент функции,
+      2) settings.OPENAI_KEY_PASSPHRASE,
+      3) переменная окружения OPENAI_KEY_PASSPHRASE.
+    """
+    return explicit or settings.OPENAI_KEY_PASSPHRASE or os.getenv("OPENAI_KEY_PASSPHRASE")
+
+
+def _resolve_api_key(passphrase: Optional[str] = None) -> Optional[str]:
+    """
+    Порядок поиска ключа:
+      - OPENAI_API_KEY в окружении,
+      - шифро-хранилище (api_keys.enc) через APIKeyManager и passphrase,
+      - best-effort без пароля (если файл сохранён незашифрованно).
+    """
+    key = os.getenv("OPENAI_API_KEY")
+    if key:
+        return key
+    pp = _get_passphrase(passphrase)
+    try:
+        km = APIKeyManager()
+        if pp:
+            key = km.get("openai", passphrase=pp)
+            if key:
+                return key
+        return km.get("openai")
+    except Exception as e:
+        logger.debug("api key store unavailable: %s", e)
+        return None
+
+
+class OpenAIClientRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._api_key: Optional[str] = None  # None — резолвить при следующем обращении
+        self._generation = 0
+        self._http: Optional[httpx.Client] = None
+        self._async_http: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._sync_clients: Dict[str, Tuple[int, OpenAI]] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Tuple[int, AsyncOpenAI]]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    # --- ключ ---
+
+    def api_key(self, passphrase: Optional[str] = None) -> str:
+        with self._lock:
+            if not self._api_key:
+                self._api_key = _resolve_api_key(passphrase)
+            key = self._api_key
+        if not key:
+            raise OpenAIError(
+                "OpenAI API key not found. Set OPENAI_API_KEY env var, call /config/set-api-key or "
+                "provide passphrase to unlock encrypted store via APIKeyManager."
+            )
+        return key
+
+    def set_api_key(self, key: Optional[str]) -> None:
+        """Ротация ключа без рестарта; None — сбросить (следующее обращение резолвит заново)."""
+        with self._lock:
+            self._api_key = key or None
+            self._generation += 1
+        logger.info("openai api key %s", "rotated" if key else "cleared")
+
+    # --- HTTP-пулы ---
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        )
+
+    def _http2(self) -> bool:
+        return bool(settings.OPENAI_HTTP2) and _http2_available()
+
+    def _sync_http(self) -> httpx.Client:
+        # вызывается под self._lock
+        if self._http is None:
+            self._http = httpx.Client(
+                http2=self._http2(), limits=self._limits(), timeout=settings.OPENAI_TIMEOUT,
+                event_hooks={"request": [_mark_start], "response": [_observe]},
+            )
+        return self._http
+
+    def _loop_http(self, loop: asyncio.AbstractEventLoop) -> httpx.AsyncClient:
+        client = self._async_http.get(loop)
+        if client is None:
+            client = self._async_http[loop] = httpx.AsyncClient(
+                http2=self._http2(), limits=self._limits(), timeout=settings.OPENAI_TIMEOUT,
+                event_hooks={"request": [_amark_start], "response": [_aobserve]},
+            )
+        return client
+
+    # --- клиенты ---
+
+    def get(self, name: str = "default", *, passphrase: Optional[str] = None) -> OpenAI:
+        key = self.api_key(passphrase)
+        with self._lock:
+            entry = self._sync_clients.get(name)
+            if entry is None or entry[0] != self._generation:
+                client = OpenAI(
+                    api_key=key, base_url=_base_url(), timeout=settings.OPENAI_TIMEOUT,
+                    http_client=self._sync_http(), default_headers={"X-Client-Name": name},
+                )
+                entry = self._sync_clients[name] = (self._generation, client)
+            return entry[1]
+
+    def get_async(self, name: str = "default", *, passphrase: Optional[str] = None) -> AsyncOpenAI:
+        """Клиент для текущего event loop (вызывать из корутины)."""
+        loop = asyncio.get_running_loop()
+        key = self.api_key(passphrase)
+        with self._lock:
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                clients = self._async_clients[loop] = {}
+            entry = clients.get(name)
+            if entry is None or entry[0] != self._generation:
+                client = AsyncOpenAI(
+                    api_key=key, base_url=_base_url(), timeout=settings.OPENAI_TIMEOUT,
+                    http_client=self._loop_http(loop), default_headers={"X-Client-Name": name},
+                )
+                entry = clients[name] = (self._generation, client)
+            return entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "key_configured": bool(self._api_key),
+                "generation": self._generation,
+                "http2": self._http2(),
+                "sync_clients": sorted(self._sync_clients),
+                "event_loops": len(self._async_http),
+            }
+
+    async def aclose_loop(self) -> None:
+        """Закрыть async-пул текущего event loop (в конце asyncio.run во фоновых задачах)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._async_clients.pop(loop, None)
+            client = self._async_http.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+            self._sync_clients.clear()
+
+
+def _base_url() -> Optional[str]:
+    return settings.OPENAI_BASE_URL or os.getenv("OPENAI_BASE_URL") or None
+
+
+# --- event hooks: латентность по клиентам ---
+
+def _mark_start(request: httpx.Request) -> None:
+    request.extensions["t0"] = time.perf_counter()
+
+
+def _observe(response: httpx.Response) -> None:
+    request = response.request
+    t0 = request.extensions.get("t0")
+    name = request.headers.get("X-Client-Name", "default")
+    _requests.labels(client=name, status=response.status_code).inc()
+    if t0 is not None:
+        _latency.labels(client=name).observe(time.perf_counter() - t0)
+
+
+async def _amark_start(request: httpx.Request) -> None:
+    _mark_start(request)
+
+
+async def _aobserve(response: httpx.Response) -> None:
+    _observe(response)
+
+
+_registry: Optional[OpenAIClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> OpenAIClientRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = OpenAIClientRegistry()
+        return _registry
+
+
+def get_openai_client(name: str = "default", *, passphrase: Optional[str] = None) -> OpenAI:
+    return get_client_registry().get(name, passphrase=passphrase)
+
+
+def get_async_openai_client(name: str = "default", *, passphrase: Optional[str] = None) -> AsyncOpenAI:
+    return get_client_registry().get_async(name, passphrase=passphrase)
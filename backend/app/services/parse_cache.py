@@ -0,0 +1,225 @@
+# backend/app/services/parse_cache.py
+from __future__ import annotations
+"""
+Персистентный кэш результатов парсинга документов.
+
+Ключ — SHA-256 исходных байт + пространство имён парсера + его версия
+(+ параметры вроде max_pages). Значение — JSON (текст и/или распарсенная
+структура), хранится сжатым в SQLite-файле. Размер ограничен: при переполнении
+вытесняются давно не читанные записи (LRU); опционально — срок жизни (TTL).
+Время чтения (accessed) обновляется не на каждом попадании, а не чаще раза в
+TOUCH_INTERVAL секунд на запись: иначе каждое чтение — запись и коммит WAL, а
+для LRU-вытеснения такая точность не нужна.
+Файл общий для процессов (ingest-пул), поэтому подключение открывается
+отдельно на поток/процесс.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from backend.app.config import settings
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["DiskCache", "sha256_bytes", "make_key", "get_parse_cache"]
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[2] / "temp" / "parse_cache.sqlite"
+TOUCH_INTERVAL = 60.0  # с, минимальный интервал между обновлениями accessed одной записи
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key      TEXT PRIMARY KEY,
+    value    BLOB NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_accessed ON entries(accessed);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta(name, value) VALUES ('total_bytes', 0);
+CREATE TRIGGER IF NOT EXISTS trg_entries_ins AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE name = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_entries_del AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE name = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_entries_upd AFTER UPDATE OF size ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size + NEW.size WHERE name = 'total_bytes';
+END;
+"""
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(namespace: str, version: str, content_hash: str, **params: Any) -> str:
+    """Стабильный ключ: namespace:version:hash[:k=v,...]."""
+    key = f"{namespace}:{version}:{content_hash}"
+    if params:
+        key += ":" + ",".join(f"{k}={params[k]}" for k in sorted(params))
+    return key
+
+
+class DiskCache:
+    """Размер-ограниченный LRU-кэш key -> JSON поверх SQLite."""
+
+    def __init__(
+        self, path: Path, max_bytes: int, *, enabled: bool = True, ttl: Optional[float] = None,
+        touch_interval: float = TOUCH_INTERVAL,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.enabled = enabled
+        self.ttl = ttl  # секунды жизни записи с момента записи; None — бессрочно
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "puts": 0, "evictions": 0, "errors": 0}
+
+    # ---------- служебное ----------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT value FROM meta WHERE name='total_bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # освобождаем с запасом (до 90% лимита), чтобы не вытеснять на каждой записи
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM entries WHERE key=?", (key,))
+            total -= size
+            evicted += 1
+        self._count("evictions", evicted)
+
+    # ---------- публичное API ----------
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, created, accessed FROM entries WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            now = time.time()
+            if self.ttl is not None and row[1] + self.ttl < now:
+                conn.execute("DELETE FROM entries WHERE key=?", (key,))
+                self._count("expired")
+                self._count("misses")
+                return None
+            if now - row[2] >= self.touch_interval:
+                conn.execute("UPDATE entries SET accessed=? WHERE key=?", (now, key))
+            self._count("hits")
+            return json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            self._count("errors")
+            logger.warning("cache get failed (%s): %s", self.path.name, e)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO entries(key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value=excluded.value, size=excluded.size, "
+                    "created=excluded.created, accessed=excluded.accessed",
+                    (key, blob, len(blob), now, now),
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._count("puts")
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.warning("cache set failed (%s): %s", self.path.name, e)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def cached(self, namespace: str, version: str, data: bytes, compute: Callable[[], Any], **params: Any) -> Any:
+        """Ключ по SHA-256 сырых байт документа; compute() вызывается только при промахе."""
+        if not self.enabled:
+            return compute()
+        return self.get_or_compute(make_key(namespace, version, sha256_bytes(data), **params), compute)
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        out.update({"enabled": self.enabled, "path": str(self.path), "max_bytes": self.max_bytes, "ttl": self.ttl})
+        if self.enabled:
+            try:
+                conn = self._conn()
+                out["entries"] = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                out["total_bytes"] = conn.execute(
+                    "SELECT value FROM meta WHERE name='total_bytes'"
+                ).fetchone()[0]
+            except sqlite3.Error as e:
+                out["error"] = str(e)
+        return out
+
+
+_parse_cache: Optional[DiskCache] = None
+_parse_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> DiskCache:
+    """Процессный синглтон кэша парсинга (настройки PARSE_CACHE_*)."""
+    global _parse_cache
+    if _parse_cache is None:
+        with _parse_cache_lock:
+            if _parse_cache is None:
+                _parse_cache = DiskCache(
+                    settings.PARSE_CACHE_PATH or DEFAULT_CACHE_PATH,
+                    max_bytes=settings.PARSE_CACHE_MAX_MB * 1024 * 1024,
+                    enabled=settings.PARSE_CACHE_ENABLED,
+                )
+    return _parse_cache
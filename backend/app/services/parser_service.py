@@ -1,56 +1,23 @@
 
 from __future__ import annotations
 
-import io
-import re
 from pathlib import Path
-from typing import Union, IO
+from typing import Optional, Union, IO
 
-from pdfminer.high_level import extract_text as pdf_extract_text
-from docx import Document
+from backend.app.services.document_extractor import extract_document
+from backend.app.services.parse_cache import get_parse_cache
+from backend.app.services.skill_taxonomy import get_taxonomy
+from backend.app.services.text_patterns import EMAIL_RE, PHONE_RE, ExtractorTimings, first_match
 
+# Меняется при любом изменении логики извлечения/разбора — старые записи кэша перестают совпадать
+PARSER_VERSION = "6"
 
-def _normalize_text(text: str) -> str:
-    # Приводим переносы и пробелы к норме
-    s = text.replace("\r\n", "\n").replace("\r", "\n")
-    s = s.replace("\u00A0", " ").replace("\u202F", " ")
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r"\n[ \t]+", "\n", s)
-    s = re.sub(r"\n{3,}", "\n\n", s)
-    s = s.strip()
-    return s
 
-
-def _is_pdf_bytes(b: bytes) -> bool:
-    return b[:4] == b"%PDF"
-
-
-def _docx_text_from_bytes(b: bytes) -> str:
-    doc = Document(io.BytesIO(b))
-    parts = []
-    for p in doc.paragraphs:
-        if p.text:
-            parts.append(p.text)
-    for tbl in doc.tables:
-        for row in tbl.rows:
-            parts.append(" ".join(c.text for c in row.cells if c.text))
-    return "\n".join(parts)
-
-
-def extract_text(src: Union[str, Path, bytes, IO[bytes]], max_pages: int | None = None) -> str:
-    """Достаёт текст из PDF/DOCX + нормализация.
-    src: путь/bytes/IO[bytes]
-    """
-    data: bytes | None = None
+def _load_src(src: Union[str, Path, bytes, IO[bytes]]) -> tuple[bytes, Optional[str]]:
+    """Сырые байты документа + подсказка формата (расширение пути; формат всё равно определяется по сигнатуре)."""
     if isinstance(src, (str, Path)):
         path = Path(src)
-        if path.suffix.lower() == ".docx":
-            text = _docx_text_from_bytes(path.read_bytes())
-            return _normalize_text(text)
-        else:
-            # считаем это PDF/прочее
-            text = pdf_extract_text(str(path), maxpages=max_pages)
-            return _normalize_text(text)
+        return path.read_bytes(), path.suffix.lower() or None
 
     # bytes/IO
     if hasattr(src, "read"):
@@ -59,43 +26,53 @@ def extract_text(src: Union[str, Path, bytes, IO[bytes]], max_pages: int | None
         data = src
     else:
         raise TypeError("Unsupported src type")
+    return data, None
 
-    if _is_pdf_bytes(data):
-        text = pdf_extract_text(io.BytesIO(data), maxpages=max_pages)
-        return _normalize_text(text)
-    else:
-        # предполагаем DOCX
-        text = _docx_text_from_bytes(data)
-        return _normalize_text(text)
 
+def _extract_cached(data: bytes, hint: Optional[str], max_pages: int | None) -> str:
+    # формат — по сигнатуре (PDF/DOCX/DOC/RTF/TXT), PDF — в изолированном процессе, max_pages=None — PDF_MAX_PAGES
+    cached = get_parse_cache().cached(
+        "parser_service.text", PARSER_VERSION, data,
+        lambda: {"text": extract_document(data, hint=hint, max_pages=max_pages).text},
+        hint=hint, max_pages=max_pages,
+    )
+    return cached["text"]
 
-def parse_resume(src: Union[str, Path, bytes, IO[bytes]]) -> dict:
-    """Мини-парсер резюме -> словарь для downstream-задач."""
-    text = extract_text(src)
 
+def extract_text(src: Union[str, Path, bytes, IO[bytes]], max_pages: int | None = None) -> str:
+    """Достаёт текст из PDF/DOCX/DOC/RTF/TXT + нормализация.
+    src: путь/bytes/IO[bytes]
+    Результат кэшируется по SHA-256 содержимого (см. parse_cache).
+    """
+    data, hint = _load_src(src)
+    return _extract_cached(data, hint, max_pages)
+
+
+def parse_resume(src: Union[str, Path, bytes, IO[bytes]], max_pages: int | None = None) -> dict:
+    """Мини-парсер резюме -> словарь для downstream-задач (кэшируется по содержимому)."""
+    data, hint = _load_src(src)
+    return get_parse_cache().cached(
+        "parser_service.resume", PARSER_VERSION, data,
+        lambda: _parse_resume_text(_extract_cached(data, hint, max_pages)),
+        hint=hint, max_pages=max_pages,
+    )
+
+
+def _parse_resume_text(text: str) -> dict:
+    t = ExtractorTimings("parser_service")
     # contacts
-    emails = re.findall(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
-    phones = re.findall(r"(?:\+?\d[\s\-()]{0,3}){7,}\d", text)
-
-    # грубая детекция навыков по словам
-    skill_words = [
-        "python", "sql", "pandas", "excel", "postgres", "postgresql", "oracle",
-        "linux", "docker", "kubernetes", "spark", "hadoop", "airflow",
-        "java", "c#", "javascript", "typescript", "react",
-    ]
-    skills = sorted({w for w in skill_words if re.search(rf"\b{re.escape(w)}\b", text, re.I)})
-
-    # языки
-    lang_dict = {
-        "english": r"\b(английский|english|англ)\b",
-        "german": r"\b(немецкий|german)\b",
-        "french": r"\b(французский|french)\b",
-    }
-    languages = [k for k, pat in lang_dict.items() if re.search(pat, text, re.I)]
+    email = t.run("email", first_match, EMAIL_RE, text)
+    phone = t.run("phone", first_match, PHONE_RE, text)
+
+    # навыки и языки — канонические id таксономии, один проход по тексту
+    found = t.run("taxonomy", get_taxonomy().extract, text)
+    skills = sorted(found["skills"])
+    languages = found["languages"]
+    t.report(text)
 
     return {
         "text": text,
-        "contacts": {k: v for k, v in {"email": (emails[0] if emails else None), "phone": (phones[0] if phones else None)}.items() if v},
+        "contacts": {k: v for k, v in {"email": email, "phone": phone}.items() if v},
         "skills": skills,
         "languages": languages,
     }
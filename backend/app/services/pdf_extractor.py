@@ -0,0 +1,337 @@
+# backend/app/services/pdf_extractor.py
+from __future__ import annotations
+"""
+Извлечение текста из PDF в изолированных процессах.
+
+Раньше pdfminer вызывался прямо в воркере API без таймаута: один битый PDF на
+300 страниц держал воркер минутами (и мог съесть всю память процесса). Теперь:
+
+  - разбор идёт в пуле дочерних процессов (PDF_WORKERS, запускаются лениво,
+    spawn — безопасно в многопоточном сервере); у каждого документа свой
+    wall-clock лимит PDF_EXTRACT_TIMEOUT — по его истечении процесс убивается
+    и на его место поднимается новый (ожидание свободного воркера входит в этот
+    же лимит — при занятом пуле вызывающий получает PdfExtractionTimeout); RLIMIT_AS = PDF_WORKER_MEMORY_MB (POSIX)
+    превращает раздувание памяти в MemoryError внутри воркера, а не OOM сервера.
+    Воркер перезапускается каждые PDF_WORKER_MAX_TASKS документов;
+  - страниц по умолчанию не больше PDF_MAX_PAGES (если вызывающий не задал своё);
+  - быстрый путь — текстовый слой через pypdf; pdfminer (медленнее в разы, но
+    аккуратнее с раскладкой и кодировками) — только если pypdf упал или отдал
+    меньше PDF_MIN_CHARS_PER_PAGE непробельных символов на страницу;
+  - метрики: pdf_extract_seconds{backend}, pdf_extract_pages_total{backend},
+    pdf_extract_pages_per_second{backend}, pdf_extract_fallbacks_total{reason},
+    pdf_extract_failures_total{backend, reason} (reason: error, timeout, memory, crash).
+
+PDF_ISOLATED=False — разбор в текущем процессе (отладка, окружения без
+multiprocessing), с тем же быстрым путём и лимитом страниц, но без таймаута.
+"""
+import io
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.app.config import settings
+from backend.app.services.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "PdfExtractionError", "PdfExtractionTimeout", "PdfWorkerPool",
+    "close_pdf_pool", "extract_pdf_text", "get_pdf_pool", "pdfminer_text", "pypdf_text",
+]
+
+_seconds = get_registry().histogram("pdf_extract_seconds", "Время извлечения текста из PDF (документ целиком)")
+_pages = get_registry().counter("pdf_extract_pages_total", "Страниц PDF обработано")
+_pages_per_sec = get_registry().histogram(
+    "pdf_extract_pages_per_second", "Скорость извлечения текста из PDF, страниц/с",
+    buckets=(0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+_fallbacks = get_registry().counter("pdf_extract_fallbacks_total", "Переходы с pypdf на pdfminer")
+_failures = get_registry().counter("pdf_extract_failures_total", "Ошибки извлечения текста из PDF")
+
+
+class PdfExtractionError(RuntimeError):
+    """Текст из PDF извлечь не удалось (ошибка разбора, нехватка памяти, падение воркера)."""
+
+
+class PdfExtractionTimeout(PdfExtractionError):
+    """Документ не уложился в PDF_EXTRACT_TIMEOUT."""
+
+
+# --- разбор (выполняется в воркере) ---
+
+def _yield_per_page(text: str, pages: int) -> float:
+    return sum(1 for ch in text if not ch.isspace()) / max(1, pages)
+
+
+def pypdf_text(data: bytes, max_pages: int) -> Tuple[str, int]:
+    """(текст, страниц) через pypdf в текущем процессе; max_pages=0 — все."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    pages = reader.pages if not max_pages else reader.pages[:max_pages]
+    parts = [page.extract_text() or "" for page in pages]
+    return "\n".join(parts), len(parts)
+
+
+def pdfminer_text(data: bytes, max_pages: int) -> Tuple[str, int]:
+    """(текст, страниц) через pdfminer в текущем процессе; max_pages=0 — все."""
+    from pdfminer.high_level import extract_text
+
+    text = extract_text(io.BytesIO(data), maxpages=max_pages or 0)
+    # pdfminer отделяет страницы символом \f
+    return text, max(1, text.count("\f"))
+
+
+def _extract(data: bytes, max_pages: int, min_chars_per_page: int, stage=lambda name: None) -> Dict[str, Any]:
+    """
+    pypdf, при плохом выходе — pdfminer; возвращает лучший по числу символов на страницу.
+    PdfExtractionTimeout (SIGALRM в процессе пула импорта) не глотается — иначе pdfminer
+    шёл бы уже без лимита времени.
+    """
+    failures: List[Tuple[str, str]] = []
+    best: Optional[Dict[str, Any]] = None
+    fallback = None
+
+    stage("pypdf")
+    t0 = time.perf_counter()
+    try:
+        text, pages = pypdf_text(data, max_pages)
+        best = {"text": text, "pages": pages, "backend": "pypdf", "seconds": time.perf_counter() - t0}
+        if _yield_per_page(text, pages) >= min_chars_per_page:
+            return {**best, "failures": failures, "fallback": None}
+        fallback = "poor_yield"
+    except (MemoryError, PdfExtractionTimeout):
+        raise
+    except Exception as e:
+        failures.append(("pypdf", f"{type(e).__name__}: {e}"))
+        fallback = "error"
+
+    stage("pdfminer")
+    t1 = time.perf_counter()
+    try:
+        text, pages = pdfminer_text(data, max_pages)
+        if best is not None:
+            pages = best["pages"]
+        if best is None or _yield_per_page(text, pages) > _yield_per_page(best["text"], best["pages"]):
+            best = {"text": text, "pages": pages, "backend": "pdfminer", "seconds": time.perf_counter() - t1}
+    except (MemoryError, PdfExtractionTimeout):
+        raise
+    except Exception as e:
+        failures.append(("pdfminer", f"{type(e).__name__}: {e}"))
+
+    if best is None:
+        raise PdfExtractionError("; ".join(f"{b}: {msg}" for b, msg in failures))
+    return {**best, "failures": failures, "fallback": fallback}
+
+
+def _limit_memory(memory_mb: int) -> None:
+    if not memory_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    limit = memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError) as e:
+        logger.warning("pdf worker: RLIMIT_AS not applied: %s", e)
+
+
+def _worker_main(conn, memory_mb: int) -> None:
+    _limit_memory(memory_mb)
+    # предупреждения pypdf/pdfminer о шрифтах и битых xref — по строке на страницу, в stderr воркера не нужны
+    for name in ("pypdf", "pdfminer"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    stage_name = "pypdf"
+
+    def _stage(name: str) -> None:
+        nonlocal stage_name
+        stage_name = name
+        conn.send(("stage", name))
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:
+            return
+        data, max_pages, min_chars = msg
+        try:
+            conn.send(("ok", _extract(data, max_pages, min_chars, _stage)))
+        except MemoryError:
+            conn.send(("memory", stage_name, f"{stage_name}: MemoryError"))
+            return  # после MemoryError процесс лучше не переиспользовать
+        except PdfExtractionError as e:
+            conn.send(("error", stage_name, str(e)))
+        except Exception as e:
+            conn.send(("error", stage_name, f"{stage_name}: {type(e).__name__}: {e}"))
+
+
+# --- пул (родительский процесс) ---
+
+class _Worker:
+    def __init__(self, ctx, memory_mb: int) -> None:
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child, memory_mb), name="pdf-extract", daemon=True)
+        self.proc.start()
+        child.close()
+        self.tasks = 0
+
+    def stop(self, kill: bool = False) -> None:
+        try:
+            if kill:
+                self.proc.kill()
+            else:
+                self.conn.send(None)
+        except Exception:
+            pass
+        self.proc.join(timeout=1 if not kill else 5)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join(timeout=5)
+        self.conn.close()
+
+
+class PdfWorkerPool:
+    """Пул процессов-экстракторов: на каждый документ — свободный воркер, лимит времени и памяти."""
+
+    def __init__(self, workers: int = 2, memory_mb: int = 1024, max_tasks: int = 200) -> None:
+        self.workers = max(1, workers)
+        self.memory_mb = memory_mb
+        self.max_tasks = max(1, max_tasks)
+        self._ctx = multiprocessing.get_context("spawn")
+        # свободные слоты: готовый воркер или None (поднимется при первой выдаче)
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        for _ in range(self.workers):
+            self._idle.put(None)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._restarts = 0
+
+    def extract(self, data: bytes, max_pages: int, timeout: float, min_chars_per_page: int) -> Dict[str, Any]:
+        if self._closed:
+            raise PdfExtractionError("pdf worker pool is closed")
+        # ожидание свободного воркера входит в тот же лимит времени, что и разбор
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self._idle.get(timeout=max(0.0, timeout))
+        except queue.Empty:
+            _failures.labels(backend="pool", reason="timeout").inc()
+            raise PdfExtractionTimeout(f"no free pdf worker in {timeout:g}s")
+        healthy = False
+        try:
+            if worker is None:
+                worker = _Worker(self._ctx, self.memory_mb)
+            worker.tasks += 1
+            stage = "pypdf"
+            try:
+                worker.conn.send((data, max_pages, min_chars_per_page))
+            except OSError:  # BrokenPipeError — воркер умер до задачи (в т.ч. при старте)
+                _failures.labels(backend=stage, reason="crash").inc()
+                raise PdfExtractionError(f"worker is not running (exit code {worker.proc.exitcode})")
+            while True:
+                left = deadline - time.monotonic()
+                if left <= 0 or not worker.conn.poll(left):
+                    _failures.labels(backend=stage, reason="timeout").inc()
+                    raise PdfExtractionTimeout(f"{stage}: no result in {timeout:g}s")
+                try:
+                    msg = worker.conn.recv()
+                except (EOFError, OSError):
+                    _failures.labels(backend=stage, reason="crash").inc()
+                    raise PdfExtractionError(f"{stage}: worker died (exit code {worker.proc.exitcode})")
+                if msg[0] == "stage":
+                    stage = msg[1]
+                    continue
+                if msg[0] == "ok":
+                    healthy = True
+                    return msg[1]
+                _, stage, detail = msg
+                _failures.labels(backend=stage, reason="memory" if msg[0] == "memory" else "error").inc()
+                healthy = msg[0] == "error"
+                raise PdfExtractionError(detail)
+        finally:
+            self._release(worker, healthy)
+
+    def _release(self, worker: Optional[_Worker], healthy: bool) -> None:
+        if worker is not None and (not healthy or worker.tasks >= self.max_tasks or self._closed):
+            worker.stop(kill=not healthy)
+            with self._lock:
+                self._restarts += 1
+            worker = None
+        self._idle.put(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            restarts = self._restarts
+        return {"workers": self.workers, "idle": self._idle.qsize(), "restarts": restarts,
+                "memory_mb": self.memory_mb, "max_tasks": self.max_tasks}
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if worker is not None:
+                worker.stop()
+
+
+_pool: Optional[PdfWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> PdfWorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PdfWorkerPool(settings.PDF_WORKERS, settings.PDF_WORKER_MEMORY_MB, settings.PDF_WORKER_MAX_TASKS)
+        return _pool
+
+
+def close_pdf_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def extract_pdf_text(data: bytes, max_pages: Optional[int] = None, timeout: Optional[float] = None) -> str:
+    """
+    Текст PDF (без нормализации). max_pages=None — PDF_MAX_PAGES, 0 — все страницы.
+    Бросает PdfExtractionError / PdfExtractionTimeout.
+    """
+    max_pages = settings.PDF_MAX_PAGES if max_pages is None else max_pages
+    timeout = settings.PDF_EXTRACT_TIMEOUT if timeout is None else timeout
+    min_chars = settings.PDF_MIN_CHARS_PER_PAGE
+    t0 = time.perf_counter()
+    if settings.PDF_ISOLATED:
+        result = get_pdf_pool().extract(data, max_pages, timeout, min_chars)
+    else:
+        try:
+            result = _extract(data, max_pages, min_chars)
+        except MemoryError:
+            _failures.labels(backend="inline", reason="memory").inc()
+            raise PdfExtractionError("MemoryError")
+        except PdfExtractionError:
+            _failures.labels(backend="inline", reason="error").inc()
+            raise
+    elapsed = time.perf_counter() - t0
+
+    backend = result["backend"]
+    for failed_backend, detail in result["failures"]:
+        _failures.labels(backend=failed_backend, reason="error").inc()
+        logger.info("pdf: %s failed: %s", failed_backend, detail)
+    if result["fallback"]:
+        _fallbacks.labels(reason=result["fallback"]).inc()
+    _seconds.labels(backend=backend).observe(elapsed)
+    _pages.labels(backend=backend).inc(result["pages"])
+    if result["seconds"] > 0:
+        _pages_per_sec.labels(backend=backend).observe(result["pages"] / result["seconds"])
+    return result["text"]
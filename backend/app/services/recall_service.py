@@ -0,0 +1,115 @@
+# backend/app/services/recall_service.py
+from __future__ import annotations
+"""
+Дешёвый первый этап ранжирования (recall): по всем кандидатам считается
+лексическая близость к вакансии, дальше к LLM идут только top-N.
+
+Скореры:
+  - "bm25"    — BM25 по токенам вакансии (IDF считается по текущему набору кандидатов);
+  - "jaccard" — пересечение/объединение множеств токенов (векторизованно, см. jaccard_matrix);
+  - "none"    — без отбора, все кандидаты проходят дальше (прежнее поведение).
+
+Токенизация общая с jaccard_matcher_service.
+
+Кандидаты принимаются любым итерируемым (в т.ч. потоком из БД, см.
+candidate_stream) и читаются за один проход: тексты не накапливаются, в памяти
+остаются только ключи, оценки и (для BM25) частоты терминов запроса.
+"""
+import math
+from collections import Counter
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from backend.app.services.jaccard_matcher_service import _tokenize, _tokens, jaccard_one_to_many
+from backend.app.services.topk import TopK
+
+__all__ = ["RECALL_SCORERS", "recall"]
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+CHUNK_SIZE = 2000  # документов на один векторизованный вызов Jaccard
+
+Doc = Tuple[Any, str]            # (ключ кандидата, текст)
+Scored = Tuple[Any, float]       # (ключ кандидата, recall-score)
+
+
+def _chunks(docs: Iterable[Doc], size: int) -> Iterator[List[Doc]]:
+    it = iter(docs)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _bm25(query: str, docs: Iterable[Doc]) -> Tuple[List[Any], List[float]]:
+    q_terms = _tokenize(query)
+
+    # частоты только по терминам запроса — остальное для BM25 не нужно
+    keys: List[Any] = []
+    tfs: List[Dict[str, int]] = []
+    lengths: List[int] = []
+    df: Counter[str] = Counter()
+    for key, text in docs:
+        keys.append(key)
+        if not q_terms:
+            continue
+        toks = _tokens(text)
+        lengths.append(len(toks))
+        tf = {t: n for t, n in Counter(toks).items() if t in q_terms}
+        tfs.append(tf)
+        df.update(tf.keys())
+    if not q_terms:
+        return keys, [0.0] * len(keys)
+
+    n_docs = len(keys)
+    avgdl = (sum(lengths) / n_docs) if n_docs else 0.0
+    idf = {t: math.log(1.0 + (n_docs - df[t] + 0.5) / (df[t] + 0.5)) for t in df}
+
+    scores: List[float] = []
+    for tf, dl in zip(tfs, lengths):
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * dl / avgdl) if avgdl else BM25_K1
+        scores.append(sum((idf[t] * n * (BM25_K1 + 1.0) / (n + norm) for t, n in tf.items()), 0.0))
+    return keys, scores
+
+
+def _jaccard(query: str, docs: Iterable[Doc]) -> Tuple[List[Any], List[float]]:
+    keys: List[Any] = []
+    scores: List[float] = []
+    for chunk in _chunks(docs, CHUNK_SIZE):
+        keys.extend(key for key, _ in chunk)
+        scores.extend(jaccard_one_to_many(query, [text for _, text in chunk]).tolist())
+    return keys, scores
+
+
+def _none(query: str, docs: Iterable[Doc]) -> Tuple[List[Any], List[float]]:
+    keys = [key for key, _ in docs]
+    return keys, [0.0] * len(keys)
+
+
+RECALL_SCORERS: Dict[str, Callable[[str, Iterable[Doc]], Tuple[List[Any], List[float]]]] = {
+    "bm25": _bm25,
+    "jaccard": _jaccard,
+    "none": _none,
+}
+
+
+def recall(
+    query: str,
+    docs: Iterable[Doc],
+    *,
+    scorer: str = "bm25",
+    top_n: int | None = 50,
+) -> List[Scored]:
+    """
+    Возвращает до top_n пар (key, score) по убыванию score.
+    При равных score сохраняется исходный порядок кандидатов.
+    scorer="none" или top_n=None/0 — отбора нет, возвращаются все.
+    """
+    try:
+        fn = RECALL_SCORERS[scorer]
+    except KeyError:
+        raise ValueError(f"Unknown recall scorer: {scorer!r} (expected one of {sorted(RECALL_SCORERS)})")
+
+    keys, scores = fn(query, docs)
+    top: TopK[Scored] = TopK(None if scorer == "none" else top_n)
+    for key, score in zip(keys, scores):
+        top.push((key, score), score)
+    return top.items()
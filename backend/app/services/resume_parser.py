@@ -1,13 +1,51 @@
 # backend/app/services/resume_parser.py
 """
-Парсер резюме из PDF, DOCX, TXT файлов
+Парсер резюме из PDF, DOCX, DOC, RTF, TXT файлов
 Извлекает: имя, контакты, навыки, опыт работы, образование
 """
 import re
-from typing import Dict, List, Optional
-import PyPDF2
-import docx
-import io
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from backend.app.services.parse_cache import get_parse_cache, make_key, sha256_bytes
+from backend.app.services.document_extractor import DocumentExtractionError, PdfExtractionTimeout, extract_document
+from backend.app.services.skill_taxonomy import Hit, get_taxonomy, normalize_term
+from backend.app.services.text_patterns import (
+    EMAIL_RE, EXPERIENCE_YEARS_RES, LANGUAGE_LEVEL_RE, PHONE_RE, YEAR_RE, ExtractorTimings, first_match,
+)
+
+# Версия логики разбора — входит в ключ кэша парсинга
+PARSER_VERSION = "8"
+
+# упоминание ключевого слова в тексте (не заголовок) не обрывает секцию раньше стольких символов от её начала
+MIN_SECTION_CHARS = 100
+# разделители после заголовка секции ("Навыки:", "Опыт работы —")
+_HEADER_TAIL_RE = re.compile(r'[\s:\-–—]*')
+# что может стоять в строке перед заголовком (отступ, маркер списка, разметка)
+_HEADER_LEAD = " \t•·-*#>"
+# слов перед ключевым словом в заголовке ("Ключевые компетенции", "Work experience")
+_HEADER_LEAD_WORDS = 2
+
+# перечисление навыков в секции: запятые, точки с запятой, маркеры, по навыку на строку
+_SKILL_SPLIT_RE = re.compile(r'[,;•·\n]')
+# элемент перечисления — навык, а не фраза: до 30 символов и 3 слов, есть буква,
+# нет цифр-дат/телефонов, адресов, конца предложения и пары "ключ: значение"
+_SKILL_MAX_CHARS = 30
+_SKILL_MAX_WORDS = 3
+_NOT_SKILL_RE = re.compile(r'\d{3,}|@|://|[.!?]$|:')
+
+# уровень языка ищем в той же строке, не дальше стольких символов от названия
+LANGUAGE_LEVEL_WINDOW = 80
+
+
+def _looks_like_skill(item: str) -> bool:
+    """Элемент секции навыков похож на название навыка (а не на фразу, дату или контакт)."""
+    return (
+        0 < len(item) < _SKILL_MAX_CHARS
+        and len(item.split()) <= _SKILL_MAX_WORDS
+        and any(ch.isalpha() for ch in item)
+        and not _NOT_SKILL_RE.search(item)
+    )
 
 
 class ResumeParser:
@@ -21,84 +59,70 @@ class ResumeParser:
             'summary': ['о себе', 'summary', 'обо мне', 'профиль', 'about']
         }
 
-        # Технические навыки для поиска
-        self.tech_skills = [
-            # Languages
-            'Python', 'JavaScript', 'TypeScript', 'Java', 'C#', 'C++', 'Go', 'Rust', 'PHP', 'Ruby', 'Swift', 'Kotlin',
-            # Frontend
-            'React', 'Angular', 'Vue', 'HTML', 'CSS', 'SASS', 'Redux', 'Next.js', 'Webpack',
-            # Backend
-            'Node.js', 'Express', 'FastAPI', 'Django', 'Flask', 'Spring', '.NET', 'Rails',
-            # Databases
-            'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Oracle', 'SQL Server', 'Elasticsearch',
-            # DevOps
-            'Docker', 'Kubernetes', 'AWS', 'Azure', 'GCP', 'CI/CD', 'Jenkins', 'GitLab', 'Terraform',
-            # Other
-            'Git', 'REST', 'GraphQL', 'Microservices', 'Linux', 'Agile', 'Scrum'
-        ]
+        # Все ключевые слова секций — одна регулярка (длинные раньше: "опыт работы" до "работа");
+        # по слову восстанавливаем (тип секции, приоритет слова внутри типа)
+        self._section_of: Dict[str, Tuple[str, int]] = {}
+        for section_type, keywords in self.section_keywords.items():
+            for i, kw in enumerate(keywords):
+                self._section_of.setdefault(kw, (section_type, i))
+        self._section_re = re.compile(
+            r'(?<!\w)(?:' + '|'.join(map(re.escape, sorted(self._section_of, key=len, reverse=True))) + r')(?!\w)'
+        )
+
+        # Навыки и языки — общая таксономия (один проход автомата по тексту)
+        self.taxonomy = get_taxonomy()
 
     def parse(self, file_content: bytes, file_type: str) -> Dict:
-        """Главный метод парсинга"""
+        """Главный метод парсинга (результат кэшируется по содержимому файла)"""
+        cache = get_parse_cache()
+        key = make_key("resume_parser.parse", PARSER_VERSION, sha256_bytes(file_content), file_type=file_type)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
         text = self._extract_text(file_content, file_type)
 
         if not text:
             return {"error": "Не удалось извлечь текст из файла"}
 
+        t = ExtractorTimings("resume_parser")
+        hits = t.run("taxonomy", self.taxonomy.find, text)
+        sections = t.run("sections", self.segment, text)
         result = {
             "full_text": text,
-            "name": self._extract_name(text),
-            "email": self._extract_email(text),
-            "phone": self._extract_phone(text),
-            "skills": self._extract_skills(text),
-            "experience_years": self._extract_experience_years(text),
-            "education": self._extract_education(text),
-            "experience": self._extract_experience_section(text),
-            "summary": self._extract_summary(text),
-            "languages": self._extract_languages(text)
+            "name": t.run("name", self._extract_name, text),
+            "email": t.run("email", self._extract_email, text),
+            "phone": t.run("phone", self._extract_phone, text),
+            "skills": t.run("skills", self._extract_skills, text, hits, sections),
+            "experience_years": t.run("experience_years", self._extract_experience_years, text),
+            "education": t.run("education", self._extract_education, text, sections),
+            "experience": t.run("experience", self._extract_experience_section, text, sections),
+            "summary": t.run("summary", self._extract_summary, text, sections),
+            "languages": t.run("languages", self._extract_languages, text, hits)
         }
+        t.report(text)
 
+        cache.set(key, result)
         return result
 
     def _extract_text(self, content: bytes, file_type: str) -> str:
-        """Извлечение текста из файла"""
+        """Извлечение текста из файла (через кэш парсинга)"""
+        cache = get_parse_cache()
+        key = make_key("resume_parser.text", PARSER_VERSION, sha256_bytes(content), file_type=file_type)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached["text"]
+
+        # формат — по сигнатуре содержимого, file_type — лишь подсказка для нераспознанного
         try:
-            if file_type == 'pdf':
-                return self._extract_pdf_text(content)
-            elif file_type == 'docx':
-                return self._extract_docx_text(content)
-            elif file_type == 'txt':
-                return content.decode('utf-8', errors='ignore')
-            else:
-                return ""
-        except Exception as e:
+            text = extract_document(content, hint=file_type).text
+        except (DocumentExtractionError, PdfExtractionTimeout) as e:
             print(f"Error extracting text: {e}")
             return ""
 
-    def _extract_pdf_text(self, content: bytes) -> str:
-        """Извлечение текста из PDF"""
-        try:
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        except Exception as e:
-            print(f"Error reading PDF: {e}")
-            return ""
-
-    def _extract_docx_text(self, content: bytes) -> str:
-        """Извлечение текста из DOCX"""
-        try:
-            doc_file = io.BytesIO(content)
-            doc = docx.Document(doc_file)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
-        except Exception as e:
-            print(f"Error reading DOCX: {e}")
-            return ""
+        if text:
+            cache.set(key, {"text": text})
+        return text
 
     def _extract_name(self, text: str) -> str:
         """Извлечение имени (обычно в начале резюме)"""
@@ -115,63 +139,44 @@ class ResumeParser:
 
     def _extract_email(self, text: str) -> str:
         """Извлечение email"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        return emails[0] if emails else ""
+        return first_match(EMAIL_RE, text)
 
     def _extract_phone(self, text: str) -> str:
         """Извлечение телефона"""
-        # Паттерны для разных форматов телефонов
-        phone_patterns = [
-            r'\+\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}',
-            r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
-            r'\d{10,11}'
-        ]
-
-        for pattern in phone_patterns:
-            phones = re.findall(pattern, text)
-            if phones:
-                return phones[0]
-        return ""
+        return first_match(PHONE_RE, text)
 
-    def _extract_skills(self, text: str) -> List[str]:
+    def _extract_skills(self, text: str, hits: Optional[List[Hit]] = None,
+                        sections: Optional["SectionMap"] = None) -> List[str]:
         """Извлечение технических навыков"""
-        found_skills = []
-        text_lower = text.lower()
-
-        for skill in self.tech_skills:
-            if skill.lower() in text_lower:
-                found_skills.append(skill)
+        if hits is None:
+            hits = self.taxonomy.find(text)
+        found_skills = [
+            self.taxonomy.name("skills", skill_id)
+            for skill_id in self.taxonomy.group(hits, ["skills"])["skills"]
+        ]
 
         # Дополнительный поиск в секции навыков
-        skills_section = self._find_section(text, 'skills')
+        skills_section = (sections or self.segment(text)).body('skills')
         if skills_section:
             # Ищем навыки через запятую или точку с запятой
-            additional_skills = re.split(r'[,;•·]', skills_section)
+            additional_skills = _SKILL_SPLIT_RE.split(skills_section)
             for skill in additional_skills:
-                skill = skill.strip()
-                if skill and len(skill) < 30:  # Отсекаем слишком длинные строки
-                    if skill not in found_skills:
-                        found_skills.append(skill)
+                skill = skill.strip(_HEADER_LEAD + '–—')
+                if _looks_like_skill(skill) and skill not in found_skills:
+                    found_skills.append(skill)
 
         return found_skills[:20]  # Ограничиваем количество
 
     def _extract_experience_years(self, text: str) -> Optional[float]:
         """Извлечение количества лет опыта"""
         # Ищем паттерны вида "5 лет опыта", "опыт 3 года"
-        patterns = [
-            r'(\d+)\s*(?:лет|года?|years?)\s*(?:опыта?|experience)',
-            r'(?:опыт|experience)\s*(\d+)\s*(?:лет|года?|years?)',
-            r'(?:стаж|seniority)\s*(\d+)\s*(?:лет|года?|years?)'
-        ]
-
-        for pattern in patterns:
-            matches = re.search(pattern, text, re.IGNORECASE)
+        for pattern in EXPERIENCE_YEARS_RES:
+            matches = pattern.search(text)
             if matches:
                 return float(matches.group(1))
 
         # Альтернатива - подсчет годов из опыта работы
-        years = re.findall(r'20\d{2}', text)
+        years = YEAR_RE.findall(text)
         if len(years) >= 2:
             try:
                 min_year = min(int(y) for y in years)
@@ -182,10 +187,10 @@ class ResumeParser:
 
         return None
 
-    def _extract_education(self, text: str) -> List[str]:
+    def _extract_education(self, text: str, sections: Optional["SectionMap"] = None) -> List[str]:
         """Извлечение информации об образовании"""
         education = []
-        education_section = self._find_section(text, 'education')
+        education_section = (sections or self.segment(text)).body('education')
 
         if education_section:
             lines = education_section.split('\n')
@@ -195,20 +200,24 @@ class ResumeParser:
 
         # Дополнительный поиск университетов
         uni_keywords = ['университет', 'university', 'институт', 'institute', 'мгу', 'мфти', 'бауманка']
+        text_lower = text.lower()
+        doc_lines = None
         for keyword in uni_keywords:
-            if keyword in text.lower():
-                # Находим строку с университетом
-                for line in text.split('\n'):
-                    if keyword in line.lower():
+            if keyword in text_lower:
+                # Находим строку с университетом (строки режем один раз на документ)
+                if doc_lines is None:
+                    doc_lines = [(line, line.lower()) for line in text.split('\n')]
+                for line, line_lower in doc_lines:
+                    if keyword in line_lower:
                         education.append(line.strip())
                         break
 
         return education[:3]  # Максимум 3 записи
 
-    def _extract_experience_section(self, text: str) -> List[str]:
+    def _extract_experience_section(self, text: str, sections: Optional["SectionMap"] = None) -> List[str]:
         """Извлечение секции опыта работы"""
         experience = []
-        exp_section = self._find_section(text, 'experience')
+        exp_section = (sections or self.segment(text)).body('experience')
 
         if exp_section:
             # Разбиваем на компании/позиции
@@ -218,7 +227,7 @@ class ResumeParser:
             for line in lines:
                 if line.strip():
                     # Если строка содержит годы, вероятно это новая работа
-                    if re.search(r'20\d{2}', line):
+                    if YEAR_RE.search(line):
                         if current_job:
                             experience.append(current_job)
                         current_job = line.strip()
@@ -230,9 +239,9 @@ class ResumeParser:
 
         return experience[:5]  # Максимум 5 мест работы
 
-    def _extract_summary(self, text: str) -> str:
+    def _extract_summary(self, text: str, sections: Optional["SectionMap"] = None) -> str:
         """Извлечение раздела 'О себе'"""
-        summary_section = self._find_section(text, 'summary')
+        summary_section = (sections or self.segment(text)).body('summary')
         if summary_section:
             # Берем первые 500 символов
             return summary_section[:500]
@@ -253,54 +262,107 @@ class ResumeParser:
 
         return ' '.join(summary_lines)[:500]
 
-    def _extract_languages(self, text: str) -> List[str]:
+    def _extract_languages(self, text: str, hits: Optional[List[Hit]] = None) -> List[str]:
         """Извлечение языков"""
+        if hits is None:
+            hits = self.taxonomy.find(text)
         languages = []
-        language_keywords = {
-            'английский': ['английский', 'english', 'англ'],
-            'русский': ['русский', 'russian'],
-            'немецкий': ['немецкий', 'german', 'deutsch'],
-            'французский': ['французский', 'french'],
-            'испанский': ['испанский', 'spanish'],
-            'китайский': ['китайский', 'chinese'],
-        }
-
-        text_lower = text.lower()
-        for lang, keywords in language_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    # Пытаемся найти уровень
-                    level_match = re.search(f'{keyword}.*?(a1|a2|b1|b2|c1|c2|native|fluent|intermediate|basic)',
-                                            text_lower)
-                    if level_match:
-                        languages.append(f"{lang} ({level_match.group(1)})")
-                    else:
-                        languages.append(lang)
-                    break
+        seen = set()
+        for hit in hits:
+            if hit.kind != "languages" or hit.id in seen:
+                continue
+            seen.add(hit.id)
+            lang = self.taxonomy.name("languages", hit.id)
+            # Пытаемся найти уровень (в той же строке, после названия)
+            line_end = text.find('\n', hit.end)
+            stop = min(len(text) if line_end == -1 else line_end, hit.end + LANGUAGE_LEVEL_WINDOW)
+            level_match = LANGUAGE_LEVEL_RE.search(text[hit.end:stop].lower())
+            if level_match:
+                languages.append(f"{lang} ({level_match.group(1)})")
+            else:
+                languages.append(lang)
 
         return languages
 
+    def segment(self, text: str) -> "SectionMap":
+        """
+        Разметка документа на секции за один проход регулярки по тексту.
+
+        Заголовок — ключевое слово в начале строки, за которым до конца строки ничего
+        нет или идёт ":" ("Навыки", "Опыт работы:"). Начало секции — её заголовок
+        (при нескольких — с самым приоритетным словом из section_keywords), а если
+        заголовка нет, первое упоминание ключевого слова, как раньше. Конец — ближайший
+        заголовок другой секции или, для упоминаний в тексте, ближайшее ключевое слово
+        другой секции не раньше MIN_SECTION_CHARS символов от начала.
+        """
+        hits = [
+            Hit(str(prio), section_type, m.start(), m.end())
+            for m in self._section_re.finditer(normalize_term(text))
+            for section_type, prio in (self._section_of[m.group()],)
+        ]
+        starts = [h.start for h in hits]
+        # для заголовков — начало строки заголовка, для упоминаний в тексте — None
+        headers = [self._header_start(text, h) for h in hits]
+
+        # лучшее начало каждого типа: (не заголовок, приоритет ключевого слова, позиция)
+        best: Dict[str, Tuple[bool, int, int, int]] = {}
+        for h, header_start in zip(hits, headers):
+            key = (header_start is None, int(h.id), h.start if header_start is None else header_start, h.end)
+            if h.kind not in best or key < best[h.kind]:
+                best[h.kind] = key
+
+        spans: Dict[str, Tuple[int, int, int]] = {}
+        for section_type, (_, _, start, header_end) in best.items():
+            end = len(text)
+            far = start + MIN_SECTION_CHARS
+            for j in range(bisect_right(starts, start), len(hits)):
+                h = hits[j]
+                if h.kind == section_type:
+                    continue
+                if headers[j] is not None and h.start >= header_end:
+                    end = headers[j]
+                    break
+                if h.start > far:
+                    end = h.start
+                    break
+            spans[section_type] = (start, header_end, end)
+        return SectionMap(text, spans)
+
+    @staticmethod
+    def _header_start(text: str, hit: Hit) -> Optional[int]:
+        line_start = text.rfind('\n', 0, hit.start) + 1
+        line_end = text.find('\n', hit.end)
+        lead = text[line_start:hit.start].strip(_HEADER_LEAD)
+        tail = text[hit.end:len(text) if line_end == -1 else line_end].strip()
+        if not lead:
+            is_header = not tail or tail[0] == ':'
+        else:
+            # "Ключевые компетенции", "Work experience:" — короткая строка, ключевое слово последнее
+            is_header = (tail in ("", ":") and len(lead.split()) <= _HEADER_LEAD_WORDS
+                         and not any(c in lead for c in ".,;"))
+        return line_start if is_header else None
+
     def _find_section(self, text: str, section_type: str) -> str:
-        """Поиск секции в тексте"""
-        keywords = self.section_keywords.get(section_type, [])
-        text_lower = text.lower()
+        """Поиск секции в тексте (вместе с заголовком)"""
+        return self.segment(text).get(section_type)
+
 
-        for keyword in keywords:
-            # Ищем позицию ключевого слова
-            pos = text_lower.find(keyword)
-            if pos != -1:
-                # Берем текст от этого места до следующей секции или конца
-                section_text = text[pos:]
-
-                # Ищем конец секции (начало следующей)
-                min_next_pos = len(section_text)
-                for other_type, other_keywords in self.section_keywords.items():
-                    if other_type != section_type:
-                        for other_keyword in other_keywords:
-                            next_pos = section_text.lower().find(other_keyword)
-                            if next_pos > 100 and next_pos < min_next_pos:  # Минимум 100 символов на секцию
-                                min_next_pos = next_pos
-
-                return section_text[:min_next_pos]
-
-        return ""
\ No newline at end of file
+class SectionMap:
+    """Секции одного документа: {тип: (начало заголовка, конец заголовка, конец секции)}."""
+
+    def __init__(self, text: str, spans: Dict[str, Tuple[int, int, int]]):
+        self.text = text
+        self.spans = spans
+
+    def get(self, section_type: str) -> str:
+        """Текст секции вместе с заголовком ("" — секции нет)."""
+        span = self.spans.get(section_type)
+        return self.text[span[0]:span[2]] if span else ""
+
+    def body(self, section_type: str) -> str:
+        """Текст секции без заголовка и разделителей после него."""
+        span = self.spans.get(section_type)
+        if not span:
+            return ""
+        start = _HEADER_TAIL_RE.match(self.text, span[1], span[2]).end()
+        return self.text[start:span[2]]
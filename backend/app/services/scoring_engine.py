@@ -0,0 +1,256 @@
+# backend/app/services/scoring_engine.py
+from __future__ import annotations
+"""
+Конкурентный LLM-скоринг пар вакансия/резюме.
+
+- AsyncOpenAI-клиент (base_url настраивается — можно направить на локальный
+  фейковый сервер backend/tools/fake_openai_server.py);
+- ограничение параллелизма (семафор) и частоты запросов (token bucket);
+- повтор с экспоненциальной задержкой и полным джиттером на 429/5xx/сетевых ошибках
+  (учитывается Retry-After);
+- результаты отдаются по мере готовности (async-генератор stream или колбэк on_result);
+- ответы кэшируются (llm_cache): попадания отдаются сразу, без запроса и без
+  расхода rate limit;
+- блокирующее (SQLite-кэш, колбэк on_result с записью прогресса в БД) выполняется
+  в потоках (asyncio.to_thread), чтобы не останавливать event loop с запросами в полёте.
+
+Промпт и разбор ответа общие с ai_service.score_match.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    RateLimitError,
+)
+
+from backend.app.config import settings
+from backend.app.services import ai_service
+from backend.app.services.llm_cache import get_llm_cache
+from backend.app.services.openai_clients import get_client_registry
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["TokenBucket", "ScoreResult", "ScoringEngine"]
+
+
+class TokenBucket:
+    """Асинхронный token bucket: rate токенов в секунду, ёмкость capacity."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        if self.rate <= 0:
+            return  # без ограничения
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+@dataclass
+class ScoreResult:
+    key: Any
+    details: Dict[str, Any]
+    attempts: int
+    latency: float
+    error: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def score(self) -> int:
+        try:
+            return int(self.details.get("score", 0))
+        except (TypeError, ValueError):
+            return 0
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(exc, APIStatusError) and exc.status_code >= 500
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ScoringEngine:
+    """Скоринг множества резюме против одной вакансии с ограничением нагрузки на API."""
+
+    def __init__(
+        self,
+        *,
+        model: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        rate_per_sec: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        client_factory: Optional[Callable[[], AsyncOpenAI]] = None,
+        use_cache: bool = True,
+    ) -> None:
+        self.model = model or ai_service.MODEL
+        self.concurrency = max(1, concurrency or settings.SCORING_CONCURRENCY)
+        self.rate_per_sec = settings.SCORING_RATE_PER_SEC if rate_per_sec is None else rate_per_sec
+        self.burst = burst or settings.SCORING_BURST
+        self.max_retries = settings.SCORING_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._api_key = api_key
+        self._base_url = base_url or settings.OPENAI_BASE_URL
+        self._client_factory = client_factory
+        # use_cache=False — не читать кэш (свежие ответы всё равно записываются)
+        self.use_cache = use_cache
+        self._cache = get_llm_cache()
+
+    def _make_client(self) -> AsyncOpenAI:
+        if self._client_factory is not None:
+            return self._client_factory()
+        # общий пул соединений процесса; ретраи делаем сами (с учётом общего rate limit),
+        # встроенные в SDK выключаем
+        options: Dict[str, Any] = {"max_retries": 0, "timeout": settings.SCORING_TIMEOUT}
+        if self._api_key:
+            options["api_key"] = self._api_key
+        if self._base_url:
+            options["base_url"] = self._base_url
+        return get_client_registry().get_async("scoring").with_options(**options)
+
+    async def _score_one(
+        self,
+        client: AsyncOpenAI,
+        sem: asyncio.Semaphore,
+        bucket: TokenBucket,
+        vacancy_text: str,
+        key: Any,
+        resume_text: str,
+    ) -> ScoreResult:
+        t0 = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            await bucket.acquire()
+            try:
+                async with sem:
+                    resp = await client.chat.completions.create(
+                        model=self.model,
+                        messages=ai_service.build_score_messages(vacancy_text, resume_text),
+                        temperature=0.0,
+                        response_format={"type": "json_object"},
+                    )
+                details = ai_service.try_parse_score(resp.choices[0].message.content)
+                if details is None:
+                    return ScoreResult(key, dict(ai_service.FALLBACK_SCORE), attempt,
+                                       time.perf_counter() - t0, error="unparsable response")
+                await asyncio.to_thread(
+                    self._cache.set, ai_service.score_cache_key(vacancy_text, resume_text, self.model), details,
+                )
+                return ScoreResult(key, details, attempt, time.perf_counter() - t0)
+            except Exception as e:
+                if not _is_retryable(e) or attempt > self.max_retries:
+                    logger.warning("scoring %s failed after %d attempt(s): %s", key, attempt, e)
+                    return ScoreResult(key, dict(ai_service.FALLBACK_SCORE), attempt,
+                                       time.perf_counter() - t0, error=f"{type(e).__name__}: {e}")
+                # полный джиттер: U(0, min(max, base * 2^n)), но не меньше Retry-After
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                delay = max(delay, _retry_after(e) or 0.0)
+                await asyncio.sleep(delay)
+
+    async def stream(
+        self,
+        vacancy_text: str,
+        items: Iterable[Tuple[Any, str]],
+    ) -> AsyncIterator[ScoreResult]:
+        """
+        Скорит (key, resume_text) и отдаёт результаты по мере готовности.
+        Одновременно создаётся не больше 2×concurrency задач — входной итератор
+        может быть ленивым (стрим кандидатов из БД).
+        """
+        client = self._make_client()
+        sem = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket(self.rate_per_sec, self.burst)
+        pending: set[asyncio.Task] = set()
+        window = self.concurrency * 2
+        try:
+            for key, text in items:
+                if self.use_cache:
+                    hit = await asyncio.to_thread(
+                        self._cache.get, ai_service.score_cache_key(vacancy_text, text, self.model),
+                    )
+                    if hit is not None:
+                        yield ScoreResult(key, hit, 0, 0.0, cached=True)
+                        continue
+                pending.add(asyncio.create_task(
+                    self._score_one(client, sem, bucket, vacancy_text, key, text)
+                ))
+                if len(pending) < window:
+                    continue
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if self._client_factory is not None:
+                await client.close()  # пул общего клиента не закрываем
+
+    def score_all(
+        self,
+        vacancy_text: str,
+        items: Iterable[Tuple[Any, str]],
+        on_result: Optional[Callable[[ScoreResult], None]] = None,
+    ) -> List[ScoreResult]:
+        """
+        Синхронная обёртка для кода без event loop (matcher, фоновые задачи).
+        on_result вызывается на каждый готовый результат — в потоке, по одному за раз
+        (может писать в БД, запросы в полёте тем временем продолжаются); исключение
+        из него останавливает скоринг (незавершённые запросы отменяются).
+        """
+        async def _run() -> List[ScoreResult]:
+            out: List[ScoreResult] = []
+            try:
+                async for res in self.stream(vacancy_text, items):
+                    out.append(res)
+                    if on_result is not None:
+                        await asyncio.to_thread(on_result, res)
+            finally:
+                # loop живёт только на время asyncio.run — его пул соединений закрываем
+                await get_client_registry().aclose_loop()
+            return out
+
+        return asyncio.run(_run())
@@ -0,0 +1,413 @@
+# backend/app/services/search_service.py
+from __future__ import annotations
+"""
+Полнотекстовый поиск кандидатов: инвертированный индекс в Postgres + BM25.
+
+- index_documents(db, [(candidate_id, text), ...]) — инкрементальное обновление
+  (вызывается из ingest в той же транзакции, что и вставка кандидатов);
+- remove_documents(db, ids) — удаление/переиндексация;
+- search(db, query, page, page_size) — top-k BM25 с отсечением (см. ниже);
+- refresh_impacts(db) — пересчёт impact постингов под текущую среднюю длину.
+
+Постинг хранит impact — BM25-вклад термина без idf,
+tf·(k1+1) / (tf + k1·(1−b+b·len/avgdl)), посчитанный при индексации (avgdl —
+на тот момент). Индекс (term, impact, candidate_id) отдаёт постинги термина в
+порядке убывания вклада, и поиск не читает все постинги частых терминов:
+
+  1) списки терминов читаются порциями (SEARCH_POSTINGS_CAP, затем удвоение) —
+     у кандидата известна нижняя оценка (сумма прочитанных вкладов), а любой
+     непрочитанный вклад термина не выше последнего прочитанного impact;
+  2) лучшие по нижней оценке дочитываются точечно по PK — это порог k-го места;
+  3) документ, не попавший ни в один список, набирает не больше
+     Σ idf·(последний impact списка) — как только это ниже порога, чтение
+     останавливается, и по PK уточняются только кандидаты, чья верхняя оценка
+     ещё не ниже k-й: top-k точный. Иначе — до SEARCH_POSTINGS_MAX постингов
+     на термин, дальше ответ приближённый (уточняются SEARCH_RESOLVE_MAX лучших).
+
+Точно и быстро отвечают запросы с редким термином и одиночные частые; у нескольких
+частых некоррелированных терминов порог сходится глубоко — их ограничивает предел.
+
+total — оценка числа совпавших документов по df терминов (независимость
+терминов), а не count(distinct) по всем постингам.
+
+Токенизация общая с jaccard_matcher_service (и recall-этапом ранжирования).
+N и средняя длина документа кэшируются в процессе на SEARCH_STATS_TTL секунд:
+для BM25 небольшая устарелость этих величин несущественна (после заметного
+роста корпуса — refresh_impacts или полная переиндексация).
+"""
+import hashlib
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, any_, bindparam, delete, func, select, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.app.config import settings
+from backend.app.models.candidate import Candidate
+from backend.app.models.search_index import SearchDocument, SearchPosting, SearchTerm
+from backend.app.services.jaccard_matcher_service import _tokens
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["index_documents", "refresh_impacts", "remove_documents", "reindex_all", "search"]
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_LEN = 64
+MAX_QUERY_TERMS = 32
+
+_stats_lock = threading.Lock()
+_stats_cache: Tuple[float, int, float] | None = None   # (ts, n_docs, avgdl)
+
+
+def _doc_terms(text: str) -> Counter[str]:
+    return Counter(t for t in _tokens(text) if len(t) <= MAX_TERM_LEN)
+
+
+def _impact(tf: int, length: int, avgdl: float) -> float:
+    """BM25-вклад термина без idf (хранится в постинге)."""
+    return tf * (BM25_K1 + 1.0) / (tf + BM25_K1 * (1.0 - BM25_B + BM25_B * length / avgdl))
+
+
+def _invalidate_stats() -> None:
+    global _stats_cache
+    with _stats_lock:
+        _stats_cache = None
+
+
+def _corpus_stats(db: Session) -> Tuple[int, float]:
+    global _stats_cache
+    with _stats_lock:
+        cached = _stats_cache
+    if cached and time.monotonic() - cached[0] < settings.SEARCH_STATS_TTL:
+        return cached[1], cached[2]
+    n, avgdl = db.execute(
+        select(func.count(), func.coalesce(func.avg(SearchDocument.length), 0.0))
+    ).one()
+    with _stats_lock:
+        _stats_cache = (time.monotonic(), int(n), float(avgdl))
+    return int(n), float(avgdl)
+
+
+# -------------------- обновление индекса --------------------
+
+def index_documents(db: Session, docs: Iterable[Tuple[int, Optional[str]]], *, batch_size: int = 5000) -> int:
+    """
+    Добавляет документы в индекс (ранее проиндексированные версии удаляются).
+    Коммит — на вызывающей стороне. Возвращает число проиндексированных документов.
+    """
+    docs = [(cid, text or "") for cid, text in docs]
+    if not docs:
+        return 0
+    remove_documents(db, [cid for cid, _ in docs])
+
+    parsed = [(cid, text, _doc_terms(text)) for cid, text in docs]
+    lengths = [sum(terms.values()) for _, _, terms in parsed]
+    # avgdl корпуса вместе с этой пачкой (первая пачка пустого индекса — по самой пачке)
+    n_docs, avgdl = _corpus_stats(db)
+    avgdl = (n_docs * avgdl + sum(lengths)) / max(1, n_docs + len(parsed)) or 1.0
+
+    doc_rows: List[Dict[str, Any]] = []
+    postings: List[Dict[str, Any]] = []
+    df: Counter[str] = Counter()
+    for (cid, text, terms), length in zip(parsed, lengths):
+        doc_rows.append({
+            "candidate_id": cid,
+            "length": length,
+            "text_hash": hashlib.sha1(text.encode("utf-8")).hexdigest(),
+        })
+        postings.extend(
+            {"term": t, "candidate_id": cid, "tf": n, "impact": _impact(n, length, avgdl)}
+            for t, n in terms.items()
+        )
+        df.update(terms.keys())
+
+    db.execute(pg_insert(SearchDocument), doc_rows)
+    for i in range(0, len(postings), batch_size):
+        db.execute(pg_insert(SearchPosting), postings[i:i + batch_size])
+
+    # df += по всей пачке одним upsert'ом на термин (а не на каждый документ)
+    term_rows = sorted(({"term": t, "df": n} for t, n in df.items()), key=lambda r: r["term"])
+    for i in range(0, len(term_rows), batch_size):
+        stmt = pg_insert(SearchTerm)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SearchTerm.term],
+            set_={"df": SearchTerm.df + stmt.excluded.df},
+        )
+        db.execute(stmt, term_rows[i:i + batch_size])
+
+    _invalidate_stats()
+    return len(docs)
+
+
+def remove_documents(db: Session, candidate_ids: Sequence[int]) -> int:
+    """Убирает документы из индекса с корректировкой df. Коммит — на вызывающей стороне."""
+    if not candidate_ids:
+        return 0
+    existing = db.execute(
+        select(SearchDocument.candidate_id).where(SearchDocument.candidate_id.in_(candidate_ids))
+    ).scalars().all()
+    if not existing:
+        return 0
+
+    dec = db.execute(
+        select(SearchPosting.term, func.count())
+        .where(SearchPosting.candidate_id.in_(existing))
+        .group_by(SearchPosting.term)
+    ).all()
+    for term, n in dec:
+        db.execute(update(SearchTerm).where(SearchTerm.term == term).values(df=SearchTerm.df - n))
+    db.execute(delete(SearchPosting).where(SearchPosting.candidate_id.in_(existing)))
+    db.execute(delete(SearchDocument).where(SearchDocument.candidate_id.in_(existing)))
+    db.execute(delete(SearchTerm).where(SearchTerm.df <= 0))
+    _invalidate_stats()
+    return len(existing)
+
+
+def reindex_all(
+    db: Session,
+    *,
+    only_missing: bool = True,
+    batch_size: int = 1000,
+    progress: Optional[Callable[..., None]] = None,
+) -> int:
+    """
+    Индексирует кандидатов, которых нет в индексе (only_missing) или всех подряд.
+    Коммитит после каждой пачки. Возвращает число проиндексированных.
+    """
+    q = select(Candidate.id, Candidate.original_text).order_by(Candidate.id)
+    if only_missing:
+        q = q.outerjoin(SearchDocument, SearchDocument.candidate_id == Candidate.id) \
+             .where(SearchDocument.candidate_id.is_(None))
+    total = db.execute(select(func.count()).select_from(q.subquery())).scalar_one()
+
+    done = 0
+    last_id = 0
+    while True:
+        rows = db.execute(q.where(Candidate.id > last_id).limit(batch_size)).all()
+        if not rows:
+            break
+        index_documents(db, [(r.id, r.original_text) for r in rows])
+        db.commit()
+        done += len(rows)
+        last_id = rows[-1].id
+        if progress is not None:
+            progress(done, total)
+    if not only_missing and done:
+        # пачки индексировались с растущей avgdl — выравниваем вклад под итоговую
+        refresh_impacts(db)
+        db.commit()
+    logger.info("search index: %d documents (re)indexed", done)
+    return done
+
+
+def refresh_impacts(db: Session) -> int:
+    """
+    Пересчитывает impact всех постингов под текущую среднюю длину документа
+    (одним UPDATE). Коммит — на вызывающей стороне. Возвращает число строк.
+    """
+    _invalidate_stats()
+    _, avgdl = _corpus_stats(db)
+    avgdl = avgdl or 1.0
+    tf = SearchPosting.tf
+    res = db.execute(
+        update(SearchPosting)
+        .where(SearchDocument.candidate_id == SearchPosting.candidate_id)
+        .values(impact=tf * (BM25_K1 + 1.0)
+                / (tf + BM25_K1 * (1.0 - BM25_B + BM25_B * SearchDocument.length / avgdl)))
+    )
+    return res.rowcount
+
+
+# -------------------- поиск --------------------
+
+def _next_postings(db: Session, after: Dict[str, Optional[Tuple[float, int]]],
+                   step: int) -> Dict[str, List[Tuple[int, float]]]:
+    """
+    Следующие step постингов каждого термина по убыванию (impact, candidate_id) —
+    продолжение после after[t] (None — с начала). Один запрос, по обратному
+    index scan (term, impact, candidate_id) на термин.
+    """
+    parts = []
+    for t, last in after.items():
+        q = select(SearchPosting.term, SearchPosting.candidate_id, SearchPosting.impact).where(SearchPosting.term == t)
+        if last is not None:
+            q = q.where(tuple_(SearchPosting.impact, SearchPosting.candidate_id) < last)
+        parts.append(q.order_by(SearchPosting.impact.desc(), SearchPosting.candidate_id.desc()).limit(step))
+    out: Dict[str, List[Tuple[int, float]]] = {t: [] for t in after}
+    for term, cid, impact in db.execute(union_all(*parts) if len(parts) > 1 else parts[0]).all():
+        out[term].append((cid, float(impact)))
+    for lst in out.values():
+        lst.sort(key=lambda p: (-p[1], -p[0]))
+    return out
+
+
+def _fill_missing(db: Session, need: Dict[str, List[int]]) -> List[Tuple[str, int, float]]:
+    """
+    Вклад терминов need[term] у кандидатов по PK (term, candidate_id) — для тех, кого
+    нет в прочитанной части списка термина. id — одним параметром-массивом: IN на
+    тысячи литералов дорого компилировать и планировать.
+    """
+    parts = [
+        select(SearchPosting.term, SearchPosting.candidate_id, SearchPosting.impact)
+        .where(SearchPosting.term == t, SearchPosting.candidate_id == any_(bindparam(None, ids, type_=ARRAY(Integer))))
+        for t, ids in need.items()
+    ]
+    return [(t, cid, float(imp)) for t, cid, imp in db.execute(union_all(*parts) if len(parts) > 1 else parts[0]).all()]
+
+
+def _top_k(db: Session, idf: Dict[str, float], k: int) -> Tuple[List[Tuple[int, float]], bool]:
+    """Top-k (candidate_id, score) по убыванию; второй элемент — гарантированно ли точный."""
+    step = max(settings.SEARCH_POSTINGS_CAP, k)
+    after: Dict[str, Optional[Tuple[float, int]]] = {t: None for t in idf}
+    # вклад термина у документа вне прочитанной части списка не выше cutoff (0 — список дочитан)
+    cutoff: Dict[str, float] = {}
+    known: Dict[int, Dict[str, float]] = {}
+    lower: Dict[int, float] = {}   # Σ idf·impact по известным терминам (у точных — итоговый счёт)
+    exact: set = set()
+    read = 0
+
+    def _complete(ids: Iterable[int]) -> None:
+        need: Dict[str, List[int]] = {}
+        for cid in ids:
+            if cid not in exact:
+                exact.add(cid)
+                for t, c in cutoff.items():
+                    if c > 0 and t not in known[cid]:
+                        need.setdefault(t, []).append(cid)
+        if need:
+            for term, cid, impact in _fill_missing(db, need):
+                known[cid][term] = impact
+                lower[cid] += idf[term] * impact
+
+    while True:
+        for t, lst in _next_postings(db, after, step).items():
+            w = idf[t]
+            for cid, impact in lst:
+                terms = known.get(cid)
+                if terms is None:
+                    known[cid] = {t: impact}
+                    lower[cid] = w * impact
+                elif t not in terms:
+                    terms[t] = impact
+                    lower[cid] += w * impact
+            if len(lst) < step:
+                cutoff[t] = 0.0
+                del after[t]
+            else:
+                cutoff[t] = lst[-1][1]
+                after[t] = (lst[-1][1], lst[-1][0])
+        read += step
+        # точный счёт лучших по нижней оценке даёт реалистичный порог k-го места;
+        # пока непрочитанный документ может его превзойти, дешевле читать списки дальше,
+        # чем дочитывать по PK всех кандидатов с неплотной верхней оценкой
+        _complete(cid for cid, _ in heapq.nlargest(k, lower.items(), key=itemgetter(1)))
+        kth = heapq.nlargest(k, (lower[cid] for cid in exact))[-1] if len(exact) >= k else -1.0
+        unseen = sum(idf[t] * c for t, c in cutoff.items())
+        done = not after or unseen < kth
+        if done or read >= settings.SEARCH_POSTINGS_MAX:
+            break
+        step = min(read, settings.SEARCH_POSTINGS_MAX - read)
+
+    # оставшиеся кандидаты по убыванию верхней оценки; добор по PK — пока оценка не ниже k-го.
+    # Если бюджет исчерпан, ответ всё равно приближённый: уточняются SEARCH_RESOLVE_MAX лучших
+    # по нижней оценке (без неё верхние оценки у всех близки и отбор по ним хуже)
+    order = []
+    for cid, score in lower.items():
+        if done and cid not in exact:
+            terms = known[cid]
+            score += sum(idf[t] * c for t, c in cutoff.items() if t not in terms)
+        if score >= kth or not done:
+            order.append((score, cid))
+    order.sort(key=lambda p: (-p[0], p[1]))
+    if not done:
+        del order[settings.SEARCH_RESOLVE_MAX:]
+    best: List[Tuple[float, int]] = []   # min-heap k лучших точных (score, -cid)
+    i, chunk = 0, k
+    while i < len(order):
+        kth = best[0][0] if len(best) >= k else -1.0
+        batch = [cid for bound, cid in order[i:i + chunk] if bound >= kth or not done]
+        if not batch:
+            break
+        i += chunk
+        chunk = min(chunk * 2, 4096)
+        _complete(batch)
+        for cid in batch:
+            item = (lower[cid], -cid)
+            if len(best) < k:
+                heapq.heappush(best, item)
+            elif item > best[0]:
+                heapq.heapreplace(best, item)
+
+    ranked = [(-neg, score) for score, neg in sorted(best, reverse=True)]
+    return ranked, done
+
+
+def _estimate_total(dfs: Dict[str, int], n_docs: int) -> int:
+    """Число документов хотя бы с одним термином запроса при независимых терминах."""
+    if n_docs <= 0:
+        return 0
+    miss = 1.0
+    for df in dfs.values():
+        miss *= 1.0 - min(df, n_docs) / n_docs
+    return max(max(dfs.values()), int(round(n_docs * (1.0 - miss))))
+
+
+def search(db: Session, query: str, *, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+    """
+    BM25-поиск. Возвращает {"total", "total_estimated", "page", "page_size", "items": [{candidate_id, score, ...}]}.
+    Термины запроса, которых нет в словаре, игнорируются. total — оценка (см. _estimate_total).
+    """
+    t0 = time.perf_counter()
+    page = max(1, page)
+    q_terms = list(dict.fromkeys(t for t in _tokens(query) if len(t) <= MAX_TERM_LEN))[:MAX_QUERY_TERMS]
+    empty = {"total": 0, "total_estimated": False, "page": page, "page_size": page_size, "items": [], "took_ms": 0.0}
+    if not q_terms:
+        return empty
+
+    dfs = dict(db.execute(select(SearchTerm.term, SearchTerm.df).where(SearchTerm.term.in_(q_terms))).all())
+    dfs = {t: df for t, df in dfs.items() if df > 0}
+    if not dfs:
+        empty["took_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        return empty
+
+    n_docs, _ = _corpus_stats(db)
+    n_docs = max(n_docs, max(dfs.values()))
+    idf = {t: math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)) for t, df in dfs.items()}
+    total = _estimate_total(dfs, n_docs)
+
+    ranked, exact = _top_k(db, idf, page * page_size)
+    rows = ranked[(page - 1) * page_size:]
+
+    # карточки только для страницы
+    ids = [cid for cid, _ in rows]
+    cards = {
+        c.id: c for c in db.execute(
+            select(Candidate.id, Candidate.first_name, Candidate.last_name, Candidate.email)
+            .where(Candidate.id.in_(ids))
+        ).all()
+    } if ids else {}
+
+    items = []
+    for cid, score in rows:
+        c = cards.get(cid)
+        items.append({
+            "candidate_id": cid,
+            "score": round(float(score), 4),
+            "name": f"{c.last_name} {c.first_name}".strip() if c else None,
+            "email": c.email if c else None,
+        })
+    took = (time.perf_counter() - t0) * 1000
+    logger.debug("search %r: ~%d hits, exact=%s, %.1f ms", query, total, exact, took)
+    return {
+        "total": total, "total_estimated": len(dfs) > 1, "page": page, "page_size": page_size,
+        "items": items, "took_ms": round(took, 2),
+    }
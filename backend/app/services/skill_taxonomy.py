@@ -0,0 +1,179 @@
+# backend/app/services/skill_taxonomy.py
+from __future__ import annotations
+"""
+Таксономия навыков и языков + однопроходный поиск (Aho–Corasick).
+
+Раньше каждый парсер держал свой список навыков и проверял их по одному
+(`skill in text_lower`, `re.search(rf"\\b{skill}\\b")`): время разбора росло
+линейно с размером словаря. Здесь все синонимы всех видов (skills, languages)
+компилируются в один автомат; поиск — один проход по тексту, O(len(text) + число
+совпадений) независимо от того, 100 терминов в словаре или 10 000.
+
+Нормализация: нижний регистр, ё → е (синонимы приводятся так же). Граница слова
+проверяется только с той стороны, где термин начинается/заканчивается буквой или
+цифрой: "c++", ".net", "ci/cd" находятся внутри пунктуации, а "go" — не внутри "going".
+Перекрывающиеся совпадения разрешаются в пользу самого длинного ("react native",
+а не "react"; "sql server", а не "sql").
+
+Словарь — backend/app/data/skills_taxonomy.json; SKILL_TAXONOMY_PATH — доп. файл
+того же формата, поверх встроенного (новые id добавляются, существующие заменяются).
+"""
+import json
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from backend.app.config import settings
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["Hit", "Taxonomy", "get_taxonomy", "normalize_term"]
+
+DEFAULT_TAXONOMY_PATH = Path(__file__).resolve().parents[1] / "data" / "skills_taxonomy.json"
+# виды терминов в файле таксономии (остальные ключи, например metadata, игнорируются)
+KINDS = ("skills", "languages")
+
+
+class Hit(NamedTuple):
+    id: str
+    kind: str
+    start: int
+    end: int
+
+
+def normalize_term(text: str) -> str:
+    s = text.lower()
+    if len(s) != len(text):
+        # редкие символы, у которых lower() меняет длину (İ): смещения должны совпадать с исходным текстом
+        s = "".join(ch.lower()[:1] for ch in text)
+    return s.replace("ё", "е")
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class Taxonomy:
+    """
+    Автомат Ахо–Корасик по синонимам. entries: {kind: {id: {"name": ..., "synonyms": [...]}}}.
+    """
+
+    def __init__(self, entries: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+        self._names: Dict[Tuple[str, str], str] = {}
+        # бор: переходы, ссылка неудачи, выходы (длина термина, kind, id, граница слева, граница справа)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str, str, bool, bool]]] = [[]]
+        self.size = 0
+        for kind, items in entries.items():
+            for term_id, spec in items.items():
+                self._names[(kind, term_id)] = spec.get("name") or term_id
+                for syn in {normalize_term(s.strip()) for s in spec.get("synonyms") or [term_id]}:
+                    if syn:
+                        self._add(syn, kind, term_id)
+        self._build()
+
+    def _add(self, term: str, kind: str, term_id: str) -> None:
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(term), kind, term_id, _is_word(term[0]), _is_word(term[-1])))
+        self.size += 1
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                # выходы суффиксов наследуются — при поиске не нужно ходить по цепочке неудач
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str, *, overlapping: bool = False) -> List[Hit]:
+        """Все совпадения (по возрастанию start). overlapping=False — без вложенных/пересекающихся."""
+        norm = normalize_term(text)
+        n = len(norm)
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: List[Hit] = []
+        state = 0
+        for i, ch in enumerate(norm):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for length, kind, term_id, word_start, word_end in out[state]:
+                start = end - length
+                if word_start and start > 0 and _is_word(norm[start - 1]):
+                    continue
+                if word_end and end < n and _is_word(norm[end]):
+                    continue
+                hits.append(Hit(term_id, kind, start, end))
+        hits.sort(key=lambda h: (h.start, h.start - h.end))
+        if overlapping:
+            return hits
+        # leftmost-longest: из пересекающихся остаётся начавшееся раньше, при равенстве — длиннейшее
+        result: List[Hit] = []
+        covered = 0
+        for h in hits:
+            if h.start >= covered:
+                result.append(h)
+                covered = h.end
+        return result
+
+    def extract(self, text: str, kinds: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """{kind: [id, ...]} — уникальные id в порядке первого упоминания."""
+        return self.group(self.find(text), kinds)
+
+    def group(self, hits: Iterable[Hit], kinds: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        wanted = tuple(kinds) if kinds is not None else KINDS
+        out: Dict[str, List[str]] = {k: [] for k in wanted}
+        seen = set()
+        for h in hits:
+            if h.kind in out and (h.kind, h.id) not in seen:
+                seen.add((h.kind, h.id))
+                out[h.kind].append(h.id)
+        return out
+
+    def name(self, kind: str, term_id: str) -> str:
+        """Отображаемое имя (Python, C#, английский)."""
+        return self._names.get((kind, term_id), term_id)
+
+
+def _load_entries(path: Path) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {k: v for k, v in data.items() if k in KINDS and isinstance(v, dict)}
+
+
+_taxonomy: Optional[Taxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_taxonomy() -> Taxonomy:
+    """Общий автомат процесса (строится один раз при первом обращении)."""
+    global _taxonomy
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            entries = _load_entries(DEFAULT_TAXONOMY_PATH)
+            extra = getattr(settings, "SKILL_TAXONOMY_PATH", None)
+            if extra:
+                for kind, items in _load_entries(Path(extra)).items():
+                    entries.setdefault(kind, {}).update(items)
+            _taxonomy = Taxonomy(entries)
+            logger.info("skill taxonomy: %d terms, %d states", _taxonomy.size, len(_taxonomy._goto))
+        return _taxonomy
@@ -0,0 +1,158 @@
+# backend/app/services/text_patterns.py
+from __future__ import annotations
+"""
+Общие скомпилированные регулярки парсеров резюме + замеры экстракторов.
+
+Раньше email/телефон/опыт/год/уровень языка были записаны строками прямо в
+ResumeParser, SimpleResumeParser, parser_service, evaluator_service и
+rank_from_folders — каждый со своей версией и каждый раз через re.findall(str)
+(поиск в кэше re на каждый вызов). Здесь они компилируются один раз при импорте.
+
+Все шаблоны без неограниченных повторов: длины ограничены ({1,64}, {6,14}),
+числа отсечены lookbehind/lookahead (?<!\\d) ... (?!\\d), так что работа на каждой
+позиции текста ограничена константой. Прежний email (`[...]+@[A-Za-z0-9.-]+\\.`)
+на длинном токене с точками без "@" (URL, base64, таблица) был квадратичным —
+~17 с на 100 КБ; прежний телефон `(?:\\+?\\d[\\s\\-()]{0,3}){7,}\\d` проходил любую
+серию цифр целиком и выдавал за телефон ИНН/номера документов. Новый телефон
+принимает только телефонную запись: +международный (7–15 цифр, E.164), 8/7 и
+10 цифр, (код) номер, 999 123-45-67, 123-45-67. Голая серия цифр не с 7/8 (ИНН,
+ОГРН), диапазоны лет (2019-2021), паспорт (45 06 123456) и числа сразу после
+ИНН/СНИЛС/ОГРН/КПП/БИК/№ телефоном не считаются.
+
+ExtractorTimings — замер каждого экстрактора одного документа: гистограмма
+parser_extractor_seconds{parser, field} на /metrics, а документы, разобранные
+дольше PARSER_SLOW_DOCUMENT_MS, — в лог и в список последних медленных
+(GET /config/parser-timings).
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, TypeVar
+
+from backend.app.config import settings
+from backend.app.services.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "EMAIL_RE", "PHONE_RE", "EXPERIENCE_YEARS_RES", "YEARS_COUNT_RE", "YEAR_RE", "LANGUAGE_LEVEL_RE",
+    "ExtractorTimings", "first_match", "slow_documents", "timings_report",
+]
+
+# --- шаблоны ---
+
+# локальная часть ≤ 64, метки домена ≤ 63 символов (RFC 5321/1035): повторы ограничены
+EMAIL_RE = re.compile(
+    r"(?<![\w.%+-])[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){0,8}\.[A-Za-z]{2,24}(?![\w-])"
+)
+
+# реквизиты, за которыми идёт не телефон (lookbehind фиксированной ширины — по варианту на разделитель)
+_ID_LABELS = ("ИНН", "СНИЛС", "ОГРН", "ОГРНИП", "КПП", "БИК", "№")
+_NOT_AFTER_ID_LABEL = "".join(
+    f"(?<!{re.escape(label + sep)})" for label in _ID_LABELS for sep in ("", " ", ":", ": ")
+)
+
+# только телефонная группировка цифр; не внутри серии цифр и не после реквизита
+PHONE_RE = re.compile(
+    _NOT_AFTER_ID_LABEL + r"(?<![\d-])(?:"
+    r"\+\d(?:[\s\-.()]{0,3}\d){6,14}"                                     # +7 999 123-45-67, +1 415 555 2671
+    r"|[78][\s\-]{0,2}\(?\d{3}\)?[\s\-]{0,2}\d{3}[\s\-]?\d{2}[\s\-]?\d{2}"  # 8 (999) 123-45-67, 89991234567
+    r"|\(\d{3,5}\)\s?\d{1,3}[\s\-]?\d{2}[\s\-]?\d{2}"                     # (495) 123-45-67
+    r"|\d{3}[\s\-]\d{3}[\s\-]\d{2}[\s\-]\d{2}"                            # 999 123-45-67
+    r"|\d{3}-\d{2}-\d{2}"                                                 # 123-45-67
+    r")(?!-?\d)",
+    re.IGNORECASE,
+)
+
+# "5 лет опыта", "опыт 3 года", "стаж 10 лет" — по приоритету; число — не часть другого числа
+EXPERIENCE_YEARS_RES = (
+    re.compile(r"(?<!\d)(\d{1,2})\s{0,3}(?:лет|года?|years?)\s{0,3}(?:опыта?|experience)", re.IGNORECASE),
+    re.compile(r"(?:опыт|experience)\s{0,3}(\d{1,2})\s{0,3}(?:лет|года?|years?)", re.IGNORECASE),
+    re.compile(r"(?:стаж|seniority)\s{0,3}(\d{1,2})\s{0,3}(?:лет|года?|years?)", re.IGNORECASE),
+)
+
+# любое "N лет/год(а)" (грубая оценка опыта по тексту)
+YEARS_COUNT_RE = re.compile(r"(?<!\d)(\d{1,2})\s{0,3}(?:год|лет)", re.IGNORECASE)
+
+# год 20xx отдельным числом (не кусок телефона или номера)
+YEAR_RE = re.compile(r"(?<!\d)20\d{2}(?!\d)")
+
+# уровень владения языком (ищется в нижнем регистре рядом с названием языка)
+LANGUAGE_LEVEL_RE = re.compile(r"\b(a1|a2|b1|b2|c1|c2|native|fluent|intermediate|basic)\b")
+
+
+def first_match(pattern: "re.Pattern[str]", text: str, default: str = "") -> str:
+    m = pattern.search(text or "")
+    return m.group(0) if m else default
+
+
+# --- замеры экстракторов ---
+
+T = TypeVar("T")
+
+_extractor_seconds = get_registry().histogram(
+    "parser_extractor_seconds", "Время одного экстрактора парсера резюме",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+_slow_documents = get_registry().counter("parser_slow_documents_total", "Документы, разобранные дольше порога")
+
+_slow: Deque[Dict[str, Any]] = deque(maxlen=50)
+_slow_lock = threading.Lock()
+
+
+class ExtractorTimings:
+    """Замеры экстракторов одного документа (parser — метка: resume_parser, simple_parser, ...)."""
+
+    def __init__(self, parser: str) -> None:
+        self.parser = parser
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def measure(self, field: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            self.timings[field] = self.timings.get(field, 0.0) + dt
+            _extractor_seconds.labels(parser=self.parser, field=field).observe(dt)
+
+    def run(self, field: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self.measure(field):
+            return fn(*args, **kwargs)
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
+
+    def report(self, text: str = "") -> Dict[str, float]:
+        """Итог по документу (мс); медленный документ — в лог и в slow_documents()."""
+        report = {k: round(v * 1000, 3) for k, v in sorted(self.timings.items(), key=lambda kv: -kv[1])}
+        total_ms = self.total * 1000
+        if total_ms >= settings.PARSER_SLOW_DOCUMENT_MS:
+            _slow_documents.labels(parser=self.parser).inc()
+            entry = {
+                "parser": self.parser, "total_ms": round(total_ms, 3), "chars": len(text),
+                "head": text[:80], "timings_ms": report, "at": time.time(),
+            }
+            with _slow_lock:
+                _slow.append(entry)
+            logger.warning("%s: slow document (%.1f ms, %d chars): %s", self.parser, total_ms, len(text), report)
+        return report
+
+
+def slow_documents() -> List[Dict[str, Any]]:
+    with _slow_lock:
+        return list(_slow)
+
+
+def timings_report() -> Dict[str, Any]:
+    """Сводка по экстракторам (count/avg/p50/p90/p99, с) + последние медленные документы."""
+    return {
+        "threshold_ms": settings.PARSER_SLOW_DOCUMENT_MS,
+        "extractors": _extractor_seconds.snapshot(),
+        "slow_documents": slow_documents(),
+    }
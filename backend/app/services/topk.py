@@ -0,0 +1,62 @@
+# backend/app/services/topk.py
+from __future__ import annotations
+"""
+Ограниченный top-k по мере поступления оценок.
+
+Вместо «собрать всё в список → отсортировать → срезать top_k» держим min-кучу
+из k лучших: push — O(log k), память — O(k). Равные оценки упорядочиваются
+стабильно по ключу порядка order (по умолчанию — порядок добавления): раньше
+добавленный выше. Снимок (items/snapshot) можно брать в любой момент —
+промежуточный лидерборд, пока скоринг ещё идёт.
+"""
+import heapq
+import itertools
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+__all__ = ["TopK"]
+
+T = TypeVar("T")
+
+
+class TopK(Generic[T]):
+    """k лучших элементов по score; k=None/0 — без ограничения (полная сортировка в конце)."""
+
+    def __init__(self, k: Optional[int]) -> None:
+        self.k = k if k and k > 0 else None
+        # (score, -order, -seq, item): в корне кучи — худший (меньший score, при равенстве — поздний);
+        # seq уникален, так что до сравнения самих item дело не доходит
+        self._heap: List[Tuple[float, float, int, T]] = []
+        self._counter = itertools.count()
+        self.pushed = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: T, score: float, order: Optional[float] = None) -> bool:
+        """Добавляет элемент; True, если он вошёл в текущий top-k."""
+        seq = next(self._counter)
+        entry = (float(score), -(seq if order is None else order), -seq, item)
+        self.pushed += 1
+        if self.k is None or len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:3] <= self._heap[0][:3]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def min_score(self) -> Optional[float]:
+        """Порог входа в top-k (None, пока куча не заполнена)."""
+        if self.k is None or len(self._heap) < self.k:
+            return None
+        return self._heap[0][0]
+
+    def items(self) -> List[T]:
+        """Элементы по убыванию score (при равенстве — по порядку)."""
+        return [e[3] for e in sorted(self._heap, key=lambda e: e[:3], reverse=True)]
+
+    def snapshot(self, n: Optional[int] = None) -> List[T]:
+        """Первые n элементов текущего рейтинга (промежуточный лидерборд)."""
+        if n is None or (self.k is not None and n >= self.k):
+            return self.items()
+        return [e[3] for e in heapq.nlargest(n, self._heap, key=lambda e: e[:3])]
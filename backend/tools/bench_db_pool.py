@@ -0,0 +1,119 @@
+# backend/tools/bench_db_pool.py
+from __future__ import annotations
+"""
+Бенчмарк пула соединений: запросов в секунду при разных стратегиях проверки соединений.
+
+    python -m backend.tools.bench_db_pool --workers 32 --duration 10
+    python -m backend.tools.bench_db_pool --url postgresql+psycopg://... --queries 3 --modes legacy,pre_ping
+
+Режимы:
+  legacy     — как было: pool_pre_ping + listener на checkout с SELECT 1 (два лишних round trip);
+  pre_ping   — только pool_pre_ping (текущая конфигурация по умолчанию);
+  optimistic — без проверок при выдаче (DB_POOL_PRE_PING=False).
+
+«Запрос» — checkout соединения + --queries коротких SELECT + возврат в пул, как в
+типичном обработчике API. Остальные параметры пула — из Settings (DB_POOL_*).
+"""
+import argparse
+import statistics
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import create_engine, event, text
+
+from backend.app.config import settings
+from backend.app.database import DB_URL, pool_options
+
+MODES = ("legacy", "pre_ping", "optimistic")
+
+
+def _make_engine(url: str, mode: str):
+    opts = pool_options()
+    opts["pool_pre_ping"] = mode != "optimistic"
+    connect_args: Dict[str, Any] = {}
+    if url.startswith("postgresql"):
+        connect_args = {"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    eng = create_engine(url, connect_args=connect_args, **opts)
+    if mode == "legacy":
+        @event.listens_for(eng, "checkout")
+        def _ping(dbapi_conn, *_):
+            cur = dbapi_conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+            finally:
+                cur.close()
+    return eng
+
+
+def run_mode(url: str, mode: str, workers: int, duration: float, queries: int) -> Dict[str, Any]:
+    eng = _make_engine(url, mode)
+    # прогрев: заполняем пул, чтобы не мерить установку соединений
+    conns = [eng.connect() for _ in range(min(workers, settings.DB_POOL_SIZE))]
+    for c in conns:
+        c.close()
+
+    latencies: List[List[float]] = [[] for _ in range(workers)]
+    errors = [0] * workers
+    stop_at = time.perf_counter() + duration
+
+    def _worker(i: int) -> None:
+        lat = latencies[i]
+        while time.perf_counter() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                with eng.connect() as conn:
+                    for _ in range(queries):
+                        conn.execute(text("SELECT 1")).scalar()
+            except Exception:
+                errors[i] += 1
+                continue
+            lat.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    eng.dispose()
+
+    flat = sorted(x for lat in latencies for x in lat)
+    n = len(flat)
+    return {
+        "mode": mode,
+        "requests": n,
+        "errors": sum(errors),
+        "rps": round(n / elapsed, 1),
+        "p50_ms": round(1000 * statistics.median(flat), 3) if n else None,
+        "p99_ms": round(1000 * flat[min(n - 1, int(0.99 * n))], 3) if n else None,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="DB pool throughput benchmark")
+    ap.add_argument("--url", default=DB_URL, help="DSN (по умолчанию — из настроек)")
+    ap.add_argument("--workers", type=int, default=16, help="Параллельных «клиентов»")
+    ap.add_argument("--duration", type=float, default=5.0, help="Длительность прогона на режим, с")
+    ap.add_argument("--queries", type=int, default=1, help="SELECT на один запрос")
+    ap.add_argument("--modes", default=",".join(MODES), help="Режимы через запятую")
+    args = ap.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for m in modes:
+        if m not in MODES:
+            ap.error(f"unknown mode: {m}")
+
+    print(f"workers={args.workers} duration={args.duration}s queries/request={args.queries} "
+          f"pool_size={settings.DB_POOL_SIZE} max_overflow={settings.DB_MAX_OVERFLOW}")
+    results = [run_mode(args.url, m, args.workers, args.duration, args.queries) for m in modes]
+    base = results[0]["rps"] or 1.0
+    print(f"{'mode':<12}{'req/s':>10}{'vs ' + results[0]['mode']:>14}{'p50, ms':>10}{'p99, ms':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['mode']:<12}{r['rps']:>10}{r['rps'] / base:>13.2f}x"
+              f"{r['p50_ms'] or 0:>10}{r['p99_ms'] or 0:>10}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# backend/tools/bench_extractors.py
+from __future__ import annotations
+"""
+Бенчмарк бэкендов извлечения текста (document_extractor): скорость и точность.
+
+    python -m backend.tools.bench_extractors --size 100
+    python -m backend.tools.bench_extractors --corpus ./fixtures --repeat 3
+
+Корпус:
+  --corpus DIR — любые файлы каталога; эталон текста (необязательно) — рядом,
+               <имя>.expected.txt (UTF-8). Формат определяется по сигнатуре, как в движке;
+  иначе      — синтетические резюме (bench_resume_sections.synthetic_corpus) в форматах
+               txt (UTF-8 и cp1251), rtf (кириллица через \\uN), docx (python-docx,
+               навыки — таблицей) и pdf (минимальный PDF, Helvetica, текст в транслите).
+               .doc синтетически не генерируется — только из --corpus.
+
+Для каждого формата прогоняются все доступные бэкенды, включая default=False
+(pypdf/pdfminer в текущем процессе рядом с пулом pdf_pool). Выводятся docs/s, MB/s,
+точность — средний F1 по словам против нормализованного эталона — и число ошибок.
+"""
+import argparse
+import io
+import logging
+import re
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.app.services.document_extractor import (
+    DocumentExtractionError, PdfExtractionTimeout, _normalize_text, backends_for, extract_document, sniff_format,
+)
+from backend.app.services.pdf_extractor import close_pdf_pool
+from backend.tools.bench_resume_sections import synthetic_corpus
+
+# (имя файла, байты, эталон или None)
+Doc = Tuple[str, bytes, Optional[str]]
+
+_WORD_RE = re.compile(r"\w+")
+
+_TRANSLIT = dict(zip(
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюя",
+    ["a", "b", "v", "g", "d", "e", "e", "zh", "z", "i", "y", "k", "l", "m", "n", "o", "p", "r", "s", "t", "u",
+     "f", "kh", "ts", "ch", "sh", "shch", "", "y", "", "e", "yu", "ya"],
+))
+
+
+def _translit(text: str) -> str:
+    out = []
+    for ch in text:
+        low = ch.lower()
+        if low in _TRANSLIT:
+            t = _TRANSLIT[low]
+            out.append(t.capitalize() if ch != low else t)
+        elif ord(ch) < 128:
+            out.append(ch)
+        else:
+            out.append({"—": "-", "–": "-", "«": '"', "»": '"'}.get(ch, "?"))
+    return "".join(out)
+
+
+# --- генераторы форматов ---
+
+def _rtf_bytes(text: str) -> bytes:
+    body = []
+    for ch in text:
+        if ch == "\n":
+            body.append("\\par\n")
+        elif ch in "\\{}":
+            body.append("\\" + ch)
+        elif ord(ch) < 128:
+            body.append(ch)
+        else:
+            code = ord(ch)
+            body.append(f"\\u{code - 65536 if code > 32767 else code}?")
+    head = "{\\rtf1\\ansi\\ansicpg1251\\deff0{\\fonttbl{\\f0 Times New Roman;}}{\\info{\\title Resume}}\\uc1\\f0 "
+    return (head + "".join(body) + "}").encode("ascii")
+
+
+def _docx_bytes(text: str) -> bytes:
+    from docx import Document
+
+    doc = Document()
+    lines = text.split("\n")
+    # строка после заголовка навыков — таблицей (проверяет извлечение таблиц)
+    for i, line in enumerate(lines):
+        prev = lines[i - 1].strip().rstrip(":").lower() if i else ""
+        if prev in ("навыки", "skills", "технологии", "ключевые компетенции") and "," in line:
+            skills = [s.strip() for s in line.split(",")]
+            table = doc.add_table(rows=1, cols=len(skills))
+            for cell, skill in zip(table.rows[0].cells, skills):
+                cell.text = skill
+        else:
+            doc.add_paragraph(line)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_bytes(text: str, lines_per_page: int = 50) -> bytes:
+    """Минимальный PDF 1.4: Helvetica (WinAnsi), по строке на Tj, без сжатия."""
+    lines = text.split("\n")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    n_pages = len(pages)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n_pages))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for i, page in enumerate(pages):
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in page]
+        ops.append("ET")
+        stream = "\n".join(ops)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    out += "".join(f"{off:010d} 00000 n \n" for off in offsets).encode("ascii")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+    return bytes(out)
+
+
+def synthetic_documents(size: int, seed: int) -> Dict[str, List[Doc]]:
+    texts = synthetic_corpus(size, seed)
+    docs: Dict[str, List[Doc]] = {"txt": [], "rtf": [], "docx": [], "pdf": []}
+    for i, text in enumerate(texts):
+        # половина txt — в cp1251 (проверяет запасную кодировку)
+        if i % 2:
+            docs["txt"].append((f"{i}.txt", text.encode("cp1251", errors="replace"), text))
+        else:
+            docs["txt"].append((f"{i}.txt", text.encode("utf-8"), text))
+        docs["rtf"].append((f"{i}.rtf", _rtf_bytes(text), text))
+        docs["docx"].append((f"{i}.docx", _docx_bytes(text), text))
+        latin = _translit(text)
+        docs["pdf"].append((f"{i}.pdf", _pdf_bytes(latin), latin))
+    return docs
+
+
+def load_documents(path: Path) -> Dict[str, List[Doc]]:
+    docs: Dict[str, List[Doc]] = {}
+    for p in sorted(path.iterdir()):
+        if not p.is_file() or p.name.endswith(".expected.txt"):
+            continue
+        data = p.read_bytes()
+        ref_path = p.with_name(p.stem + ".expected.txt")
+        ref = ref_path.read_text(encoding="utf-8") if ref_path.exists() else None
+        docs.setdefault(sniff_format(data, p.suffix), []).append((p.name, data, ref))
+    return docs
+
+
+# --- замеры ---
+
+def token_f1(reference: str, text: str) -> float:
+    ref = Counter(w.lower() for w in _WORD_RE.findall(_normalize_text(reference)))
+    got = Counter(w.lower() for w in _WORD_RE.findall(text))
+    if not ref and not got:
+        return 1.0
+    common = sum((ref & got).values())
+    if not common:
+        return 0.0
+    precision = common / sum(got.values())
+    recall = common / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def bench_backend(docs: List[Doc], backend: str, repeat: int) -> Dict[str, Any]:
+    total_bytes = sum(len(data) for _, data, _ in docs)
+    elapsed = 0.0
+    failures = 0
+    scores: List[float] = []
+    for name, data, ref in docs:
+        text: Optional[str] = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            try:
+                text = extract_document(data, hint=name.rsplit(".", 1)[-1], backend=backend).text
+            except (DocumentExtractionError, PdfExtractionTimeout):
+                text = None
+            elapsed += time.perf_counter() - t0
+        if text is None:
+            failures += 1
+        elif ref is not None:
+            scores.append(token_f1(ref, text))
+    elapsed /= repeat
+    return {
+        "backend": backend,
+        "docs_per_s": round(len(docs) / elapsed, 1) if elapsed else None,
+        "mb_per_s": round(total_bytes / 2 ** 20 / elapsed, 2) if elapsed else None,
+        "fidelity": round(statistics.mean(scores), 3) if scores else None,
+        "failures": failures,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Document text extraction backends benchmark")
+    ap.add_argument("--size", type=int, default=100, help="Документов каждого формата в синтетическом корпусе")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--corpus", type=Path, default=None, help="Каталог с документами (+ <имя>.expected.txt)")
+    ap.add_argument("--repeat", type=int, default=1, help="Повторов на документ (берётся среднее)")
+    ap.add_argument("--formats", default="", help="Только эти форматы, через запятую (pdf,docx,doc,rtf,txt)")
+    args = ap.parse_args()
+    # как в рабочих процессах pdf_extractor: предупреждения о шрифтах на каждой странице не нужны
+    for name in ("pypdf", "pdfminer"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    docs = load_documents(args.corpus) if args.corpus else synthetic_documents(args.size, args.seed)
+    wanted = {f.strip() for f in args.formats.split(",") if f.strip()}
+    try:
+        print(f"{'format':<8}{'backend':<14}{'docs':>6}{'docs/s':>10}{'MB/s':>8}{'F1':>8}{'fail':>6}")
+        for fmt, fmt_docs in sorted(docs.items()):
+            if wanted and fmt not in wanted:
+                continue
+            backends = backends_for(fmt, include_optional=True)
+            if not backends:
+                print(f"{fmt:<8}{'-':<14}{len(fmt_docs):>6}  no backend available")
+                continue
+            for b in backends:
+                # прогрев: запуск пула процессов, импорт библиотек — не в замер
+                try:
+                    extract_document(fmt_docs[0][1], hint=fmt, backend=b.name)
+                except (DocumentExtractionError, PdfExtractionTimeout):
+                    pass
+                r = bench_backend(fmt_docs, b.name, args.repeat)
+                fidelity = "-" if r["fidelity"] is None else r["fidelity"]
+                print(f"{fmt:<8}{b.name + ('' if b.default else '*'):<14}{len(fmt_docs):>6}"
+                      f"{r['docs_per_s']:>10}{r['mb_per_s']:>8}{fidelity:>8}{r['failures']:>6}")
+        print("* — не используется движком по умолчанию (только для сравнения)")
+    finally:
+        close_pdf_pool()
+
+
+if __name__ == "__main__":
+    main()
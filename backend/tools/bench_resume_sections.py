@@ -0,0 +1,200 @@
+# backend/tools/bench_resume_sections.py
+from __future__ import annotations
+"""
+Бенчмарк разметки резюме на секции: прежний _find_section против однопроходного
+ResumeParser.segment.
+
+    python -m backend.tools.bench_resume_sections --size 500
+    python -m backend.tools.bench_resume_sections --corpus ./resumes_txt --repeat 5
+
+Корпус — синтетический (--size резюме, RU/EN заголовки, случайный порядок и длина
+секций, воспроизводимо по --seed) или *.txt из --corpus.
+
+Режимы:
+  legacy  — как было: каждый из четырёх экстракторов (skills, education, experience,
+            summary) вызывает _find_section, который заново приводит хвост текста к
+            нижнему регистру для каждого ключевого слова каждой другой секции;
+  segment — одна карта секций на документ, общая для всех экстракторов.
+
+Дополнительно меряется полный разбор полей (ResumeParser без кэша и извлечения текста)
+и доля найденных секций, которые «проглотили» заголовок следующей (прежний поиск
+не обрывал секцию раньше 100 символов от её начала).
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from backend.app.services.resume_parser import ResumeParser
+
+SECTIONS = ("skills", "education", "experience", "summary")
+
+_HEADERS = {
+    "summary": ["О себе", "Summary", "Обо мне", "Профиль"],
+    "experience": ["Опыт работы", "Experience", "Карьера"],
+    "education": ["Образование", "Education"],
+    "skills": ["Навыки", "Skills", "Технологии", "Ключевые компетенции"],
+    "contacts": ["Контакты", "Contacts"],
+}
+_SKILLS = ["Python", "Django", "FastAPI", "PostgreSQL", "Docker", "Kubernetes", "React", "TypeScript",
+           "Go", "Java", "Spring", "Kafka", "Redis", "Linux", "Git", "CI/CD", "Terraform", "C++", "SQL"]
+_FILLER = ("разработка и поддержка сервисов высоконагруженной платформы, проектирование API, "
+           "code review, наставничество, оптимизация запросов, участие в планировании релизов, "
+           "developed internal tooling, improved latency and reliability of the billing pipeline, ").split(", ")
+_COMPANIES = ["ООО Ромашка", "Яндекс", "Сбер", "Acme Corp", "Тинькофф", "Globex", "VK", "Initech"]
+_UNIS = ["МГУ им. Ломоносова, факультет ВМК", "МФТИ, прикладная математика",
+         "Санкт-Петербургский государственный университет", "Novosibirsk State University"]
+
+
+def _paragraph(rng: random.Random, lo: int, hi: int) -> str:
+    return ", ".join(rng.choice(_FILLER) for _ in range(rng.randint(lo, hi))).capitalize() + "."
+
+
+def _section_body(kind: str, rng: random.Random) -> str:
+    if kind == "summary":
+        return _paragraph(rng, 3, 12)
+    if kind == "skills":
+        return ", ".join(rng.sample(_SKILLS, rng.randint(5, 14)))
+    if kind == "education":
+        return "\n".join(f"{rng.choice(_UNIS)}, {rng.randint(2000, 2020)}" for _ in range(rng.randint(1, 3)))
+    if kind == "contacts":
+        return f"Телефон: +7 9{rng.randint(10, 99)} {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}\n" \
+               f"Email: user{rng.randint(1, 9999)}@example.com"
+    jobs = []
+    year = rng.randint(2008, 2016)
+    for _ in range(rng.randint(1, 6)):
+        end = year + rng.randint(1, 3)
+        jobs.append(f"{year} — {end}: {rng.choice(_COMPANIES)}, разработчик\n" + _paragraph(rng, 4, 20))
+        year = end
+    return "\n".join(jobs)
+
+
+def synthetic_corpus(size: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    docs = []
+    for i in range(size):
+        kinds = [k for k in _HEADERS if rng.random() < 0.9]
+        rng.shuffle(kinds)
+        parts = [f"Иван{i} Петров", ""]
+        for kind in kinds:
+            parts.append(rng.choice(_HEADERS[kind]) + rng.choice(["", ":"]))
+            parts.append(_section_body(kind, rng))
+            parts.append("")
+        docs.append("\n".join(parts))
+    return docs
+
+
+def load_corpus(path: Path) -> List[str]:
+    return [p.read_text(encoding="utf-8", errors="ignore") for p in sorted(path.glob("*.txt"))]
+
+
+def legacy_find_section(section_keywords: Dict[str, List[str]], text: str, section_type: str) -> str:
+    """Прежняя реализация ResumeParser._find_section (для сравнения)."""
+    keywords = section_keywords.get(section_type, [])
+    text_lower = text.lower()
+    for keyword in keywords:
+        pos = text_lower.find(keyword)
+        if pos != -1:
+            section_text = text[pos:]
+            min_next_pos = len(section_text)
+            for other_type, other_keywords in section_keywords.items():
+                if other_type != section_type:
+                    for other_keyword in other_keywords:
+                        next_pos = section_text.lower().find(other_keyword)
+                        if next_pos > 100 and next_pos < min_next_pos:
+                            min_next_pos = next_pos
+            return section_text[:min_next_pos]
+    return ""
+
+
+def _bleed_rate(docs: List[str], find: Callable[[str, str], str]) -> float:
+    """% найденных секций, внутри которых есть строка-заголовок другой секции."""
+    headers = {h.lower() for variants in _HEADERS.values() for h in variants}
+    found = bleed = 0
+    for doc in docs:
+        for section_type in SECTIONS:
+            lines = find(doc, section_type).split("\n")
+            if not lines[0]:
+                continue
+            found += 1
+            bleed += any(line.strip().rstrip(":").lower() in headers for line in lines[1:])
+    return 100 * bleed / found if found else 0.0
+
+
+def _time_docs(docs: List[str], fn: Callable[[str], Any], repeat: int) -> List[float]:
+    per_doc = [0.0] * len(docs)
+    for _ in range(repeat):
+        for i, doc in enumerate(docs):
+            t0 = time.perf_counter()
+            fn(doc)
+            per_doc[i] += time.perf_counter() - t0
+    return [t / repeat for t in per_doc]
+
+
+def _summary(name: str, per_doc: List[float]) -> Dict[str, Any]:
+    flat = sorted(per_doc)
+    n = len(flat)
+    total = sum(flat)
+    return {
+        "mode": name,
+        "docs_per_s": round(n / total, 1) if total else None,
+        "p50_ms": round(1000 * statistics.median(flat), 3),
+        "p99_ms": round(1000 * flat[min(n - 1, int(0.99 * n))], 3),
+        "total_s": round(total, 4),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Resume section segmentation benchmark")
+    ap.add_argument("--size", type=int, default=500, help="Размер синтетического корпуса")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--corpus", type=Path, default=None, help="Каталог с *.txt вместо синтетики")
+    ap.add_argument("--repeat", type=int, default=3, help="Повторов на документ (берётся среднее)")
+    args = ap.parse_args()
+
+    docs = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.size, args.seed)
+    if not docs:
+        ap.error("empty corpus")
+    parser = ResumeParser()
+    kw = parser.section_keywords
+
+    def _legacy(doc: str) -> None:
+        for section_type in SECTIONS:
+            legacy_find_section(kw, doc, section_type)
+
+    def _segment(doc: str) -> None:
+        sections = parser.segment(doc)
+        for section_type in SECTIONS:
+            sections.get(section_type)
+
+    def _fields(doc: str) -> None:
+        hits = parser.taxonomy.find(doc)
+        sections = parser.segment(doc)
+        parser._extract_skills(doc, hits, sections)
+        parser._extract_education(doc, sections)
+        parser._extract_experience_section(doc, sections)
+        parser._extract_summary(doc, sections)
+        parser._extract_languages(doc, hits)
+
+    legacy_bleed = _bleed_rate(docs, lambda doc, t: legacy_find_section(kw, doc, t))
+    segment_bleed = _bleed_rate(docs, lambda doc, t: parser.segment(doc).get(t))
+    avg_len = sum(map(len, docs)) / len(docs)
+    print(f"docs={len(docs)} avg_chars={avg_len:.0f} repeat={args.repeat} "
+          f"swallowed_headers: legacy={legacy_bleed:.1f}% segment={segment_bleed:.1f}%")
+
+    results = [
+        _summary("legacy", _time_docs(docs, _legacy, args.repeat)),
+        _summary("segment", _time_docs(docs, _segment, args.repeat)),
+        _summary("fields", _time_docs(docs, _fields, args.repeat)),
+    ]
+    base = results[0]["docs_per_s"] or 1.0
+    print(f"{'mode':<10}{'docs/s':>12}{'vs legacy':>12}{'p50, ms':>10}{'p99, ms':>10}{'total, s':>10}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['docs_per_s']:>12}{(r['docs_per_s'] or 0) / base:>11.2f}x"
+              f"{r['p50_ms']:>10}{r['p99_ms']:>10}{r['total_s']:>10}")
+
+
+if __name__ == "__main__":
+    main()
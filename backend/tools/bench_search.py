@@ -0,0 +1,234 @@
+# backend/tools/bench_search.py
+from __future__ import annotations
+"""
+Бенчмарк полнотекстового поиска на большом индексе: прежний BM25 по всем постингам
+(count(distinct) + GROUP BY/сортировка) против top-k с отсечением по impact
+(search_service.search).
+
+    python -m backend.tools.bench_search --docs 1000000
+    python -m backend.tools.bench_search --docs 1000000 --reuse --repeat 20
+
+Индекс строится синтетически в отдельной схеме (--schema, по умолчанию bench_search)
+той же БД — рабочие таблицы не затрагиваются; модели мапятся на неё через
+schema_translate_map. Термины документов — по закону Ципфа из словаря --vocab
+(первые ранги — частые слова резюме: «опыт», «python», ...), длина документа —
+равномерно в --min-len..--max-len токенов. Загрузка — COPY, индексы строятся после.
+
+Запросы по группам: rare (редкие термины), common (термины из половины корпуса и
+чаще), mixed (частый + редкий), multi (3–4 частых). Для каждого — p50/p99 latency
+обоих способов, доля запросов с той же первой страницей (id в том же порядке),
+recall первой страницы и ошибка оценки total против точного count(distinct).
+"""
+import argparse
+import io
+import math
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import case, create_engine, func, literal, select, text
+from sqlalchemy.orm import Session
+
+from backend.app.database import DB_URL
+from backend.app.models.candidate import Candidate
+from backend.app.models.search_index import SearchDocument, SearchPosting, SearchTerm
+from backend.app.services import search_service
+from backend.app.services.search_service import BM25_B, BM25_K1, search
+
+_COMMON = ["опыт", "работы", "разработка", "python", "sql", "проектов", "лет", "команде", "git", "linux",
+           "docker", "api", "данных", "java", "postgresql", "javascript", "react", "менеджер", "аналитик", "kafka"]
+_TABLES = [Candidate.__table__, SearchDocument.__table__, SearchTerm.__table__, SearchPosting.__table__]
+
+
+def _terms(vocab: int) -> List[str]:
+    return _COMMON + [f"w{r}" for r in range(len(_COMMON), vocab)]
+
+
+def _copy(conn, sql: str, lines: Callable[[], Any]) -> None:
+    raw = conn.connection.driver_connection
+    with raw.cursor() as cur, cur.copy(sql) as cp:
+        for chunk in lines():
+            cp.write(chunk)
+
+
+def build_index(engine, schema: str, docs: int, vocab: int, min_len: int, max_len: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    terms = _terms(vocab)
+    ranks = np.arange(1, vocab + 1, dtype=np.float64)
+    probs = ranks ** -1.05
+    probs /= probs.sum()
+    lengths = rng.integers(min_len, max_len + 1, size=docs)
+    avgdl = float(lengths.mean())
+    df = np.zeros(vocab, dtype=np.int64)
+
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+        tconn = conn.execution_options(schema_translate_map={None: schema})
+        for table in _TABLES:
+            table.create(tconn)
+        # загрузка без вторичных индексов, PK и FK — всё это строится после COPY
+        for table in ("search_postings", "search_documents", "search_terms"):
+            for (name,) in conn.execute(text(
+                "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:t AS regclass) AND contype IN ('p', 'f')"
+            ), {"t": f'"{schema}".{table}'}):
+                conn.execute(text(f'ALTER TABLE "{schema}".{table} DROP CONSTRAINT "{name}"'))
+        for idx in SearchPosting.__table__.indexes:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{schema}"."{idx.name}"'))
+
+    def _candidates():
+        for s in range(0, docs, 50_000):
+            yield "".join(f"{i}\tКандидат\t{i}\tc{i}@bench.local\n" for i in range(s + 1, min(docs, s + 50_000) + 1))
+
+    def _documents():
+        for s in range(0, docs, 50_000):
+            yield "".join(f"{i + 1}\t{lengths[i]}\n" for i in range(s, min(docs, s + 50_000)))
+
+    def _postings():
+        chunk = 20_000
+        for s in range(0, docs, chunk):
+            lens = lengths[s:s + chunk]
+            draws = rng.choice(vocab, size=int(lens.sum()), p=probs)
+            doc_idx = np.repeat(np.arange(len(lens)), lens)
+            keys, tf = np.unique(doc_idx.astype(np.int64) * vocab + draws, return_counts=True)
+            d, t = np.divmod(keys, vocab)
+            np.add.at(df, t, 1)
+            dl = lens[d]
+            impact = tf * (BM25_K1 + 1.0) / (tf + BM25_K1 * (1.0 - BM25_B + BM25_B * dl / avgdl))
+            buf = io.StringIO()
+            for term_id, cid, n, imp in zip(t.tolist(), (d + s + 1).tolist(), tf.tolist(), impact.tolist()):
+                buf.write(f"{terms[term_id]}\t{cid}\t{n}\t{imp!r}\n")
+            yield buf.getvalue()
+            print(f"  postings: {min(docs, s + chunk)}/{docs} docs", end="\r", flush=True)
+        print()
+
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        _copy(conn, f'COPY "{schema}".candidates (id, first_name, last_name, email) FROM STDIN', _candidates)
+        _copy(conn, f'COPY "{schema}".search_documents (candidate_id, length) FROM STDIN', _documents)
+        _copy(conn, f'COPY "{schema}".search_postings (term, candidate_id, tf, impact) FROM STDIN', _postings)
+        _copy(conn, f'COPY "{schema}".search_terms (term, df) FROM STDIN',
+              lambda: ["".join(f"{terms[i]}\t{n}\n" for i, n in enumerate(df.tolist()) if n)])
+    print(f"loaded in {time.perf_counter() - t0:.0f}s, building indexes...")
+
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE "{schema}".search_documents ADD PRIMARY KEY (candidate_id)'))
+        conn.execute(text(f'ALTER TABLE "{schema}".search_terms ADD PRIMARY KEY (term)'))
+        conn.execute(text(f'ALTER TABLE "{schema}".search_postings ADD PRIMARY KEY (term, candidate_id)'))
+        tconn = conn.execution_options(schema_translate_map={None: schema})
+        for idx in SearchPosting.__table__.indexes:
+            idx.create(tconn)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f'VACUUM ANALYZE "{schema}".search_postings'))
+        conn.execute(text(f'VACUUM ANALYZE "{schema}".search_documents'))
+        conn.execute(text(f'VACUUM ANALYZE "{schema}".search_terms'))
+    print(f"indexes in {time.perf_counter() - t0:.0f}s")
+
+
+def legacy_search(db: Session, query: str, page_size: int = 20) -> Tuple[int, List[int]]:
+    """Прежний search: BM25 по всем постингам терминов, total — count(distinct)."""
+    q_terms = list(dict.fromkeys(search_service._tokens(query)))
+    dfs = dict(db.execute(select(SearchTerm.term, SearchTerm.df).where(SearchTerm.term.in_(q_terms))).all())
+    if not dfs:
+        return 0, []
+    n_docs, avgdl = search_service._corpus_stats(db)
+    idf = {t: math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)) for t, df in dfs.items()}
+    idf_expr = case(*((SearchPosting.term == t, literal(w)) for t, w in idf.items()), else_=literal(0.0))
+    tf = SearchPosting.tf
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * SearchDocument.length / avgdl)
+    score = func.sum(idf_expr * tf * (BM25_K1 + 1.0) / (tf + norm)).label("score")
+    hits = (
+        select(SearchPosting.candidate_id, score)
+        .join(SearchDocument, SearchDocument.candidate_id == SearchPosting.candidate_id)
+        .where(SearchPosting.term.in_(list(idf)))
+        .group_by(SearchPosting.candidate_id)
+    )
+    total = db.execute(
+        select(func.count(func.distinct(SearchPosting.candidate_id))).where(SearchPosting.term.in_(list(idf)))
+    ).scalar_one()
+    rows = db.execute(hits.order_by(score.desc(), SearchPosting.candidate_id).limit(page_size)).all()
+    return int(total), [r.candidate_id for r in rows]
+
+
+def _queries(vocab: int, per_group: int, seed: int) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    terms = _terms(vocab)
+    rare = lambda: terms[rng.randint(vocab // 10, vocab - 1)]  # noqa: E731
+    common = lambda: terms[rng.randint(0, 9)]  # noqa: E731
+    return {
+        "rare": [rare() for _ in range(per_group)],
+        "common": [common() for _ in range(per_group)],
+        "mixed": [f"{common()} {rare()}" for _ in range(per_group)],
+        "multi": [" ".join(rng.sample(terms[:20], rng.randint(3, 4))) for _ in range(per_group)],
+    }
+
+
+def _pct(values: List[float], q: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Full-text search benchmark on a synthetic index")
+    ap.add_argument("--url", default=DB_URL)
+    ap.add_argument("--schema", default="bench_search")
+    ap.add_argument("--docs", type=int, default=1_000_000)
+    ap.add_argument("--vocab", type=int, default=100_000)
+    ap.add_argument("--min-len", type=int, default=40)
+    ap.add_argument("--max-len", type=int, default=160)
+    ap.add_argument("--queries", type=int, default=10, help="Запросов в каждой группе")
+    ap.add_argument("--repeat", type=int, default=5, help="Повторов каждого запроса (берутся все замеры)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--reuse", action="store_true", help="Не перестраивать индекс, если схема уже есть")
+    ap.add_argument("--skip-legacy", action="store_true", help="Не мерить прежний способ (он медленный)")
+    args = ap.parse_args()
+
+    engine = create_engine(args.url)
+    with engine.connect() as conn:
+        exists = conn.execute(text("SELECT to_regclass(:t)"), {"t": f'"{args.schema}".search_postings'}).scalar()
+    if not (args.reuse and exists):
+        print(f"building synthetic index: {args.docs} docs, vocab {args.vocab}")
+        build_index(engine, args.schema, args.docs, args.vocab, args.min_len, args.max_len, args.seed)
+
+    bound = engine.execution_options(schema_translate_map={None: args.schema})
+    with Session(bound) as db:
+        n_docs, avgdl = search_service._corpus_stats(db)
+        n_postings = db.execute(select(func.count()).select_from(SearchPosting)).scalar_one()
+        print(f"index: {n_docs} docs, {n_postings} postings, avgdl={avgdl:.1f}")
+
+        print(f"{'group':<8}{'mode':<8}{'p50, ms':>10}{'p99, ms':>10}{'max, ms':>10}{'same page':>11}{'recall':>8}{'total err':>11}")
+        for group, queries in _queries(args.vocab, args.queries, args.seed).items():
+            new_ms: List[float] = []
+            old_ms: List[float] = []
+            same = 0
+            recall: List[float] = []
+            total_err: List[float] = []
+            for query in queries:
+                search(db, query)  # прогрев кэша страниц
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    res = search(db, query)
+                    new_ms.append((time.perf_counter() - t0) * 1000)
+                if args.skip_legacy:
+                    continue
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    total, ids = legacy_search(db, query)
+                    old_ms.append((time.perf_counter() - t0) * 1000)
+                got = [it["candidate_id"] for it in res["items"]]
+                same += got == ids
+                recall.append(len(set(got) & set(ids)) / max(1, len(ids)))
+                total_err.append(abs(res["total"] - total) / max(1, total))
+            rows = [("pruned", new_ms)] + ([("legacy", old_ms)] if old_ms else [])
+            for mode, ms in rows:
+                extra = (f"{same}/{len(queries)}", f"{statistics.mean(recall):.2f}",
+                         f"{100 * statistics.mean(total_err):.1f}%") if mode == "pruned" and old_ms else ("", "", "")
+                print(f"{group:<8}{mode:<8}{statistics.median(ms):>10.1f}{_pct(ms, 0.99):>10.1f}{max(ms):>10.1f}"
+                      f"{extra[0]:>11}{extra[1]:>8}{extra[2]:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# backend/tools/fake_openai_server.py
+from __future__ import annotations
+"""
+Локальный OpenAI-совместимый сервер для прогона скоринга без реального API.
+
+    python -m backend.tools.fake_openai_server --port 8099 --latency 0.2 --fail-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=fake ...
+
+POST /v1/chat/completions отвечает детерминированным JSON-скорингом
+(score зависит от хеша запроса), с заданной задержкой; с вероятностью
+--fail-rate возвращает 429 (с Retry-After) или 500 — для проверки ретраев.
+При "stream": true отдаёт SSE-чанки фиксированной реплики интервьюера
+(--latency — до первого токена, --token-latency — между токенами).
+В конце (Ctrl+C) печатает статистику: запросы, ошибки, пик параллелизма.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors_429 = 0
+        self.errors_500 = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors_429": self.errors_429,
+                "errors_500": self.errors_500,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+
+def _fake_score(body: Dict[str, Any]) -> Dict[str, Any]:
+    raw = json.dumps(body.get("messages", []), ensure_ascii=False, sort_keys=True)
+    h = int(hashlib.sha1(raw.encode("utf-8")).hexdigest()[:8], 16)
+    return {
+        "score": h % 101,
+        "skills_coverage": round((h >> 8) % 101 / 100, 2),
+        "experience_fit": round((h >> 16) % 101 / 100, 2),
+        "salary_fit": round((h >> 24) % 101 / 100, 2),
+    }
+
+
+STREAM_REPLY = "Спасибо! Расскажите, пожалуйста, о самом сложном проекте за последний год и вашей роли в нём."
+
+
+def make_handler(latency: float, fail_rate: float, stats: _Stats, token_latency: float = 0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: Any) -> None:  # тихо
+            pass
+
+        def _send(self, code: int, payload: Dict[str, Any], headers: Dict[str, str] | None = None) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, body: Dict[str, Any]) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            words = STREAM_REPLY.split(" ")
+            for i, w in enumerate(words):
+                if i and token_latency:
+                    time.sleep(token_latency)
+                chunk = {
+                    "id": f"chatcmpl-fake-{stats.requests}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": w + (" " if i < len(words) - 1 else "")},
+                                 "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}})
+                return
+
+            with stats.lock:
+                stats.requests += 1
+                stats.in_flight += 1
+                stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            try:
+                if latency:
+                    time.sleep(random.uniform(0.5 * latency, 1.5 * latency))
+                if fail_rate and random.random() < fail_rate:
+                    if random.random() < 0.5:
+                        with stats.lock:
+                            stats.errors_429 += 1
+                        self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                                   {"Retry-After": "0.1"})
+                    else:
+                        with stats.lock:
+                            stats.errors_500 += 1
+                        self._send(500, {"error": {"message": "internal error", "type": "server_error"}})
+                    return
+
+                if body.get("stream"):
+                    self._stream(body)
+                    return
+                content = json.dumps(_fake_score(body))
+                self._send(200, {
+                    "id": f"chatcmpl-fake-{stats.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+            finally:
+                with stats.lock:
+                    stats.in_flight -= 1
+
+    return Handler
+
+
+def serve(
+    host: str,
+    port: int,
+    latency: float = 0.0,
+    fail_rate: float = 0.0,
+    token_latency: float = 0.0,
+) -> tuple[ThreadingHTTPServer, _Stats]:
+    """Запускает сервер в фоновом потоке (удобно для интеграционных прогонов)."""
+    stats = _Stats()
+    server = ThreadingHTTPServer((host, port), make_handler(latency, fail_rate, stats, token_latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--latency", type=float, default=0.2, help="Средняя задержка ответа, с")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Доля ответов 429/500")
+    ap.add_argument("--token-latency", type=float, default=0.05, help="Задержка между токенами при stream=true, с")
+    args = ap.parse_args()
+
+    server, stats = serve(args.host, args.port, args.latency, args.fail_rate, args.token_latency)
+    print(f"[fake-openai] http://{args.host}:{args.port}/v1  latency={args.latency}s fail_rate={args.fail_rate}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(json.dumps(stats.as_dict(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
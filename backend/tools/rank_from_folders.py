@@ -3,7 +3,6 @@ from __future__ import annotations
 
 import argparse
 import json
-import re
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple, Iterable
@@ -12,6 +11,8 @@ from backend.app.config import settings
 from backend.app.services.gdrive_service import get_storage
 from backend.app.services.parser_service import extract_text, parse_resume
 from backend.app.services.ai_matcher_service import rank_candidates
+from backend.app.services.dedup_service import MinHashLSH, minhash
+from backend.app.services.text_patterns import EMAIL_RE, PHONE_RE, first_match
 
 PROJ_ROOT = Path(__file__).resolve().parents[2]
 TEMP_DIR = PROJ_ROOT / "temp"
@@ -22,10 +23,6 @@ ALIAS = {
     "vacancies": ["vacancies", "jobs", "job_openings", "вакансии", "Вакансии", "вакансия"],
 }
 
-_email_re = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
-_phone_re = re.compile(r"\+?\d[\d\-\s()]{6,}\d")
-
-
 def _pick_latest(files: List[Dict]) -> Dict:
     def key_fn(f: Dict) -> Tuple[bool, datetime]:
         ts = f.get("modifiedTime") or ""
@@ -37,12 +34,23 @@ def _pick_latest(files: List[Dict]) -> Dict:
 
 
 def _signature(text: str) -> Tuple[str, str, str]:
-    email = (_email_re.search(text or "") or [""])[0].lower()
-    phone = (_phone_re.search(text or "") or [""])[0]
+    email = first_match(EMAIL_RE, text).lower()
+    phone = first_match(PHONE_RE, text)
     head = (text or "").strip().lower().replace("\n", " ")[:200]
     return (email, phone, head)
 
 
+def _is_near_duplicate(lsh: MinHashLSH, key: str, text: str) -> bool:
+    """Слегка отредактированное повторное резюме (MinHash/LSH); иначе — добавить в индекс."""
+    sig = minhash(text)
+    if sig is None:
+        return False
+    if lsh.query(sig):
+        return True
+    lsh.insert(key, sig)
+    return False
+
+
 # -------------------- GDRIVE --------------------
 
 def _resolve_folder_key(desired: str, role: str, available: Iterable[str]) -> str:
@@ -87,16 +95,18 @@ def _load_from_gdrive(resumes_key: str, vacancies_key: str) -> Tuple[str, List[D
         raise AssertionError(f"В папке '{resumes_key}' ничего не найдено. Доступные ключи: {list(mapping.keys())}")
 
     seen = set()
+    lsh = MinHashLSH()
     candidates: List[Dict] = []
     for i, f in enumerate(cand_files, 1):
         try:
             data = storage.download(f["id"])
-            txt = extract_text(data, max_pages=2)
+            # один разбор на файл: текст берём из результата parse_resume
+            doc = parse_resume(data, max_pages=2)
+            txt = doc["text"]
             sig = _signature(txt)
-            if sig in seen:
+            if sig in seen or _is_near_duplicate(lsh, f["id"], txt):
                 continue
             seen.add(sig)
-            doc = parse_resume(data)
             name = f.get("name") or (doc.get("contacts", {}) or {}).get("name") or f"cand-{i}"
             candidates.append({"id": f["id"], "name": name, "text": txt})
         except Exception as e:
@@ -130,16 +140,17 @@ def _load_from_local(resumes_dir: Path, vacancies_dir: Path) -> Tuple[str, List[
         raise AssertionError(f"В папке '{resumes_dir}' ничего не найдено.")
 
     seen = set()
+    lsh = MinHashLSH()
     candidates: List[Dict] = []
     for i, p in enumerate(cand_files, 1):
         try:
             data = p.read_bytes()
-            txt = extract_text(data, max_pages=2)
+            doc = parse_resume(data, max_pages=2)
+            txt = doc["text"]
             sig = _signature(txt)
-            if sig in seen:
+            if sig in seen or _is_near_duplicate(lsh, str(p), txt):
                 continue
             seen.add(sig)
-            doc = parse_resume(data)
             name = (doc.get("contacts", {}) or {}).get("name") or p.stem
             candidates.append({"id": p.name, "name": name, "text": txt})
         except Exception as e:
@@ -0,0 +1,51 @@
+"""add jobs table (background job queue)
+
+Revision ID: a1c3e5f7b9d2
+Revises: 35fe5d9e9926
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f7b9d2'
+down_revision: Union[str, Sequence[str], None] = '35fe5d9e9926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=50), nullable=False, comment="Тип задачи: ingest/rank/interview_evaluation"),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("params", postgresql.JSONB(astext_type=sa.Text()), nullable=False, comment="Параметры запуска"),
+        sa.Column("progress_done", sa.Integer(), nullable=False),
+        sa.Column("progress_total", sa.Integer(), nullable=True, comment="Общий объём работы, если известен"),
+        sa.Column("progress_info", postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment="Произвольные промежуточные данные"),
+        sa.Column("result", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("cancel_requested", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_jobs")),
+    )
+    op.create_index(op.f("ix_jobs_id"), "jobs", ["id"], unique=False)
+    op.create_index("ix_jobs_status", "jobs", ["status"], unique=False)
+    op.create_index("ix_jobs_kind", "jobs", ["kind"], unique=False)
+    op.create_index("ix_jobs_created_at", "jobs", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_created_at", table_name="jobs")
+    op.drop_index("ix_jobs_kind", table_name="jobs")
+    op.drop_index("ix_jobs_status", table_name="jobs")
+    op.drop_index(op.f("ix_jobs_id"), table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,26 @@
+"""add (interview_id, id) index to interview_messages
+
+Revision ID: a7c9e1f3b5d6
+Revises: f6b8d0c2e4a5
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1f3b5d6'
+down_revision: Union[str, Sequence[str], None] = 'f6b8d0c2e4a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # проверка свежести кэша диалога (max(id)/count по интервью) и дочитывание истории
+    op.create_index("ix_interview_messages_interview_id_id", "interview_messages", ["interview_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_interview_messages_interview_id_id", table_name="interview_messages")
@@ -0,0 +1,51 @@
+"""add inverted search index for candidates (BM25)
+
+Revision ID: b2d4f6a8c0e1
+Revises: a1c3e5f7b9d2
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c0e1'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f7b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "search_documents",
+        sa.Column("candidate_id", sa.Integer(), nullable=False),
+        sa.Column("length", sa.Integer(), nullable=False, comment="Число токенов в документе"),
+        sa.Column("text_hash", sa.String(length=40), nullable=True, comment="sha1 проиндексированного текста"),
+        sa.ForeignKeyConstraint(["candidate_id"], ["candidates.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("candidate_id", name=op.f("pk_search_documents")),
+    )
+    op.create_table(
+        "search_terms",
+        sa.Column("term", sa.String(length=64), nullable=False),
+        sa.Column("df", sa.Integer(), nullable=False, comment="В скольких документах встречается"),
+        sa.PrimaryKeyConstraint("term", name=op.f("pk_search_terms")),
+    )
+    op.create_table(
+        "search_postings",
+        sa.Column("term", sa.String(length=64), nullable=False),
+        sa.Column("candidate_id", sa.Integer(), nullable=False),
+        sa.Column("tf", sa.Integer(), nullable=False, comment="Частота термина в документе"),
+        sa.ForeignKeyConstraint(["candidate_id"], ["candidates.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("term", "candidate_id", name=op.f("pk_search_postings")),
+    )
+    op.create_index("ix_search_postings_candidate", "search_postings", ["candidate_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_postings_candidate", table_name="search_postings")
+    op.drop_table("search_postings")
+    op.drop_table("search_terms")
+    op.drop_table("search_documents")
@@ -0,0 +1,41 @@
+"""add precomputed BM25 impact to search_postings
+
+Revision ID: b8d0f2a4c6e7
+Revises: a7c9e1f3b5d6
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d0f2a4c6e7'
+down_revision: Union[str, Sequence[str], None] = 'a7c9e1f3b5d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# как в search_service
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def upgrade() -> None:
+    op.add_column("search_postings", sa.Column("impact", sa.Float(), nullable=False, server_default="0",
+                                               comment="BM25-вклад термина без idf"))
+    op.execute(f"""
+        UPDATE search_postings p
+        SET impact = p.tf * {BM25_K1 + 1.0}
+                     / (p.tf + {BM25_K1} * (1 - {BM25_B} + {BM25_B} * d.length / s.avgdl))
+        FROM search_documents d,
+             (SELECT coalesce(nullif(avg(length), 0), 1) AS avgdl FROM search_documents) s
+        WHERE d.candidate_id = p.candidate_id
+    """)
+    op.create_index("ix_search_postings_term_impact", "search_postings", ["term", "impact", "candidate_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_postings_term_impact", table_name="search_postings")
+    op.drop_column("search_postings", "impact")
@@ -0,0 +1,48 @@
+"""add minhash signatures and lsh buckets for near-duplicate resumes
+
+Revision ID: c3e5a7b9d1f2
+Revises: b2d4f6a8c0e1
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b9d1f2'
+down_revision: Union[str, Sequence[str], None] = 'b2d4f6a8c0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "candidate_minhashes",
+        sa.Column("candidate_id", sa.Integer(), nullable=False),
+        sa.Column("signature", sa.LargeBinary(), nullable=False, comment="uint32 × num_perm, little-endian"),
+        sa.Column("duplicate_of", sa.Integer(), nullable=True, comment="Исходный кандидат, если резюме — почти-дубликат"),
+        sa.Column("similarity", sa.Float(), nullable=True, comment="Оценка Jaccard с исходным кандидатом"),
+        sa.ForeignKeyConstraint(["candidate_id"], ["candidates.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["duplicate_of"], ["candidates.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("candidate_id", name=op.f("pk_candidate_minhashes")),
+    )
+    op.create_index("ix_candidate_minhashes_duplicate_of", "candidate_minhashes", ["duplicate_of"], unique=False)
+    op.create_table(
+        "candidate_lsh_buckets",
+        sa.Column("band", sa.SmallInteger(), nullable=False),
+        sa.Column("bucket", sa.BigInteger(), nullable=False),
+        sa.Column("candidate_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["candidate_id"], ["candidates.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("band", "bucket", "candidate_id", name=op.f("pk_candidate_lsh_buckets")),
+    )
+    op.create_index("ix_candidate_lsh_buckets_candidate", "candidate_lsh_buckets", ["candidate_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_candidate_lsh_buckets_candidate", table_name="candidate_lsh_buckets")
+    op.drop_table("candidate_lsh_buckets")
+    op.drop_index("ix_candidate_minhashes_duplicate_of", table_name="candidate_minhashes")
+    op.drop_table("candidate_minhashes")
@@ -0,0 +1,29 @@
+"""add heartbeat_at to jobs
+
+Revision ID: c9e1f3a5b7d8
+Revises: b8d0f2a4c6e7
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1f3a5b7d8'
+down_revision: Union[str, Sequence[str], None] = 'b8d0f2a4c6e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("jobs", sa.Column("heartbeat_at", sa.DateTime(), nullable=True,
+                                    comment="Последнее продление аренды воркером (running)"))
+    # уже выполняющиеся задачи — аренда с момента старта
+    op.execute("UPDATE jobs SET heartbeat_at = started_at WHERE status = 'running'")
+
+
+def downgrade() -> None:
+    op.drop_column("jobs", "heartbeat_at")
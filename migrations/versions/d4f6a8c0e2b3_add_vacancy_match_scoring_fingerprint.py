@@ -0,0 +1,35 @@
+"""add scoring fingerprint to vacancy_matches (incremental re-ranking)
+
+Revision ID: d4f6a8c0e2b3
+Revises: c3e5a7b9d1f2
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6a8c0e2b3'
+down_revision: Union[str, Sequence[str], None] = 'c3e5a7b9d1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("vacancy_matches", sa.Column("resume_hash", sa.String(length=64), nullable=True,
+                                               comment="SHA-256 текста резюме на момент скоринга"))
+    op.add_column("vacancy_matches", sa.Column("vacancy_hash", sa.String(length=64), nullable=True,
+                                               comment="SHA-256 текста вакансии на момент скоринга"))
+    op.add_column("vacancy_matches", sa.Column("scoring_version", sa.String(length=64), nullable=True,
+                                               comment="Скорер + версия промпта/модели/весов"))
+    op.add_column("vacancy_matches", sa.Column("scored_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("vacancy_matches", "scored_at")
+    op.drop_column("vacancy_matches", "scoring_version")
+    op.drop_column("vacancy_matches", "vacancy_hash")
+    op.drop_column("vacancy_matches", "resume_hash")
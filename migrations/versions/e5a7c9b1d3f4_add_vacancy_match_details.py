@@ -0,0 +1,27 @@
+"""add details json to vacancy_matches
+
+Revision ID: e5a7c9b1d3f4
+Revises: d4f6a8c0e2b3
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9b1d3f4'
+down_revision: Union[str, Sequence[str], None] = 'd4f6a8c0e2b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("vacancy_matches", sa.Column("details", sa.JSON(), nullable=True,
+                                               comment="Детальный ответ скорера (skills_coverage, reasons, ...)"))
+
+
+def downgrade() -> None:
+    op.drop_column("vacancy_matches", "details")
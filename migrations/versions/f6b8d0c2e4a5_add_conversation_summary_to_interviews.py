@@ -0,0 +1,30 @@
+"""add rolling conversation summary to interviews
+
+Revision ID: f6b8d0c2e4a5
+Revises: e5a7c9b1d3f4
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b8d0c2e4a5'
+down_revision: Union[str, Sequence[str], None] = 'e5a7c9b1d3f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("interviews", sa.Column("conversation_summary", sa.Text(), nullable=True,
+                                          comment="Краткое содержание ранних реплик чата"))
+    op.add_column("interviews", sa.Column("conversation_summary_upto", sa.Integer(), nullable=True,
+                                          comment="id последнего сообщения, вошедшего в summary"))
+
+
+def downgrade() -> None:
+    op.drop_column("interviews", "conversation_summary_upto")
+    op.drop_column("interviews", "conversation_summary")